@@ -0,0 +1,76 @@
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from .models import FinancialEntry
+from .serializers import FinancialEntryBulkItemSerializer
+from .signals import entries_bulk_created
+from .summary import record_entries
+
+
+def _existing_keys(user, keys):
+    if not keys:
+        return {}
+    return dict(FinancialEntry.objects.filter(user=user, client_key__in=keys).values_list('client_key', 'id'))
+
+
+def _ingest(user, items):
+    child = FinancialEntryBulkItemSerializer()
+    item_keys, malformed = [], {}
+    for index, item in enumerate(items):
+        try:
+            item_keys.append(child.validate_item_key(item))
+        except ValidationError as e:
+            item_keys.append(None)
+            malformed[index] = e.detail
+    stored = _existing_keys(user, {key for key in item_keys if key})
+
+    results, pending, batch = [], [], {}
+    for index, (item, key) in enumerate(zip(items, item_keys)):
+        if index in malformed:
+            results.append({'index': index, 'status': 'invalid', 'errors': malformed[index]})
+            continue
+        if key and key in stored:
+            results.append({'index': index, 'status': 'duplicate', 'id': stored[key], 'client_key': key})
+            continue
+        if key and key in batch:
+            # Same key twice in one upload resolves to the first occurrence
+            results.append({'index': index, 'status': 'duplicate', 'id': None, 'client_key': key})
+            continue
+        try:
+            validated = child.run_validation(item)
+        except ValidationError as e:
+            results.append({'index': index, 'status': 'invalid', 'errors': e.detail})
+            continue
+        entry = FinancialEntry(user=user, **validated)
+        if entry.client_key:
+            batch[entry.client_key] = entry
+        results.append({'index': index, 'status': 'created', 'id': None, 'client_key': entry.client_key})
+        pending.append(entry)
+
+    with transaction.atomic():
+        FinancialEntry.objects.bulk_create(pending)
+        if pending:
+            record_entries(user.pk, added=pending)
+            entries_bulk_created.send(sender=FinancialEntry, user_id=user.pk, entries=pending)
+
+    created = iter(pending)
+    for result in results:
+        if result['status'] == 'created':
+            result['id'] = next(created).pk
+        elif result['status'] == 'duplicate' and result['id'] is None:
+            result['id'] = batch[result['client_key']].pk
+    return results
+
+
+def ingest_entries(user, items):
+    """
+    Validate and insert a batch of entries for one user in a single transaction.
+
+    Returns one result per item, in order, with status ``created``,
+    ``duplicate`` (the client_key was already stored) or ``invalid``.
+    """
+    try:
+        return _ingest(user, items)
+    except IntegrityError:
+        # A concurrent retry stored some of the same keys first; they now
+        # resolve as duplicates on the second pass
+        return _ingest(user, items)
@@ -0,0 +1,57 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+EXPORT_FIELDS = ['id', 'date', 'entry_type', 'amount', 'source', 'description']
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset):
+    # values_list + iterator streams rows from a server-side cursor in chunks
+    return queryset.order_by('date', 'id').values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=settings.HEVA_EXPORT_CHUNK_SIZE,
+    )
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in iter_rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset):
+    for row in iter_rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + '\n'
+
+
+async def aiter_lines(lines):
+    """
+    Async iterator over the sync generator ``lines`` for the ASGI server.
+
+    Given a sync iterator, Django's ASGI handler reads it to the end in one
+    thread before sending anything. Here each HEVA_EXPORT_CHUNK_SIZE lines
+    are pulled in the request's sync thread, which also owns the database
+    cursor, and sent as one chunk before the next batch is read.
+    """
+    next_batch = sync_to_async(lambda: list(islice(lines, settings.HEVA_EXPORT_CHUNK_SIZE)))
+    try:
+        while batch := await next_batch():
+            yield ''.join(batch)
+    finally:
+        # Release the cursor if the client went away mid-export
+        await sync_to_async(lines.close)()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
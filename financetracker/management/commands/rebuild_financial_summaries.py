@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from userauth.models import User
+from financetracker.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user FinancialSummary rows from the raw financial entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users rebuilt per batch')
+        parser.add_argument('--user-ids', help='Comma-separated user ids to rebuild')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        users = User.objects.all()
+        if options['user_ids']:
+            try:
+                users = users.filter(id__in=[int(value) for value in options['user_ids'].split(',') if value.strip()])
+            except ValueError:
+                raise CommandError('--user-ids must be a comma-separated list of integers')
+
+        total = users.count()
+        done = 0
+        last_id = 0
+        while True:
+            chunk = list(users.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['chunk_size']])
+            if not chunk:
+                break
+            done += rebuild_summaries(chunk)
+            last_id = chunk[-1]
+            self.stdout.write(f'Rebuilt {done}/{total} summaries')
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {done} financial summaries'))
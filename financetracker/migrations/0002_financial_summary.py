@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+
+BACKFILL_CHUNK = 1000
+
+
+def backfill_summaries(apps, schema_editor):
+    # Summaries are maintained incrementally from here on, so existing
+    # ledgers need a starting point. Historical models only: the app's
+    # rebuild_summaries() reads columns added by later migrations.
+    FinancialEntry = apps.get_model('financetracker', 'FinancialEntry')
+    FinancialSummary = apps.get_model('financetracker', 'FinancialSummary')
+    user_ids = list(FinancialEntry.objects.values_list('user_id', flat=True).distinct().order_by('user_id'))
+    for offset in range(0, len(user_ids), BACKFILL_CHUNK):
+        chunk = user_ids[offset:offset + BACKFILL_CHUNK]
+        summaries = {user_id: FinancialSummary(user_id=user_id, monthly={}) for user_id in chunk}
+        rows = (
+            FinancialEntry.objects.filter(user_id__in=chunk)
+            .annotate(month=TruncMonth('date')).values('user_id', 'entry_type', 'month')
+            .annotate(total=Sum('amount'), count=Count('id'), first=Min('date'), last=Max('date'))
+            .order_by()
+        )
+        for row in rows:
+            summary = summaries[row['user_id']]
+            entry_type = row['entry_type']
+            total = row['total'].quantize(Decimal('0.01'))
+            setattr(summary, f'{entry_type}_total', getattr(summary, f'{entry_type}_total') + total)
+            setattr(summary, f'{entry_type}_count', getattr(summary, f'{entry_type}_count') + row['count'])
+            bucket = summary.monthly.setdefault(row['month'].strftime('%Y-%m'), {})
+            bucket[entry_type] = str(total)
+            bucket[f'{entry_type}_count'] = row['count']
+            if summary.first_entry_date is None or row['first'] < summary.first_entry_date:
+                summary.first_entry_date = row['first']
+            if summary.last_entry_date is None or row['last'] > summary.last_entry_date:
+                summary.last_entry_date = row['last']
+        FinancialSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financetracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('funding_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('other_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('income_count', models.IntegerField(default=0)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('funding_count', models.IntegerField(default=0)),
+                ('other_count', models.IntegerField(default=0)),
+                ('first_entry_date', models.DateField(blank=True, null=True)),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('monthly', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='financial_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financetracker', '0002_financial_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financialentry',
+            index=models.Index(fields=['user', 'date', 'id'], name='fin_entry_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financetracker', '0003_list_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialentry',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='financialentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_key__isnull', False)), fields=('user', 'client_key'), name='unique_entry_client_key'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financetracker', '0004_entry_client_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='financialentry',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='fin_entry_user_updated_idx'),
+        ),
+    ]
@@ -16,6 +16,46 @@ class FinancialEntry(models.Model):
     description = models.TextField(blank=True)
     date = models.DateField(auto_now_add=True)
     source = models.CharField(max_length=100, blank=True)  # e.g., M-PESA, cash, etc.
+    client_key = models.CharField(max_length=64, null=True, blank=True)  # Idempotency key chosen by the client
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Backs the (-date, -id) keyset pagination of a user's list
+            models.Index(fields=['user', 'date', 'id'], name='fin_entry_user_date_idx'),
+            # Backs the delta-sync changes feed
+            models.Index(fields=['user', 'updated_at', 'id'], name='fin_entry_user_updated_idx'),
+        ]
+        constraints = [
+            # Retried uploads carry the same key, so each entry is stored once
+            models.UniqueConstraint(
+                fields=['user', 'client_key'], condition=models.Q(client_key__isnull=False),
+                name='unique_entry_client_key',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.entry_type} - {self.amount}'
+
+class FinancialSummary(models.Model):
+    """Running per-user totals, maintained on every FinancialEntry write"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='financial_summary')
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    funding_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    other_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    income_count = models.IntegerField(default=0)
+    expense_count = models.IntegerField(default=0)
+    funding_count = models.IntegerField(default=0)
+    other_count = models.IntegerField(default=0)
+    first_entry_date = models.DateField(null=True, blank=True)
+    last_entry_date = models.DateField(null=True, blank=True)
+    monthly = models.JSONField(default=dict, blank=True)  # e.g. {'2025-07': {'income': '1200.00', 'income_count': 3}}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def entry_count(self):
+        return self.income_count + self.expense_count + self.funding_count + self.other_count
+
+    def __str__(self):
+        return f'{self.user.email} - income {self.income_total} - expenses {self.expense_total}'
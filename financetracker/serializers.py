@@ -1,8 +1,40 @@
 from rest_framework import serializers
-from .models import FinancialEntry
+from rest_framework.settings import api_settings
+from .models import FinancialEntry, FinancialSummary
 
 class FinancialEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = FinancialEntry
         fields = '__all__'
-        read_only_fields = ['user']
\ No newline at end of file
+        read_only_fields = ['user']
+
+    def validate_client_key(self, value):
+        return value or None
+
+class FinancialEntryBulkItemSerializer(FinancialEntrySerializer):
+    # Uniqueness of client_key is resolved in one query for the whole batch
+    class Meta(FinancialEntrySerializer.Meta):
+        validators = []
+
+    def validate_item_key(self, item):
+        """
+        Check an item's shape and return its client_key ahead of full validation.
+
+        The batch is deduplicated on client_key before each item is validated,
+        so the key has to be a usable string (or absent) by then.
+        """
+        if not isinstance(item, dict):
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected an object.']})
+        try:
+            key = self.fields['client_key'].run_validation(item.get('client_key'))
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({'client_key': e.detail})
+        return key or None
+
+class FinancialSummarySerializer(serializers.ModelSerializer):
+    entry_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = FinancialSummary
+        exclude = ['id']
+        read_only_fields = ['user']
@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from heva_backend.etags import bump_versions
+from userauth.models import User
+from .models import FinancialEntry
+from .summary import record_entries
+from .trends import invalidate_closed_trends
+
+# Sent with user_id and entries after a bulk_create, which skips post_save
+entries_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=FinancialEntry)
+def remember_previous_entry(sender, instance, **kwargs):
+    # Edits need the stored values to back them out of the summary
+    instance._summary_previous = None
+    if instance.pk is not None and not instance._state.adding:
+        instance._summary_previous = (
+            FinancialEntry.objects.filter(pk=instance.pk).values('user_id', 'entry_type', 'amount', 'date').first()
+        )
+
+
+@receiver(post_save, sender=FinancialEntry)
+def update_summary_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    if created or previous is None:
+        record_entries(instance.user_id, added=[instance])
+    elif previous['user_id'] == instance.user_id:
+        record_entries(instance.user_id, added=[instance], removed=[previous])
+        invalidate_closed_trends(instance.user_id)
+    else:
+        record_entries(previous['user_id'], removed=[previous])
+        record_entries(instance.user_id, added=[instance])
+        invalidate_closed_trends(previous['user_id'])
+        invalidate_closed_trends(instance.user_id)
+
+
+@receiver(post_delete, sender=FinancialEntry)
+def update_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # The summary goes away with its user, so cascades need no bookkeeping
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    record_entries(instance.user_id, removed=[instance])
+    invalidate_closed_trends(instance.user_id)
+
+
+@receiver(post_save, sender=FinancialEntry)
+@receiver(post_delete, sender=FinancialEntry)
+def bump_entry_versions(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    bump_versions('finance', {instance.user_id, previous['user_id'] if previous else instance.user_id})
+    bump_versions('activity')
+
+
+@receiver(entries_bulk_created)
+def bump_bulk_entry_versions(sender, user_id, **kwargs):
+    bump_versions('finance', [user_id])
+    bump_versions('activity')
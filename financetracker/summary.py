@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+from heva_backend.etags import bump_versions
+from .models import FinancialEntry, FinancialSummary
+
+ENTRY_TYPES = [choice for choice, _ in FinancialEntry.ENTRY_TYPES]
+SUMMARY_FIELDS = (
+    [f'{entry_type}_total' for entry_type in ENTRY_TYPES]
+    + [f'{entry_type}_count' for entry_type in ENTRY_TYPES]
+    + ['first_entry_date', 'last_entry_date', 'monthly']
+)
+CENTS = Decimal('0.01')
+
+
+def _month_key(day):
+    return day.strftime('%Y-%m')
+
+
+def _fields(entry):
+    if isinstance(entry, dict):
+        return entry['entry_type'], entry['amount'], entry['date']
+    return entry.entry_type, entry.amount, entry.date
+
+
+def _apply(summary, entry_type, amount, day, sign):
+    """Add (sign=1) or remove (sign=-1) one entry from an in-memory summary"""
+    amount = Decimal(amount).quantize(CENTS)
+    setattr(summary, f'{entry_type}_total', getattr(summary, f'{entry_type}_total') + sign * amount)
+    setattr(summary, f'{entry_type}_count', getattr(summary, f'{entry_type}_count') + sign)
+
+    key = _month_key(day)
+    bucket = summary.monthly.setdefault(key, {})
+    bucket[entry_type] = str((Decimal(bucket.get(entry_type, '0')) + sign * amount).quantize(CENTS))
+    bucket[f'{entry_type}_count'] = bucket.get(f'{entry_type}_count', 0) + sign
+    if bucket[f'{entry_type}_count'] <= 0:
+        del bucket[entry_type], bucket[f'{entry_type}_count']
+    if not bucket:
+        del summary.monthly[key]
+
+    if sign > 0:
+        if summary.first_entry_date is None or day < summary.first_entry_date:
+            summary.first_entry_date = day
+        if summary.last_entry_date is None or day > summary.last_entry_date:
+            summary.last_entry_date = day
+
+
+def record_entries(user_id, added=(), removed=()):
+    """
+    Fold entry changes into the user's summary inside the caller's transaction.
+
+    ``added`` and ``removed`` are iterables of objects or dicts exposing
+    entry_type, amount and date. Used by the model signals for single
+    writes and called directly by bulk paths that bypass signals.
+    """
+    with transaction.atomic():
+        summary, _ = FinancialSummary.objects.select_for_update().get_or_create(user_id=user_id)
+        boundary_removed = False
+        for entry in removed:
+            entry_type, amount, day = _fields(entry)
+            _apply(summary, entry_type, amount, day, -1)
+            boundary_removed |= day in (summary.first_entry_date, summary.last_entry_date)
+        for entry in added:
+            _apply(summary, *_fields(entry), 1)
+
+        if summary.entry_count == 0:
+            summary.first_entry_date = summary.last_entry_date = None
+        elif boundary_removed:
+            # Min/max cannot be decremented, so re-read them from the user's entries
+            bounds = FinancialEntry.objects.filter(user_id=user_id).aggregate(first=Min('date'), last=Max('date'))
+            summary.first_entry_date, summary.last_entry_date = bounds['first'], bounds['last']
+        summary.save()
+    return summary
+
+
+def rebuild_summaries(user_ids):
+    """Recompute the summaries of the given users from scratch with one grouped query"""
+    summaries = {user_id: FinancialSummary(user_id=user_id, monthly={}) for user_id in user_ids}
+    rows = (
+        FinancialEntry.objects.filter(user_id__in=user_ids)
+        .annotate(month=TruncMonth('date')).values('user_id', 'entry_type', 'month')
+        .annotate(total=Sum('amount'), count=Count('id'), first=Min('date'), last=Max('date'))
+        .order_by()
+    )
+    for row in rows:
+        summary = summaries[row['user_id']]
+        entry_type = row['entry_type']
+        row['total'] = row['total'].quantize(CENTS)
+        setattr(summary, f'{entry_type}_total', getattr(summary, f'{entry_type}_total') + row['total'])
+        setattr(summary, f'{entry_type}_count', getattr(summary, f'{entry_type}_count') + row['count'])
+        bucket = summary.monthly.setdefault(_month_key(row['month']), {})
+        bucket[entry_type] = str(row['total'])
+        bucket[f'{entry_type}_count'] = row['count']
+        if summary.first_entry_date is None or row['first'] < summary.first_entry_date:
+            summary.first_entry_date = row['first']
+        if summary.last_entry_date is None or row['last'] > summary.last_entry_date:
+            summary.last_entry_date = row['last']
+
+    FinancialSummary.objects.bulk_create(
+        summaries.values(), update_conflicts=True, unique_fields=['user'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    bump_versions('finance', summaries.keys())
+    return len(summaries)
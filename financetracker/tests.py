@@ -1,3 +1,226 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from heva_backend.checks import etags_need_shared_cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from userauth.authentication import ClaimsRefreshToken
+from userauth.models import User
+from .models import FinancialEntry
+
+
+def make_user(name='creative'):
+    # No password: hashing one would dominate the test run
+    return User.objects.create_user(email=f'{name}@example.org', username=name, password=None, full_name=name.title())
+
+
+def add_entry(user, day, amount='100.00', entry_type='income', **fields):
+    entry = FinancialEntry.objects.create(user=user, amount=amount, entry_type=entry_type, **fields)
+    # date is auto_now_add, so back-date it after the insert
+    FinancialEntry.objects.filter(pk=entry.pk).update(date=day)
+    entry.date = day
+    return entry
+
+
+class KeysetPaginationTests(TestCase):
+    url = reverse('financial-entry-list-create')
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = date(2026, 3, 10)
+        # Several entries share a date, so the id breaks the ties
+        self.entries = [add_entry(self.user, today - timedelta(days=i // 3)) for i in range(8)]
+        add_entry(make_user('other'), today)
+
+    def _walk(self, page_size):
+        ids, url, params = [], self.url, {'page_size': page_size}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids += [row['id'] for row in response.data['results']]
+            url, params = response.data['next'], None
+        return ids
+
+    def test_pages_cover_the_ledger_once_in_order(self):
+        expected = [e.pk for e in sorted(self.entries, key=lambda e: (e.date, e.pk), reverse=True)]
+        for page_size in (1, 3, 8, 50):
+            self.assertEqual(self._walk(page_size), expected)
+
+    def test_cursor_is_stable_when_newer_rows_arrive(self):
+        first = self.client.get(self.url, {'page_size': 3}).data
+        add_entry(self.user, date(2026, 3, 11))
+        cursor = parse_qs(urlparse(first['next']).query)['cursor'][0]
+        second = self.client.get(self.url, {'page_size': 3, 'cursor': cursor}).data
+        seen = {row['id'] for row in first['results']}
+        self.assertFalse(seen & {row['id'] for row in second['results']})
+        self.assertEqual(second['results'][0]['id'], self._walk(50)[4])
+
+    def test_last_page_has_no_next_link(self):
+        response = self.client.get(self.url, {'page_size': 8})
+        self.assertIsNone(response.data['next'])
+
+    def test_malformed_cursors_are_not_found(self):
+        for cursor in ('not-base64!', 'WzFd', 'eyJhIjogMX0=', 'WyJub3QtYS1kYXRlIiwgMV0='):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.client.get(self.url, {'page_size': 0}).data['results']), 1)
+        self.assertEqual(len(self.client.get(self.url, {'page_size': 'many'}).data['results']), 8)
+
+
+class BulkIngestTests(TestCase):
+    url = reverse('financial-entry-bulk-create')
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post(self, entries):
+        return self.client.post(self.url, {'entries': entries}, format='json')
+
+    def _entry(self, key=None, amount='50.00'):
+        entry = {'amount': amount, 'entry_type': 'expense', 'source': 'cash'}
+        if key is not None:
+            entry['client_key'] = key
+        return entry
+
+    def test_retried_batch_creates_nothing_twice(self):
+        batch = [self._entry('a'), self._entry('b'), self._entry()]
+        first = self._post(batch)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((first.data['created'], first.data['duplicate']), (3, 0))
+        retry = self._post(batch[:2])
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual([r['status'] for r in retry.data['results']], ['duplicate', 'duplicate'])
+        self.assertEqual([r['id'] for r in retry.data['results']], [r['id'] for r in first.data['results'][:2]])
+        self.assertEqual(FinancialEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_repeated_key_within_a_batch_resolves_to_the_first(self):
+        response = self._post([self._entry('a', '1.00'), self._entry('a', '2.00')])
+        first, second = response.data['results']
+        self.assertEqual((first['status'], second['status']), ('created', 'duplicate'))
+        self.assertEqual(second['id'], first['id'])
+        self.assertEqual(FinancialEntry.objects.get().amount, 1)
+
+    def test_keys_are_scoped_to_the_user(self):
+        add_entry(make_user('other'), date(2026, 1, 1), client_key='a')
+        self.assertEqual(self._post([self._entry('a')]).data['created'], 1)
+
+    def test_invalid_and_malformed_items_are_reported_not_fatal(self):
+        response = self._post([
+            self._entry('ok'), {'amount': 'lots', 'entry_type': 'expense'}, 'not an object',
+            self._entry(['not', 'a', 'string']), self._entry({'nested': 1}),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [r['status'] for r in response.data['results']], ['created', 'invalid', 'invalid', 'invalid', 'invalid'],
+        )
+        self.assertIn('amount', response.data['results'][1]['errors'])
+        self.assertIn('client_key', response.data['results'][3]['errors'])
+        self.assertEqual(FinancialEntry.objects.count(), 1)
+
+    def test_summary_follows_bulk_inserts(self):
+        self._post([self._entry(amount='10.00'), self._entry(amount='5.50')])
+        summary = self.client.get(reverse('financial-summary')).data
+        self.assertEqual((summary['expense_total'], summary['expense_count']), ('15.50', 2))
+
+    def test_empty_and_oversized_batches_are_refused(self):
+        self.assertEqual(self._post([]).status_code, 400)
+        with self.settings(HEVA_FINANCE_BULK_MAX_ENTRIES=2):
+            self.assertEqual(self._post([self._entry()] * 3).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    url = reverse('financial-entry-list-create')
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        add_entry(self.user, date(2026, 1, 5))
+
+    def _get(self, url=None, etag=None, **params):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url or self.url, params, headers=headers)
+
+    def test_unchanged_data_revalidates_with_304(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+        second = self._get(etag=first['ETag'])
+        self.assertEqual((second.status_code, second.content, second['ETag']), (304, b'', first['ETag']))
+        self.assertEqual(self._get(etag='*').status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'amount': '5.00', 'entry_type': 'expense'}, format='json')
+        response = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_other_users_writes_keep_the_etag(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            add_entry(make_user('other'), date(2026, 1, 6))
+        self.assertEqual(self._get(etag=etag).status_code, 304)
+
+    def test_etag_depends_on_user_and_query(self):
+        etag = self._get()['ETag']
+        self.assertEqual(self._get(etag=etag, page_size=1).status_code, 200)
+        self.client.force_authenticate(make_user('other'))
+        self.assertEqual(self._get(etag=etag).status_code, 200)
+
+    def test_summary_follows_bulk_writes(self):
+        summary_url = reverse('financial-summary')
+        etag = self._get(summary_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('financial-entry-bulk-create'), [{'amount': '1.00', 'entry_type': 'income'}], format='json',
+            )
+        self.assertEqual(self._get(summary_url, etag=etag).status_code, 200)
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        self.assertEqual([w.id for w in etags_need_shared_cache(None)], ['heva_backend.W001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(etags_need_shared_cache(None), [])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.entries = [add_entry(self.user, date(2026, 2, day), description=f'day {day}') for day in (3, 1, 2)]
+        add_entry(make_user('other'), date(2026, 2, 1))
+        self.url = reverse('financial-entry-export', args=['ndjson'])
+
+    def _ids(self, lines):
+        return [int(line.split(',')[0]) for line in lines.splitlines()[1:]]
+
+    def test_csv_streams_the_users_rows_in_date_order(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('financial-entry-export', args=['csv']))
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('id,date,entry_type'))
+        self.assertEqual(self._ids(body), [self.entries[1].pk, self.entries[2].pk, self.entries[0].pk])
+
+    async def test_asgi_export_is_an_async_stream(self):
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.settings(HEVA_EXPORT_CHUNK_SIZE=2):
+            response = await AsyncClient().get(self.url, headers={'Authorization': f'Bearer {token}'})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        # Two rows per chunk
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(b''.join(chunks).splitlines()), 3)
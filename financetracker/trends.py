@@ -0,0 +1,120 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import FinancialEntry
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+GROUPINGS = ['entry_type', 'source']
+DEFAULT_PERIODS = {'day': 30, 'week': 26, 'month': 12}
+
+
+def bucket_start(day, bucket):
+    """First day of the bucket containing ``day`` (weeks start on Monday, as TruncWeek does)"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(weeks=1)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def default_start(end, bucket):
+    start = bucket_start(end, bucket)
+    for _ in range(DEFAULT_PERIODS[bucket] - 1):
+        start = bucket_start(start - timedelta(days=1), bucket)
+    return start
+
+
+def periods_between(start, end, bucket):
+    periods = []
+    period = bucket_start(start, bucket)
+    while period <= end:
+        periods.append(period)
+        period = next_bucket(period, bucket)
+    return periods
+
+
+def _query(user_id, bucket, group_by, start, end):
+    """One grouped aggregate over the user's (user, date) index range"""
+    rows = (
+        FinancialEntry.objects.filter(user_id=user_id, date__range=(start, end))
+        .annotate(period=BUCKETS[bucket]('date')).values('period', group_by)
+        .annotate(total=Sum('amount'), count=Count('id')).order_by()
+    )
+    return [(row['period'], row[group_by] or 'unspecified', row['total'], row['count']) for row in rows]
+
+
+def _version_key(user_id):
+    return f'financetracker:trends-version:{user_id}'
+
+
+def invalidate_closed_trends(user_id):
+    """Retire a user's cached closed periods after an entry in the past changes"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), 1, None)
+
+
+def _closed_rows(user_id, bucket, group_by, start, end):
+    version = cache.get(_version_key(user_id), 0)
+    key = f'financetracker:trends:{user_id}:{version}:{bucket}:{group_by}:{start}:{end}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = _query(user_id, bucket, group_by, start, end)
+        cache.set(key, rows, settings.HEVA_TRENDS_CACHE_TTL)
+    return rows
+
+
+def trend_series(user_id, bucket, group_by, start, end):
+    """
+    Dense per-group totals and counts for every bucket in [start, end].
+
+    Periods that have already closed come from cache; only the open period
+    containing today is aggregated live. New entries are always dated today,
+    so only edits and deletes invalidate the closed part.
+    """
+    start = bucket_start(start, bucket)
+    open_start = bucket_start(timezone.localdate(), bucket)
+    rows = []
+    if start < open_start:
+        rows += _closed_rows(user_id, bucket, group_by, start, min(end, open_start - timedelta(days=1)))
+    if end >= open_start:
+        rows += _query(user_id, bucket, group_by, max(start, open_start), end)
+
+    periods = periods_between(start, end, bucket)
+    position = {period: index for index, period in enumerate(periods)}
+    series = {}
+    for period, group, total, count in rows:
+        period = period.date() if hasattr(period, 'date') else period
+        values = series.setdefault(group, {
+            'total': [Decimal('0.00')] * len(periods),
+            'count': [0] * len(periods),
+        })
+        values['total'][position[period]] += total
+        values['count'][position[period]] += count
+
+    for values in series.values():
+        values['total'] = [str(total.quantize(Decimal('0.01'))) for total in values['total']]
+    return {
+        'bucket': bucket,
+        'group_by': group_by,
+        'periods': [period.isoformat() for period in periods],
+        'series': series,
+    }
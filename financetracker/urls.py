@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import FinancialEntryListCreateView
+from .views import FinancialEntryListCreateView, FinancialEntryBulkCreateView, FinancialEntryExportView, FinancialTrendsView, FinancialSummaryView
 
 urlpatterns = [
     path('entries/', FinancialEntryListCreateView.as_view(), name='financial-entry-list-create'),
+    path('entries/bulk/', FinancialEntryBulkCreateView.as_view(), name='financial-entry-bulk-create'),
+    path('entries/export/<str:export_format>/', FinancialEntryExportView.as_view(), name='financial-entry-export'),
+    path('summary/', FinancialSummaryView.as_view(), name='financial-summary'),
+    path('trends/', FinancialTrendsView.as_view(), name='financial-trends'),
 ]
\ No newline at end of file
@@ -1,16 +1,140 @@
 from django.shortcuts import render
-from rest_framework import generics, permissions
-from .models import FinancialEntry
-from .serializers import FinancialEntrySerializer
+from datetime import date
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.db import transaction
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from heva_backend.db_router import read_alias
+from heva_backend.etags import ConditionalGetMixin
+from heva_backend.pagination import KeysetPagination
+from .models import FinancialEntry, FinancialSummary
+from .serializers import FinancialEntrySerializer, FinancialEntryBulkItemSerializer, FinancialSummarySerializer
+from .bulk import ingest_entries
+from .export import EXPORT_FORMATS, aiter_lines
+from .trends import BUCKETS, GROUPINGS, default_start, periods_between, trend_series
 
 # Create your views here.
 
-class FinancialEntryListCreateView(generics.ListCreateAPIView):
+class FinancialEntryListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    etag_scope = 'finance'
     serializer_class = FinancialEntrySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
-        return FinancialEntry.objects.filter(user=self.request.user).order_by('-date')
+        return FinancialEntry.objects.filter(user=self.request.user).order_by('-date', '-id')
+
+    def create(self, request, *args, **kwargs):
+        # A retried POST with a known client_key returns the stored entry
+        client_key = request.data.get('client_key') if isinstance(request.data, dict) else None
+        if client_key:
+            existing = self.get_queryset().filter(client_key=client_key).first()
+            if existing is not None:
+                return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # The entry and its summary update commit together
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+
+class FinancialEntryBulkCreateView(generics.GenericAPIView):
+    """Insert many entries in one transaction, reporting a status per item"""
+    serializer_class = FinancialEntryBulkItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('entries') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list of entries'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.HEVA_FINANCE_BULK_MAX_ENTRIES:
+            return Response(
+                {'detail': f'At most {settings.HEVA_FINANCE_BULK_MAX_ENTRIES} entries per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = ingest_entries(request.user, items)
+        counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({**counts, 'results': results}, status=status.HTTP_201_CREATED if counts['created'] else status.HTTP_200_OK)
+
+class FinancialEntryExportView(generics.GenericAPIView):
+    """Stream a ledger as CSV or NDJSON without loading it into memory"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        params = self.request.query_params
+        user_id = self.request.user.pk
+        try:
+            # Staff can export any user's ledger for partner reporting
+            if params.get('user') and self.request.user.is_staff:
+                user_id = int(params['user'])
+            # Exports are streamed after the view returns, so the alias is bound to the queryset
+            queryset = FinancialEntry.objects.using(read_alias(self.request.user)).filter(user_id=user_id)
+            if params.get('start'):
+                queryset = queryset.filter(date__gte=date.fromisoformat(params['start']))
+            if params.get('end'):
+                queryset = queryset.filter(date__lte=date.fromisoformat(params['end']))
+        except ValueError:
+            raise ValidationError({'detail': 'user must be an id and start and end YYYY-MM-DD dates'})
+        if params.get('entry_type'):
+            entry_types = params['entry_type'].split(',')
+            valid = {choice for choice, _ in FinancialEntry.ENTRY_TYPES}
+            if not set(entry_types) <= valid:
+                raise ValidationError({'entry_type': f'Choose from {", ".join(sorted(valid))}'})
+            queryset = queryset.filter(entry_type__in=entry_types)
+        return queryset
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({'detail': 'Unsupported export format'}, status=status.HTTP_404_NOT_FOUND)
+        stream, content_type = EXPORT_FORMATS[export_format]
+        lines = stream(self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            lines = aiter_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="financial-entries.{export_format}"'
+        return response
+
+class FinancialTrendsView(ConditionalGetMixin, generics.GenericAPIView):
+    """Bucketed income, expense and funding series aggregated in the database"""
+    etag_scope = 'finance'
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_etag_extra(self, request):
+        # The default range ends today
+        return timezone.localdate()
+
+    def get(self, request):
+        params = request.query_params
+        bucket = params.get('bucket', 'month')
+        group_by = params.get('group_by', 'entry_type')
+        if bucket not in BUCKETS:
+            raise ValidationError({'bucket': f'Choose from {", ".join(BUCKETS)}'})
+        if group_by not in GROUPINGS:
+            raise ValidationError({'group_by': f'Choose from {", ".join(GROUPINGS)}'})
+        try:
+            end = date.fromisoformat(params['end']) if params.get('end') else timezone.localdate()
+            start = date.fromisoformat(params['start']) if params.get('start') else default_start(end, bucket)
+        except ValueError:
+            raise ValidationError({'detail': 'start and end must be YYYY-MM-DD dates'})
+        if start > end:
+            raise ValidationError({'detail': 'start must not be after end'})
+        if len(periods_between(start, end, bucket)) > settings.HEVA_TRENDS_MAX_PERIODS:
+            raise ValidationError({'detail': f'At most {settings.HEVA_TRENDS_MAX_PERIODS} {bucket} buckets per request'})
+
+        return Response(trend_series(request.user.pk, bucket, group_by, start, end))
+
+class FinancialSummaryView(ConditionalGetMixin, generics.RetrieveAPIView):
+    etag_scope = 'finance'
+    serializer_class = FinancialSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return FinancialSummary.objects.filter(user=self.request.user).first() or FinancialSummary(user=self.request.user)
@@ -0,0 +1,280 @@
+import hashlib
+import json
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from userauth.models import User, UserGroupMembership
+from financetracker.models import FinancialEntry, FinancialSummary
+from storymanager.models import Story, StoryTag
+from .models import InclusionMetrics, RollupWatermark
+
+DASHBOARD_CACHE_KEY = 'heva_analytics:dashboard:v2'
+ROLLUP_NAME = 'inclusion_metrics'
+
+# Additive per-day fields of InclusionMetrics, grouped by source table
+USER_FIELDS = ['total_users', 'marginalized_users', 'refugee_users', 'pwd_users', 'lgbtqi_users', 'creative_users']
+ENTRY_FIELDS = ['total_income', 'total_expenses', 'income_entries', 'expense_entries', 'funding_requests']
+STORY_FIELDS = ['total_stories', 'approved_stories', 'urgent_stories']
+ADDITIVE_FIELDS = USER_FIELDS + ENTRY_FIELDS + STORY_FIELDS
+
+
+def in_group(group=None):
+    """Users in ``group`` (any group when None), probed on the (user, group) index"""
+    memberships = UserGroupMembership.objects.filter(user=OuterRef('pk'))
+    if group is not None:
+        memberships = memberships.filter(group=group)
+    return Q(Exists(memberships))
+
+
+def user_metrics():
+    return {
+        'total_users': Count('id'),
+        'marginalized_users': Count('id', filter=in_group()),
+        'refugee_users': Count('id', filter=in_group('refugee')),
+        'pwd_users': Count('id', filter=Q(disability=True)),
+        'lgbtqi_users': Count('id', filter=in_group('LGBTQI+')),
+        'creative_users': Count('id', filter=Q(user_type='creative')),
+    }
+
+
+def entry_metrics():
+    return {
+        'total_income': Sum('amount', filter=Q(entry_type='income')),
+        'total_expenses': Sum('amount', filter=Q(entry_type='expense')),
+        'income_entries': Count('id', filter=Q(entry_type='income')),
+        'expense_entries': Count('id', filter=Q(entry_type='expense')),
+        'funding_requests': Count('id', filter=Q(entry_type='funding')),
+    }
+
+
+def story_metrics():
+    return {
+        'total_stories': Count('id'),
+        'approved_stories': Count('id', filter=Q(status='approved')),
+        'urgent_stories': Count('id', filter=Q(is_urgent=True)),
+    }
+
+
+def _group_by_day(queryset, day, metrics):
+    rows = queryset.annotate(day=day).values('day').annotate(**metrics).order_by()
+    return {row.pop('day'): row for row in rows}
+
+
+def daily_metrics(users, entries, stories):
+    """Per-day additive metrics for the given querysets, one grouped query per table"""
+    days = {}
+    for grouped in (
+        _group_by_day(users, TruncDate('date_joined'), user_metrics()),
+        _group_by_day(entries, F('date'), entry_metrics()),
+        _group_by_day(stories, TruncDate('date_submitted'), story_metrics()),
+    ):
+        for day, values in grouped.items():
+            row = days.setdefault(day, dict.fromkeys(ADDITIVE_FIELDS, 0))
+            row.update({key: value or 0 for key, value in values.items()})
+    return days
+
+
+def pending_daily_metrics(watermark):
+    """Per-day metrics for rows created after the rollup watermark"""
+    return daily_metrics(
+        User.objects.filter(id__gt=watermark.last_user_id),
+        FinancialEntry.objects.filter(id__gt=watermark.last_entry_id),
+        Story.objects.filter(id__gt=watermark.last_story_id),
+    )
+
+
+def get_watermark():
+    return RollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+
+
+def _live_totals(today):
+    """Whole-table totals when no rollup has run yet"""
+    today_start = timezone.make_aware(datetime.combine(today, time.min))
+    totals = User.objects.aggregate(
+        new_users_today=Count('id', filter=Q(date_joined__gte=today_start)), **user_metrics()
+    )
+    totals.update(FinancialEntry.objects.aggregate(**entry_metrics()))
+    totals.update(Story.objects.aggregate(
+        new_stories_today=Count('id', filter=Q(date_submitted__gte=today_start)), **story_metrics()
+    ))
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def _rolled_up_totals(watermark, today):
+    """Totals from InclusionMetrics plus the rows not yet rolled up"""
+    metrics = {field: Sum(field) for field in ADDITIVE_FIELDS}
+    totals = InclusionMetrics.objects.aggregate(
+        new_users_today=Sum('total_users', filter=Q(date=today)),
+        new_stories_today=Sum('total_stories', filter=Q(date=today)),
+        **metrics,
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    for day, row in pending_daily_metrics(watermark).items():
+        for field in ADDITIVE_FIELDS:
+            totals[field] += row[field]
+        if day == today:
+            totals['new_users_today'] += row['total_users']
+            totals['new_stories_today'] += row['total_stories']
+    return totals
+
+
+def _percentage(part, total):
+    return (part / total * 100) if total > 0 else 0
+
+
+def compute_dashboard_metrics():
+    """Build the dashboard payload from the rollup, or live when it has never run"""
+    today = timezone.localdate()
+    watermark = get_watermark()
+    if watermark is None:
+        totals = _live_totals(today)
+    else:
+        totals = _rolled_up_totals(watermark, today)
+
+    total_users = totals['total_users']
+    total_income = Decimal(totals['total_income'])
+    total_expenses = Decimal(totals['total_expenses'])
+
+    return {
+        'user_demographics': {
+            'total_users': total_users,
+            'marginalized_users': totals['refugee_users'],
+            'pwd_users': totals['pwd_users'],
+            'lgbtqi_users': totals['lgbtqi_users'],
+            'new_users_today': totals['new_users_today'],
+        },
+        'financial_analytics': {
+            'total_income': float(total_income),
+            'total_expenses': float(total_expenses),
+            'net_flow': float(total_income - total_expenses),
+        },
+        'story_analytics': {
+            'total_stories': totals['total_stories'],
+            'approved_stories': totals['approved_stories'],
+            'urgent_stories': totals['urgent_stories'],
+            'new_stories_today': totals['new_stories_today'],
+        },
+        'inclusion_metrics': {
+            'marginalized_percentage': _percentage(totals['refugee_users'], total_users),
+            'pwd_percentage': _percentage(totals['pwd_users'], total_users),
+            'lgbtqi_percentage': _percentage(totals['lgbtqi_users'], total_users),
+        },
+    }
+
+
+def get_dashboard_snapshot(refresh=False):
+    """
+    Return (digest, payload) of the cached dashboard, recomputing it when expired.
+
+    The digest hashes the payload's content, so a recomputation that finds
+    nothing changed keeps the same ETag.
+    """
+    snapshot = None if refresh else cache.get(DASHBOARD_CACHE_KEY)
+    if snapshot is None:
+        metrics = compute_dashboard_metrics()
+        digest = hashlib.sha1(json.dumps(metrics, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        snapshot = (digest, metrics)
+        cache.set(DASHBOARD_CACHE_KEY, snapshot, settings.HEVA_DASHBOARD_CACHE_TTL)
+    return snapshot
+
+
+def get_dashboard_metrics(refresh=False):
+    """Return the cached dashboard payload, recomputing it when expired"""
+    return get_dashboard_snapshot(refresh)[1]
+
+
+def invalidate_dashboard_metrics():
+    """Drop the cached dashboard payload so the next read recomputes it"""
+    cache.delete(DASHBOARD_CACHE_KEY)
+
+
+def _average(total, count):
+    if not count:
+        return Decimal('0.00')
+    return (Decimal(total) / count).quantize(Decimal('0.01'))
+
+
+def with_averages(values):
+    """Fill avg_income / avg_expenses from the additive totals"""
+    values['avg_income'] = _average(values['total_income'], values['income_entries'])
+    values['avg_expenses'] = _average(values['total_expenses'], values['expense_entries'])
+    return values
+
+
+def daily_series(start, end):
+    """InclusionMetrics rows for [start, end], including days not yet rolled up"""
+    days = {
+        row.date: row for row in InclusionMetrics.objects.filter(date__range=(start, end)).order_by('date')
+    }
+    watermark = get_watermark()
+    if watermark is None:
+        start_dt = timezone.make_aware(datetime.combine(start, time.min))
+        end_dt = timezone.make_aware(datetime.combine(end, time.max))
+        pending = daily_metrics(
+            User.objects.filter(date_joined__range=(start_dt, end_dt)),
+            FinancialEntry.objects.filter(date__range=(start, end)),
+            Story.objects.filter(date_submitted__range=(start_dt, end_dt)),
+        )
+    else:
+        pending = pending_daily_metrics(watermark)
+
+    for day, row in pending.items():
+        if not start <= day <= end:
+            continue
+        metrics = days.setdefault(day, InclusionMetrics(date=day))
+        values = {field: getattr(metrics, field) + row[field] for field in ADDITIVE_FIELDS}
+        for field, value in with_averages(values).items():
+            setattr(metrics, field, value)
+    return [days[day] for day in sorted(days)]
+
+
+def group_breakdown():
+    """Member counts per marginalized group and story counts per tag"""
+    groups = (
+        UserGroupMembership.objects.values('group')
+        .annotate(users=Count('user_id')).order_by('-users', 'group')
+    )
+    tags = (
+        StoryTag.objects.values('tag')
+        .annotate(stories=Count('story_id'), approved_stories=Count('story_id', filter=Q(story__status='approved')))
+        .order_by('-stories', 'tag')
+    )
+    return {'groups': list(groups), 'tags': list(tags)}
+
+
+def group_detail(group):
+    """Demographics, finances and stories of one group's members"""
+    members = UserGroupMembership.objects.filter(group=group).values('user_id')
+    users = User.objects.filter(id__in=members)
+    demographics = users.aggregate(
+        users=Count('id'),
+        pwd_users=Count('id', filter=Q(disability=True)),
+        creative_users=Count('id', filter=Q(user_type='creative')),
+    )
+    finances = FinancialSummary.objects.filter(user_id__in=members).aggregate(
+        total_income=Sum('income_total'),
+        total_expenses=Sum('expense_total'),
+        funding_requests=Sum('funding_count'),
+    )
+    stories = Story.objects.filter(user_id__in=members).aggregate(**story_metrics())
+    other_groups = (
+        UserGroupMembership.objects.filter(user_id__in=members).exclude(group=group)
+        .values('group').annotate(users=Count('user_id')).order_by('-users', 'group')
+    )
+    return {
+        'group': group,
+        **demographics,
+        'genders': {row['gender']: row['count'] for row in users.values('gender').annotate(count=Count('id')).order_by()},
+        'financial_analytics': {
+            'total_income': float(finances['total_income'] or 0),
+            'total_expenses': float(finances['total_expenses'] or 0),
+            'funding_requests': finances['funding_requests'] or 0,
+        },
+        'story_analytics': stories,
+        'also_in_groups': list(other_groups),
+    }
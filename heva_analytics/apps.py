@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HevaAnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'heva_analytics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,124 @@
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from heva_backend.etags import bump_versions
+from userauth.models import User
+from financetracker.models import FinancialSummary
+from storymanager.models import Story
+from .models import UserAnalytics
+from .ml_service import CreditScoringML, InclusionAnalysisML, calculate_risk_levels
+
+SCORED_FIELDS = ['credit_score', 'inclusion_score', 'risk_level', 'last_updated']
+
+
+def build_feature_matrix(user_ids):
+    """
+    Per-user scoring features for a chunk of users.
+
+    Returns the user ids in row order and a dict of NumPy feature columns.
+    Entry totals come from the users' FinancialSummary rows, story presence
+    from one DISTINCT query and profile flags from one narrow values query.
+    """
+    profiles = list(
+        User.objects.filter(id__in=user_ids).order_by('id')
+        .values_list('id', 'primary_device', 'literacy_level', 'social_proof')
+    )
+    ids = np.array([row[0] for row in profiles], dtype=np.int64)
+    index = {user_id: position for position, user_id in enumerate(ids.tolist())}
+
+    total_income = np.zeros(len(ids))
+    income_frequency = np.zeros(len(ids), dtype=np.int64)
+    entry_count = np.zeros(len(ids), dtype=np.int64)
+    summaries = FinancialSummary.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'income_total', 'income_count', 'expense_count', 'funding_count', 'other_count',
+    )
+    for user_id, income_total, income_count, *other_counts in summaries:
+        position = index.get(user_id)
+        if position is None:
+            continue
+        total_income[position] = float(income_total)
+        income_frequency[position] = income_count
+        entry_count[position] = income_count + sum(other_counts)
+
+    has_stories = np.zeros(len(ids), dtype=bool)
+    story_users = Story.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True).distinct()
+    for user_id in story_users:
+        if user_id in index:
+            has_stories[index[user_id]] = True
+
+    features = {
+        'total_income': total_income,
+        'income_frequency': income_frequency,
+        'has_entries': entry_count > 0,
+        'has_stories': has_stories,
+        'has_device': np.array([bool(row[1]) for row in profiles], dtype=bool),
+        'has_literacy': np.array([bool(row[2]) for row in profiles], dtype=bool),
+        'has_reference': np.array(
+            [bool(isinstance(row[3], dict) and row[3].get('reference_name')) for row in profiles], dtype=bool
+        ),
+    }
+    return ids, features
+
+
+def score_features(features):
+    """Credit score, inclusion score and risk level columns for a feature matrix"""
+    credit = CreditScoringML().score_batch(features['total_income'], features['income_frequency'])
+    inclusion = InclusionAnalysisML().score_batch(
+        features['has_device'], features['has_literacy'], features['has_reference'],
+        features['has_stories'], features['has_entries'],
+    )
+    return credit, inclusion, calculate_risk_levels(credit, inclusion)
+
+
+def rescore_chunk(user_ids):
+    """Score a chunk of users and write the results back in bulk"""
+    # Cleared up front so writes during scoring leave the rows stale
+    UserAnalytics.objects.filter(user_id__in=user_ids, is_stale=True).update(is_stale=False)
+    ids, features = build_feature_matrix(user_ids)
+    if not len(ids):
+        return 0
+    credit, inclusion, risk = score_features(features)
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {a.user_id: a for a in UserAnalytics.objects.filter(user_id__in=ids.tolist())}
+        to_create, to_update = [], []
+        for position, user_id in enumerate(ids.tolist()):
+            analytics = existing.get(user_id)
+            if analytics is None:
+                analytics = UserAnalytics(user_id=user_id, is_stale=False)
+                to_create.append(analytics)
+            else:
+                to_update.append(analytics)
+            analytics.credit_score = str(credit[position])
+            analytics.inclusion_score = int(inclusion[position])
+            analytics.risk_level = str(risk[position])
+            analytics.last_updated = now
+        UserAnalytics.objects.bulk_create(to_create)
+        UserAnalytics.objects.bulk_update(to_update, SCORED_FIELDS)
+        bump_versions('analytics', user_ids)
+    return len(ids)
+
+
+def iter_user_id_chunks(queryset, chunk_size):
+    """Walk a user queryset in primary-key order without OFFSET scans"""
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def rescore_users(queryset=None, chunk_size=1000, progress=None):
+    """Re-score every user in the queryset, calling progress(done, total) after each chunk"""
+    if queryset is None:
+        queryset = User.objects.all()
+    total = queryset.count()
+    done = 0
+    for chunk in iter_user_id_chunks(queryset, chunk_size):
+        done += rescore_chunk(chunk)
+        if progress is not None:
+            progress(done, total)
+    return done
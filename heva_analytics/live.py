@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from heva_backend.db_router import use_replica
+from heva_backend.etags import get_version
+from .aggregation import get_dashboard_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def diff_metrics(old, new):
+    """The changed values of a two-level dashboard payload, by section"""
+    changes = {}
+    for section, values in new.items():
+        before = old.get(section, {})
+        changed = {key: value for key, value in values.items() if before.get(key) != value}
+        if changed:
+            changes[section] = changed
+    return changes
+
+
+def _compute_snapshot():
+    with use_replica():
+        return get_dashboard_snapshot(refresh=True)
+
+
+def sse_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, default=str)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+class DashboardBroadcaster:
+    """
+    Shares one dashboard computation among every open stream in a process.
+
+    While anyone is subscribed, a single task checks the global ``activity``
+    version (bumped by model change signals in any process) once per
+    HEVA_DASHBOARD_STREAM_INTERVAL. When it moved, or the cached payload is
+    older than HEVA_DASHBOARD_CACHE_TTL, the payload is recomputed once
+    and only the changed values are queued to each subscriber.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.digest = None
+        self.metrics = None
+        self.version = None
+        self.computed_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    async def snapshot(self):
+        """(digest, payload), computed once however many streams ask at the same time"""
+        async with self._lock:
+            if self.metrics is None:
+                await self._refresh()
+        return self.digest, self.metrics
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.HEVA_DASHBOARD_STREAM_QUEUE)
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def _refresh(self):
+        self.version = await sync_to_async(get_version)('activity')
+        self.digest, self.metrics = await sync_to_async(_compute_snapshot)()
+        self.computed_at = time.monotonic()
+
+    async def tick(self):
+        version = await sync_to_async(get_version)('activity')
+        expired = time.monotonic() - self.computed_at > settings.HEVA_DASHBOARD_CACHE_TTL
+        if self.metrics is not None and version == self.version and not expired:
+            return
+        previous = self.metrics or {}
+        async with self._lock:
+            await self._refresh()
+        changes = diff_metrics(previous, self.metrics)
+        if changes:
+            self.publish(sse_event('delta', changes, self.digest))
+
+    def publish(self, message):
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind gets the whole payload instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(sse_event('snapshot', self.metrics, self.digest))
+
+    async def _run(self):
+        try:
+            while self.subscribers:
+                await asyncio.sleep(settings.HEVA_DASHBOARD_STREAM_INTERVAL)
+                if self.subscribers:
+                    try:
+                        await self.tick()
+                    except Exception:
+                        # A busy database or cache outage must not end every open stream
+                        logger.warning('Dashboard refresh failed, retrying next tick', exc_info=True)
+        finally:
+            self._task = None
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster():
+    """The broadcaster of the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _broadcasters:
+        _broadcasters[loop] = DashboardBroadcaster()
+    return _broadcasters[loop]
+
+
+async def dashboard_events(last_event_id=None, deadline=None):
+    """
+    Server-sent events for one dashboard: a snapshot, then deltas.
+
+    A reconnecting client that already holds the current payload (its
+    Last-Event-ID matches) skips the snapshot. Comments are sent every
+    HEVA_DASHBOARD_STREAM_HEARTBEAT seconds so proxies keep the connection
+    open; the stream ends at ``deadline`` (a time.time()) so the client
+    reconnects with a fresh token.
+    """
+    broadcaster = get_broadcaster()
+    queue = broadcaster.subscribe()
+    try:
+        yield f'retry: {settings.HEVA_DASHBOARD_STREAM_RETRY_MS}\n\n'
+        digest, metrics = await broadcaster.snapshot()
+        if last_event_id != digest:
+            yield sse_event('snapshot', metrics, digest)
+        while deadline is None or time.time() < deadline:
+            timeout = settings.HEVA_DASHBOARD_STREAM_HEARTBEAT
+            if deadline is not None:
+                timeout = max(min(timeout, deadline - time.time()), 0)
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+    finally:
+        broadcaster.unsubscribe(queue)
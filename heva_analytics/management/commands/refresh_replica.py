@@ -0,0 +1,30 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from heva_backend.db_router import refresh_replica, replica_configured
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary database into the analytics read replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, help='Keep refreshing every this many seconds instead of copying once',
+        )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database is configured; set HEVA_DB_REPLICA')
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        while True:
+            seconds = refresh_replica()
+            self.stdout.write(self.style.SUCCESS(f'Refreshed the replica in {seconds:.2f}s'))
+            if not options['interval']:
+                return
+            deadline = time.monotonic() + options['interval']
+            while not stopping and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+            if stopping:
+                return
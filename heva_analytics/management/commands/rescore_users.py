@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from userauth.models import User
+from heva_analytics.batch_scoring import rescore_users
+
+
+class Command(BaseCommand):
+    help = 'Re-score credit, inclusion and risk levels for users in vectorized chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users scored per batch')
+        parser.add_argument('--user-ids', help='Comma-separated user ids to re-score')
+        parser.add_argument('--user-type', choices=['creative', 'agent', 'admin'], help='Only re-score this user type')
+        parser.add_argument('--joined-since', help='Only re-score users who joined on or after this day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        users = User.objects.all()
+        if options['user_ids']:
+            try:
+                ids = [int(value) for value in options['user_ids'].split(',') if value.strip()]
+            except ValueError:
+                raise CommandError('--user-ids must be a comma-separated list of integers')
+            users = users.filter(id__in=ids)
+        if options['user_type']:
+            users = users.filter(user_type=options['user_type'])
+        if options['joined_since']:
+            try:
+                users = users.filter(date_joined__date__gte=date.fromisoformat(options['joined_since']))
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        def progress(done, total):
+            self.stdout.write(f'Scored {done}/{total} users')
+
+        scored = rescore_users(users, chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Re-scored {scored} users'))
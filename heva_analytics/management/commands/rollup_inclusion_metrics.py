@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from heva_analytics.rollup import run_rollup
+
+
+class Command(BaseCommand):
+    help = 'Roll new users, financial entries and stories up into daily InclusionMetrics rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Backfill from this day (YYYY-MM-DD) instead of running incrementally')
+        parser.add_argument('--end', help='Last day to backfill (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+        if end is not None and start is None:
+            raise CommandError('--end requires --start')
+        if start is not None and end is not None and end < start:
+            raise CommandError('--end must not be before --start')
+
+        written = run_rollup(start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {written} day(s) of inclusion metrics'))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('heva_analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_user_id', models.BigIntegerField(default=0)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('last_story_id', models.BigIntegerField(default=0)),
+                ('last_run', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='inclusionmetrics',
+            name='expense_entries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inclusionmetrics',
+            name='income_entries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inclusionmetrics',
+            name='total_expenses',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='inclusionmetrics',
+            name='total_income',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='inclusionmetrics',
+            name='date',
+            field=models.DateField(unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('heva_analytics', '0002_inclusion_metrics_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranalytics',
+            name='is_stale',
+            field=models.BooleanField(default=True),
+        ),
+    ]
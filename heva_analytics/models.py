@@ -9,6 +9,7 @@ class UserAnalytics(models.Model):
     risk_level = models.CharField(max_length=20, default='pending')  # Low/Medium/High
     inclusion_score = models.IntegerField(default=0)  # 0-100
     last_updated = models.DateTimeField(auto_now=True)
+    is_stale = models.BooleanField(default=True)  # Set by signals when scored inputs change
     
     # ML Features
     financial_consistency = models.FloatField(default=0.0)
@@ -19,7 +20,8 @@ class UserAnalytics(models.Model):
         return f'{self.user.email} - Credit: {self.credit_score} - Risk: {self.risk_level}'
 
 class InclusionMetrics(models.Model):
-    date = models.DateField(auto_now_add=True)
+    # One row per day, counting the users, entries and stories created that day
+    date = models.DateField(unique=True)
     total_users = models.IntegerField(default=0)
     marginalized_users = models.IntegerField(default=0)
     refugee_users = models.IntegerField(default=0)
@@ -30,6 +32,10 @@ class InclusionMetrics(models.Model):
     # Financial Inclusion
     avg_income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     avg_expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    income_entries = models.IntegerField(default=0)
+    expense_entries = models.IntegerField(default=0)
     funding_requests = models.IntegerField(default=0)
     
     # Story Analytics
@@ -39,3 +45,22 @@ class InclusionMetrics(models.Model):
     
     def __str__(self):
         return f'Metrics for {self.date}'
+
+class RollupWatermark(models.Model):
+    # Highest row ids already folded into InclusionMetrics
+    name = models.CharField(max_length=50, unique=True)
+    last_user_id = models.BigIntegerField(default=0)
+    last_entry_id = models.BigIntegerField(default=0)
+    last_story_id = models.BigIntegerField(default=0)
+    last_run = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} rollup at {self.last_run}'
+
+class RollupDirtyDay(models.Model):
+    # A day whose already-folded rows were edited or deleted; the next
+    # incremental rollup recomputes it
+    date = models.DateField(unique=True)
+
+    def __str__(self):
+        return f'Rollup pending for {self.date}'
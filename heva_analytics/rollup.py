@@ -0,0 +1,115 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from heva_backend.etags import bump_versions
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from storymanager.models import Story
+from .models import InclusionMetrics, RollupDirtyDay, RollupWatermark
+from .aggregation import (
+    ADDITIVE_FIELDS, ROLLUP_NAME, daily_metrics, invalidate_dashboard_metrics, with_averages,
+)
+
+STORED_FIELDS = ADDITIVE_FIELDS + ['avg_income', 'avg_expenses']
+
+
+def _day_bounds(start, end):
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def _contiguous_ranges(days):
+    """Collapse a set of dates into (start, end) runs of consecutive days"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(run) for run in ranges]
+
+
+def rollup_range(start, end, watermark):
+    """Recompute the InclusionMetrics rows for [start, end] from rows up to the watermark"""
+    start_dt, end_dt = _day_bounds(start, end)
+    days = daily_metrics(
+        User.objects.filter(id__lte=watermark.last_user_id, date_joined__gte=start_dt, date_joined__lt=end_dt),
+        FinancialEntry.objects.filter(id__lte=watermark.last_entry_id, date__range=(start, end)),
+        Story.objects.filter(id__lte=watermark.last_story_id, date_submitted__gte=start_dt, date_submitted__lt=end_dt),
+    )
+
+    rows = []
+    day = start
+    while day <= end:
+        values = with_averages(days.get(day, dict.fromkeys(ADDITIVE_FIELDS, 0)))
+        rows.append(InclusionMetrics(date=day, **values))
+        day += timedelta(days=1)
+
+    InclusionMetrics.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True, unique_fields=['date'], update_fields=STORED_FIELDS,
+    )
+    return len(rows)
+
+
+def _dirty_days(watermark, max_ids):
+    """Days touched by rows created, or stories approved, since the last run"""
+    days = set(
+        User.objects.filter(id__gt=watermark.last_user_id, id__lte=max_ids['user'])
+        .annotate(day=TruncDate('date_joined')).values_list('day', flat=True).distinct()
+    )
+    days.update(
+        FinancialEntry.objects.filter(id__gt=watermark.last_entry_id, id__lte=max_ids['entry'])
+        .values_list('date', flat=True).distinct()
+    )
+    stories = Story.objects.filter(id__gt=watermark.last_story_id, id__lte=max_ids['story'])
+    if watermark.last_run is not None:
+        stories = stories | Story.objects.filter(
+            id__lte=watermark.last_story_id, date_approved__gte=watermark.last_run,
+        )
+    days.update(stories.annotate(day=TruncDate('date_submitted')).values_list('day', flat=True).distinct())
+    return days
+
+
+def run_rollup(start=None, end=None):
+    """
+    Fold new rows into InclusionMetrics.
+
+    Without a range only the days touched since the stored watermark are
+    recomputed and the watermark advances; edits and deletes of rows it
+    already covers reach it through the days signals marked dirty. With a
+    range every day in it is recomputed from the rows already covered by
+    the watermark (a backfill). Returns the number of day rows written.
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+
+        if start is not None:
+            end = end or timezone.localdate()
+            written = rollup_range(start, end, watermark)
+            RollupDirtyDay.objects.filter(date__range=(start, end)).delete()
+        else:
+            started = timezone.now()
+            max_ids = {
+                'user': User.objects.aggregate(Max('id'))['id__max'] or 0,
+                'entry': FinancialEntry.objects.aggregate(Max('id'))['id__max'] or 0,
+                'story': Story.objects.aggregate(Max('id'))['id__max'] or 0,
+            }
+            # Days whose folded rows were edited or deleted, marked by signals
+            marked = set(RollupDirtyDay.objects.values_list('date', flat=True))
+            dirty = _dirty_days(watermark, max_ids) | marked
+            watermark.last_user_id = max_ids['user']
+            watermark.last_entry_id = max_ids['entry']
+            watermark.last_story_id = max_ids['story']
+            watermark.last_run = started
+            written = sum(rollup_range(first, last, watermark) for first, last in _contiguous_ranges(dirty))
+            RollupDirtyDay.objects.filter(date__in=marked).delete()
+            watermark.save()
+
+    invalidate_dashboard_metrics()
+    bump_versions('activity')
+    return written
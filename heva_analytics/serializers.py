@@ -4,7 +4,11 @@ from .models import UserAnalytics, InclusionMetrics
 class UserAnalyticsSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAnalytics
-        fields = '__all__'
+        # is_stale is internal bookkeeping for the recompute, not part of the API
+        fields = [
+            'id', 'user', 'credit_score', 'risk_level', 'inclusion_score', 'last_updated',
+            'financial_consistency', 'story_engagement', 'device_adaptation',
+        ]
 
 class InclusionMetricsSerializer(serializers.ModelSerializer):
     class Meta:
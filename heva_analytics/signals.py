@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from heva_backend.etags import bump_versions
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from financetracker.signals import entries_bulk_created
+from storymanager.models import Story
+from .models import RollupDirtyDay, UserAnalytics
+
+# Profile fields read by InclusionAnalysisML
+SCORED_PROFILE_FIELDS = {'primary_device', 'literacy_level', 'social_proof'}
+# Profile fields counted by the InclusionMetrics rollup
+ROLLUP_PROFILE_FIELDS = {'user_type', 'disability', 'marginalized_groups'}
+
+
+def mark_analytics_stale(user_ids):
+    """Flag the users' analytics for recomputation on their next read"""
+    UserAnalytics.objects.filter(user_id__in=user_ids, is_stale=False).update(is_stale=True)
+    bump_versions('analytics', user_ids)
+
+
+@receiver(post_save, sender=FinancialEntry)
+@receiver(post_delete, sender=FinancialEntry)
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def mark_owner_stale(sender, instance, **kwargs):
+    mark_analytics_stale([instance.user_id])
+
+
+@receiver(entries_bulk_created)
+def mark_bulk_owner_stale(sender, user_id, **kwargs):
+    mark_analytics_stale([user_id])
+
+
+@receiver(post_save, sender=User)
+def mark_profile_stale(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not SCORED_PROFILE_FIELDS.intersection(update_fields):
+        return
+    mark_analytics_stale([instance.pk])
+
+
+@receiver(post_save, sender=UserAnalytics)
+def bump_analytics_version(sender, instance, **kwargs):
+    bump_versions('analytics', [instance.user_id])
+
+
+def mark_rollup_days(days):
+    """
+    Have the next incremental rollup recompute ``days``.
+
+    The rollup finds new rows by id, so only edits and deletes are marked;
+    a row not yet folded in is recomputed either way.
+    """
+    RollupDirtyDay.objects.bulk_create(
+        [RollupDirtyDay(date=day) for day in set(days) if day is not None], ignore_conflicts=True,
+    )
+
+
+@receiver(post_save, sender=FinancialEntry)
+@receiver(post_delete, sender=FinancialEntry)
+def mark_entry_day(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    # Stored values from financetracker's pre_save, in case the date moved
+    previous = getattr(instance, '_summary_previous', None)
+    mark_rollup_days([instance.date, previous['date'] if previous else None])
+
+
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def mark_story_day(sender, instance, created=False, **kwargs):
+    if not created:
+        mark_rollup_days([timezone.localdate(instance.date_submitted)])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_user_day(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not ROLLUP_PROFILE_FIELDS.intersection(update_fields)):
+        return
+    mark_rollup_days([timezone.localdate(instance.date_joined)])
@@ -0,0 +1,16 @@
+from userauth.models import User
+from heva_tasks.queue import task
+from .ml_service import RealTimeAnalytics
+from .rollup import run_rollup
+
+
+@task
+def recompute_user_analytics(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        RealTimeAnalytics().update_user_analytics(user)
+
+
+@task
+def run_inclusion_rollup():
+    run_rollup()
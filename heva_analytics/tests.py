@@ -1,3 +1,96 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from storymanager.models import Story
+from .live import DashboardBroadcaster
+from .models import InclusionMetrics, RollupDirtyDay
+from .rollup import run_rollup
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.org', username=name, password=None, full_name=name.title(), **fields,
+    )
+
+
+class IncrementalRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user('creative')
+        self.income = FinancialEntry.objects.create(user=self.user, amount='100.00', entry_type='income')
+        self.expense = FinancialEntry.objects.create(user=self.user, amount='40.00', entry_type='expense')
+        self.story = Story.objects.create(user=self.user, title='Market day')
+        run_rollup()
+
+    def _today(self):
+        return InclusionMetrics.objects.get(date=timezone.localdate())
+
+    def test_new_rows_are_folded_in(self):
+        row = self._today()
+        self.assertEqual((row.total_users, row.total_income, row.total_expenses), (1, 100, 40))
+        self.assertEqual((row.total_stories, row.approved_stories), (1, 0))
+        self.assertFalse(RollupDirtyDay.objects.exists())
+
+    def test_edits_and_deletes_reach_the_next_run(self):
+        self.income.amount = '250.00'
+        self.income.save()
+        self.expense.delete()
+        self.story.tags = ['urgency']
+        self.story.save()
+        self.assertEqual(list(RollupDirtyDay.objects.values_list('date', flat=True)), [timezone.localdate()])
+
+        run_rollup()
+        row = self._today()
+        self.assertEqual((row.total_income, row.total_expenses, row.expense_entries), (250, 0, 0))
+        self.assertEqual(row.urgent_stories, 1)
+        self.assertFalse(RollupDirtyDay.objects.exists())
+
+    def test_profile_changes_outside_the_counted_fields_mark_nothing(self):
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertFalse(RollupDirtyDay.objects.exists())
+        self.user.disability = True
+        self.user.save()
+        run_rollup()
+        self.assertEqual(self._today().pwd_users, 1)
+
+    def test_deleting_a_user_removes_their_rows(self):
+        self.user.delete()
+        run_rollup()
+        row = self._today()
+        self.assertEqual((row.total_users, row.total_income, row.total_stories), (0, 0, 0))
+
+
+@override_settings(HEVA_DASHBOARD_STREAM_INTERVAL=0)
+class BroadcasterTests(TestCase):
+    async def test_failed_ticks_are_logged_and_the_loop_keeps_going(self):
+        broadcaster = DashboardBroadcaster()
+        ticks = []
+
+        async def tick():
+            ticks.append(len(ticks))
+            if len(ticks) == 1:
+                raise RuntimeError('database is locked')
+            if len(ticks) == 3:
+                broadcaster.unsubscribe(queue)
+
+        with mock.patch.object(broadcaster, 'tick', tick), self.assertLogs('heva_analytics.live', 'WARNING'):
+            queue = broadcaster.subscribe()
+            await asyncio.wait_for(broadcaster._task, 5)
+        self.assertEqual(ticks, [0, 1, 2])
+        self.assertIsNone(broadcaster._task)
+
+
+class UserAnalyticsViewTests(TestCase):
+    def test_internal_flags_are_not_exposed(self):
+        client = APIClient()
+        client.force_authenticate(make_user('creative'))
+        response = client.get(reverse('user-analytics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('inclusion_score', response.data)
+        self.assertNotIn('is_stale', response.data)
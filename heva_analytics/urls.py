@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import UserAnalyticsView, DashboardAnalyticsView
+from .views import UserAnalyticsView, DashboardAnalyticsView, DashboardStreamView, InclusionMetricsView, GroupBreakdownView, GroupDetailView
 
 urlpatterns = [
     path('user-analytics/', UserAnalyticsView.as_view(), name='user-analytics'),
     path('dashboard/', DashboardAnalyticsView.as_view(), name='dashboard-analytics'),
+    path('dashboard/stream/', DashboardStreamView.as_view(), name='dashboard-stream'),
+    path('metrics/', InclusionMetricsView.as_view(), name='inclusion-metrics'),
+    path('groups/', GroupBreakdownView.as_view(), name='group-breakdown'),
+    path('groups/<str:group>/', GroupDetailView.as_view(), name='group-detail'),
 ] 
\ No newline at end of file
@@ -1,77 +1,120 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views import View
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from userauth.authentication import authenticate_stream
 from django.db.models import Count, Avg, Sum
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from .models import UserAnalytics, InclusionMetrics
 from .serializers import UserAnalyticsSerializer, InclusionMetricsSerializer
 from .ml_service import RealTimeAnalytics
-from userauth.models import User
-from financetracker.models import FinancialEntry
-from storymanager.models import Story
+from heva_backend.db_router import ReplicaReadMixin
+from heva_backend.etags import ConditionalGetMixin, make_etag
+from .aggregation import get_dashboard_snapshot, daily_series, group_breakdown, group_detail
+from .live import dashboard_events
 
 # Create your views here.
 
-class UserAnalyticsView(generics.RetrieveAPIView):
+class UserAnalyticsView(ConditionalGetMixin, generics.RetrieveAPIView):
+    etag_scope = 'analytics'
     serializer_class = UserAnalyticsSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
         user = self.request.user
         analytics_service = RealTimeAnalytics()
-        return analytics_service.update_user_analytics(user)
+        return analytics_service.get_user_analytics(user)
 
-class DashboardAnalyticsView(generics.GenericAPIView):
+class DashboardAnalyticsView(ConditionalGetMixin, ReplicaReadMixin, generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+
+    def get_etag(self, request):
+        # The ETag is the cached payload's digest, so checking it and
+        # serving the body share one cache read
+        try:
+            self.snapshot = get_dashboard_snapshot()
+        except Exception:
+            self.snapshot = None
+            return None
+        return make_etag('dashboard', self.snapshot[0], request.headers.get('Accept', ''))
     
     def get(self, request):
         """Real-time dashboard analytics"""
         try:
-            # User demographics
-            total_users = User.objects.count()
-            marginalized_users = User.objects.filter(marginalized_groups__contains=['refugee']).count()
-            pwd_users = User.objects.filter(disability=True).count()
-            lgbtqi_users = User.objects.filter(marginalized_groups__contains=['LGBTQI+']).count()
-            
-            # Financial analytics
-            total_income = FinancialEntry.objects.filter(entry_type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-            total_expenses = FinancialEntry.objects.filter(entry_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            # Story analytics
-            total_stories = Story.objects.count()
-            approved_stories = Story.objects.filter(status='approved').count()
-            urgent_stories = Story.objects.filter(tags__contains=['urgency']).count()
-            
-            # Real-time metrics
-            today = timezone.now().date()
-            new_users_today = User.objects.filter(date_joined__date=today).count()
-            new_stories_today = Story.objects.filter(date_submitted__date=today).count()
-            
-            return Response({
-                'user_demographics': {
-                    'total_users': total_users,
-                    'marginalized_users': marginalized_users,
-                    'pwd_users': pwd_users,
-                    'lgbtqi_users': lgbtqi_users,
-                    'new_users_today': new_users_today,
-                },
-                'financial_analytics': {
-                    'total_income': float(total_income),
-                    'total_expenses': float(total_expenses),
-                    'net_flow': float(total_income - total_expenses),
-                },
-                'story_analytics': {
-                    'total_stories': total_stories,
-                    'approved_stories': approved_stories,
-                    'urgent_stories': urgent_stories,
-                    'new_stories_today': new_stories_today,
-                },
-                'inclusion_metrics': {
-                    'marginalized_percentage': (marginalized_users / total_users * 100) if total_users > 0 else 0,
-                    'pwd_percentage': (pwd_users / total_users * 100) if total_users > 0 else 0,
-                    'lgbtqi_percentage': (lgbtqi_users / total_users * 100) if total_users > 0 else 0,
-                }
-            })
+            return Response(self.snapshot[1] if self.snapshot else get_dashboard_snapshot()[1])
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class DashboardStreamView(View):
+    """
+    Live dashboard over server-sent events.
+
+    Sends the payload once, then only the values that changed; every open
+    stream in a process shares one computation per tick. EventSource
+    cannot set headers, so the access token may be passed as ?token=.
+
+    Needs the ASGI application (heva_backend.asgi, e.g. under uvicorn or
+    daphne): a WSGI server would buffer the whole stream, so there the
+    view answers 501 and clients fall back to polling the dashboard.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'The live dashboard needs the ASGI server; poll the dashboard instead.'}, status=501,
+            )
+        try:
+            _, token = await sync_to_async(authenticate_stream)(request)
+        except (InvalidToken, AuthenticationFailed) as e:
+            return JsonResponse(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, status=401)
+        response = StreamingHttpResponse(
+            dashboard_events(request.headers.get('Last-Event-ID'), deadline=token['exp']),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class InclusionMetricsView(ConditionalGetMixin, ReplicaReadMixin, generics.ListAPIView):
+    """Daily inclusion metrics, pre-aggregated by the rollup plus today so far"""
+    etag_scope = 'activity'
+    serializer_class = InclusionMetricsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_etag_extra(self, request):
+        # The default range ends today
+        return timezone.localdate()
+
+    def get_queryset(self):
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(self.request.query_params.get('end', today.isoformat()))
+            start = date.fromisoformat(self.request.query_params.get('start', (end - timedelta(days=30)).isoformat()))
+        except ValueError:
+            raise ValidationError({'detail': 'start and end must be YYYY-MM-DD dates'})
+        if start > end:
+            raise ValidationError({'detail': 'start must not be after end'})
+        return daily_series(start, end)
+
+class GroupBreakdownView(ConditionalGetMixin, ReplicaReadMixin, generics.GenericAPIView):
+    """Users per marginalized group and stories per tag"""
+    etag_scope = 'activity'
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(group_breakdown())
+
+class GroupDetailView(ConditionalGetMixin, ReplicaReadMixin, generics.GenericAPIView):
+    """Drill-down into the members of one marginalized group"""
+    etag_scope = 'activity'
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, group):
+        return Response(group_detail(group))
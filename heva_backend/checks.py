@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from .db_router import replica_configured
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every worker process"""
+    return settings.CACHES.get('default', {}).get('BACKEND') not in PER_PROCESS_CACHES
+
+
+@register(deploy=True)
+def etags_need_shared_cache(app_configs, **kwargs):
+    """
+    ETags embed data versions kept in the cache. With a per-process cache a
+    write only bumps the version in the worker that made it, and the others
+    keep answering 304 Not Modified for data that has changed.
+    """
+    if not cache_is_shared():
+        return [Warning(
+            'ETag data versions are kept in a cache that is not shared between processes.',
+            hint='Point CACHES at Redis or Memcached before serving with more than one worker process.',
+            id='heva_backend.W001',
+        )]
+    return []
+
+
+@register()
+def replica_pin_needs_shared_cache(app_configs, **kwargs):
+    """
+    A user who just wrote is pinned to the primary through the cache. With
+    a per-process cache only the worker that took the write knows, so the
+    user's next read on another worker can come from a replica that does
+    not have the write yet.
+    """
+    if replica_configured() and not cache_is_shared():
+        return [Warning(
+            'HEVA_DB_REPLICA is set but the default cache is not shared between processes.',
+            hint=(
+                'Point CACHES at Redis or Memcached before enabling the replica, '
+                'otherwise users may not see their own writes on other workers.'
+            ),
+            id='heva_backend.W002',
+        )]
+    return []
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.db import OperationalError
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class ContentionStats:
+    """Process-wide write contention totals, for metrics and the admin"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.contended_requests = 0
+            self.lock_wait_seconds = 0.0
+            self.write_seconds = 0.0
+            self.locked_errors = 0
+
+    def record(self, recorder, threshold):
+        with self._lock:
+            self.requests += 1
+            self.contended_requests += recorder.lock_wait >= threshold
+            self.lock_wait_seconds += recorder.lock_wait
+            self.write_seconds += recorder.write_time
+            self.locked_errors += recorder.locked_errors
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'contended_requests': self.contended_requests,
+                'lock_wait_seconds': self.lock_wait_seconds,
+                'write_seconds': self.write_seconds,
+                'locked_errors': self.locked_errors,
+            }
+
+
+contention = ContentionStats()
+
+
+class LockWaitRecorder:
+    """
+    A connection.execute_wrapper() that times one request's writes.
+
+    With transaction_mode IMMEDIATE every transaction takes SQLite's write
+    lock in its BEGIN, so time spent in BEGIN is time queued behind other
+    writers. Writes outside a transaction wait inside the statement itself,
+    so write statements are timed separately. Queries total every statement.
+    """
+
+    def __init__(self):
+        self.lock_wait = 0.0
+        self.write_time = 0.0
+        self.query_time = 0.0
+        self.queries = 0
+        self.locked_errors = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip()[:7].upper()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if 'locked' in str(e):
+                self.locked_errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.query_time += elapsed
+            if statement.startswith('BEGIN'):
+                self.lock_wait += elapsed
+            elif statement.startswith(WRITE_PREFIXES):
+                self.write_time += elapsed
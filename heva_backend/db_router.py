@@ -0,0 +1,121 @@
+import contextvars
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from .etags import bump_versions
+
+REPLICA_ALIAS = 'replica'
+
+_reading_replica = contextvars.ContextVar('reading_replica', default=False)
+
+
+def _pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_to_primary(user_id):
+    """Keep the user's reads on the primary until the replica has caught up with their write"""
+    cache.set(_pin_key(user_id), True, settings.HEVA_DB_REPLICA_PIN_SECONDS)
+
+
+def read_alias(user=None):
+    """The alias reads for ``user`` may use: the replica, unless there is none or the user just wrote"""
+    if not replica_configured():
+        return DEFAULT_DB_ALIAS
+    if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+        return DEFAULT_DB_ALIAS
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def use_replica(user=None):
+    """Route reads made inside the block to read_alias(user); writes always go to the primary"""
+    token = _reading_replica.set(read_alias(user) == REPLICA_ALIAS)
+    try:
+        yield
+    finally:
+        _reading_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads inside use_replica() to the replica and everything else to
+    the primary. The replica is a copy of the primary, so relations across
+    the two are allowed, and only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        return REPLICA_ALIAS if _reading_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Serves a view's GET requests from the replica once the user is authenticated.
+
+    List it after ConditionalGetMixin so ETag checks read the replica too.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            self._replica_reads = use_replica(request.user)
+            self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_reads = getattr(self, '_replica_reads', None)
+        if replica_reads is not None:
+            self._replica_reads = None
+            replica_reads.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def refresh_replica():
+    """
+    Copy the primary into the replica file with SQLite's online backup API.
+
+    The copy is written to a temporary file in steps of
+    HEVA_DB_REPLICA_BACKUP_PAGES pages, so writers on the primary are only
+    paused briefly, and then swapped in atomically; connections already
+    open keep reading the previous copy until they close. Returns the
+    seconds taken.
+    """
+    started = time.monotonic()
+    primary = str(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+    replica = str(settings.DATABASES[REPLICA_ALIAS]['NAME'])
+    temporary = f'{replica}.tmp'
+    source = sqlite3.connect(primary, timeout=settings.HEVA_DB_REPLICA_BUSY_TIMEOUT)
+    try:
+        target = sqlite3.connect(temporary)
+        try:
+            source.backup(target, pages=settings.HEVA_DB_REPLICA_BACKUP_PAGES)
+            # A WAL primary copies as WAL; the replica is swapped as a single
+            # file, so it must not leave -wal/-shm files behind
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+    finally:
+        source.close()
+    os.replace(temporary, replica)
+    # This process's own replica connection moves to the new file
+    connections[REPLICA_ALIAS].close()
+    # ETags issued for data read from the previous copy lapse
+    bump_versions('activity')
+    return time.monotonic() - started
@@ -0,0 +1,101 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# Version scopes. Per-user scopes change with one user's data; global ones
+# with anything the aggregate endpoints read.
+USER_SCOPES = {'finance', 'stories', 'analytics'}
+GLOBAL_SCOPES = {'activity'}
+
+
+def _version_key(scope, user_id=None):
+    return f'etag:version:{scope}' if user_id is None else f'etag:version:{scope}:{user_id}'
+
+
+def _new_version():
+    # Random rather than a counter, so a version lost from the cache is
+    # never reissued for different content
+    return uuid.uuid4().hex[:16]
+
+
+def bump_versions(scope, user_ids=None):
+    """
+    Give ``scope`` a new version, for each of ``user_ids`` or globally.
+
+    Applied once the current transaction commits: a read racing the write
+    then at worst keeps the old version for the new data, which only costs
+    the client one extra download.
+    """
+    keys = [_version_key(scope)] if user_ids is None else [_version_key(scope, user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many({key: _new_version() for key in keys}, settings.HEVA_ETAG_VERSION_TTL)
+        )
+
+
+def get_version(scope, user_id=None):
+    key = _version_key(scope, user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, settings.HEVA_ETAG_VERSION_TTL):
+            version = cache.get(key) or version
+    return version
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags from data versions, checked before the view does any work.
+
+    Views set ``etag_scope``; the ETag covers that scope's version (the
+    requesting user's for per-user scopes), the full path with its query
+    string, the Accept header and get_etag_extra(). A matching
+    If-None-Match is answered 304 right after authentication, before the
+    handler runs, so an unchanged poll costs one cache lookup.
+    """
+    etag_scope = None
+
+    def get_etag_extra(self, request):
+        return ''
+
+    def get_etag(self, request):
+        user_id = request.user.pk if self.etag_scope in USER_SCOPES else None
+        return make_etag(
+            self.etag_scope, user_id, get_version(self.etag_scope, user_id),
+            request.get_full_path(), request.headers.get('Accept', ''), self.get_etag_extra(request),
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.get_etag(request) if request.method in ('GET', 'HEAD') else None
+        if self.etag is not None:
+            matches = parse_etags(request.headers.get('If-None-Match', ''))
+            if self.etag in matches or '*' in matches:
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        etag = getattr(self, 'etag', None)
+        if etag is not None and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            # Browsers may keep the body but must check back every time
+            response['Cache-Control'] = 'private, no-cache'
+        return super().finalize_response(request, response, *args, **kwargs)
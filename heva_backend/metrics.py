@@ -0,0 +1,142 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from .db import contention
+
+# Prometheus' default latency buckets, in seconds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class Histogram:
+    """
+    A labelled Prometheus histogram kept in this process.
+
+    Each observation is one bisect and two additions under the registry
+    lock; buckets are only made cumulative when the metrics are scraped.
+    """
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.series = {}
+
+    def observe(self, values, amount):
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, amount)] += 1
+        series[-1] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for values, series in sorted(self.series.items()):
+            labels = _labels(self.labels, values)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {series[-1]}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, values, amount=1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for values, total in sorted(self.series.items()):
+            lines.append(f'{self.name}{{{_labels(self.labels, values)}}} {total}')
+        return lines
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics for the /metrics endpoint.
+
+    Routes are URL patterns (``api/media/<int:pk>/``), not paths, so the
+    number of series stays fixed. Every worker process keeps its own
+    totals; scrape each worker, as Prometheus expects of multi-process
+    servers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('heva_http_requests_total', 'Requests handled.', ('route', 'method', 'status'))
+        self.duration = Histogram(
+            'heva_http_request_duration_seconds', 'Time from the first middleware to the response.',
+            ('route', 'method'), SECONDS_BUCKETS,
+        )
+        self.phases = Histogram(
+            'heva_http_request_phase_seconds',
+            'Time per request spent in db, auth, render, ml and view; phases overlap (view includes the others).',
+            ('route', 'phase'), SECONDS_BUCKETS,
+        )
+        self.queries = Histogram(
+            'heva_http_request_db_queries', 'Database queries per request.', ('route',), QUERY_BUCKETS,
+        )
+
+    def record(self, route, method, status, total, phases, queries):
+        with self._lock:
+            self.requests.inc((route, method, str(status)))
+            self.duration.observe((route, method), total)
+            for phase, seconds in phases.items():
+                self.phases.observe((route, phase), seconds)
+            self.queries.observe((route,), queries)
+
+    def render(self):
+        with self._lock:
+            lines = self.requests.render() + self.duration.render() + self.phases.render() + self.queries.render()
+        totals = contention.snapshot()
+        for name, key, documentation in (
+            ('heva_db_lock_wait_seconds_total', 'lock_wait_seconds', 'Time requests queued for the SQLite write lock.'),
+            ('heva_db_write_seconds_total', 'write_seconds', 'Time spent in write statements.'),
+            ('heva_db_locked_errors_total', 'locked_errors', '"database is locked" errors.'),
+            ('heva_db_contended_requests_total', 'contended_requests',
+             'Requests that waited at least HEVA_DB_LOCK_WAIT_LOG_MS for the write lock.'),
+        ):
+            lines += [f'# HELP {name} {documentation}', f'# TYPE {name} counter', f'{name} {totals[key]}']
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def is_metrics_token(value):
+    """Whether ``value`` is HEVA_METRICS_TOKEN; nothing matches when it is unset"""
+    token = settings.HEVA_METRICS_TOKEN
+    return bool(token) and constant_time_compare(value or '', token)
+
+
+def _allowed(request):
+    # Behind a proxy every request seems to come from localhost, so the
+    # address proves nothing; without a token the metrics stay closed
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme == 'Bearer' and is_metrics_token(token)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's request metrics"""
+    if not _allowed(request):
+        return HttpResponse(status=403)
+    return HttpResponse(request_metrics.render(), content_type=CONTENT_TYPE)
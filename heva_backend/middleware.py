@@ -0,0 +1,126 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from .db import LockWaitRecorder, contention
+from .db_router import pin_to_primary, replica_configured
+from .metrics import is_metrics_token, request_metrics
+from .timing import end_request, start_request
+
+logger = logging.getLogger('heva_backend.db')
+
+UNSAFE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class PinWritersToPrimaryMiddleware:
+    """
+    After a user's successful write, keep their reads off the replica for
+    HEVA_DB_REPLICA_PIN_SECONDS so they always read their own writes.
+
+    DRF authenticates inside the view and copies the user onto the Django
+    request, so it is known here once the response is built.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method in UNSAFE_METHODS and response.status_code < 400 and replica_configured():
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
+
+
+class DatabaseContentionMiddleware:
+    """
+    Record how long each request queued for SQLite's write lock.
+
+    The recorder watches every database alias, so replica reads count
+    towards the request's query totals. It is left on ``request.db_stats``,
+    totals go to heva_backend.db.contention, and requests that waited at
+    least HEVA_DB_LOCK_WAIT_LOG_MS are logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = LockWaitRecorder()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        request.db_stats = recorder
+        threshold = settings.HEVA_DB_LOCK_WAIT_LOG_MS / 1000
+        contention.record(recorder, threshold)
+        if recorder.lock_wait >= threshold or recorder.locked_errors:
+            logger.warning(
+                '%s %s waited %.0f ms for the database write lock (%d locked error(s), %d queries)',
+                request.method, request.path, recorder.lock_wait * 1000, recorder.locked_errors, recorder.queries,
+            )
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Break each request's time down into db, auth, render, ml and view.
+
+    List it first, ahead of DatabaseContentionMiddleware, whose recorder
+    supplies the database figures. The phases are recorded per route for
+    /metrics and, when HEVA_SERVER_TIMING is on, sent back in a
+    Server-Timing header: the total to everyone, the phases only to staff
+    and to requests whose X-Metrics-Token is HEVA_METRICS_TOKEN. Phases overlap: view covers the view and its
+    rendering, and includes the time of the other phases inside it.
+    Building serializer data happens in the view and counts as view;
+    render is only the JSON encoding.
+    Streamed bodies are produced after the response leaves, so only the
+    time to their first byte is measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        timings, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        now = time.perf_counter()
+        phases = timings.phases
+        view_started = getattr(request, '_view_started', None)
+        if view_started is not None:
+            phases['view'] = now - view_started
+        queries = 0
+        db_stats = getattr(request, 'db_stats', None)
+        if db_stats is not None:
+            phases['db'] = db_stats.query_time
+            queries = db_stats.queries
+
+        match = request.resolver_match
+        route = match.route if match is not None else '<unmatched>'
+        request_metrics.record(route, request.method, response.status_code, now - started, phases, queries)
+        if settings.HEVA_SERVER_TIMING:
+            entries = [
+                f'{phase};dur={seconds * 1000:.2f}' + (f';desc="{queries} queries"' if phase == 'db' else '')
+                for phase, seconds in phases.items()
+            ] if self.shows_phases(request) else []
+            entries.append(f'total;dur={(now - started) * 1000:.2f}')
+            response['Server-Timing'] = ', '.join(entries)
+        return response
+
+    @staticmethod
+    def shows_phases(request):
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        return is_metrics_token(request.headers.get('X-Metrics-Token'))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+
+def normalize_labels(values, max_length):
+    """The distinct, trimmed string labels of a JSON list field"""
+    if not isinstance(values, list):
+        return set()
+    labels = set()
+    for value in values:
+        if isinstance(value, str) and value.strip() and len(value.strip()) <= max_length:
+            labels.add(value.strip())
+    return labels
+
+
+def sync_label_rows(model, owner_field, label_field, wanted):
+    """
+    Make ``model`` rows match ``wanted`` ({owner_id: set of labels}).
+
+    Used to mirror JSON list fields into indexed relation tables: one query
+    reads the current rows for every owner, stale rows go in one DELETE and
+    missing ones in one bulk INSERT.
+    """
+    if not wanted:
+        return
+    owner_id = f'{owner_field}_id'
+    current = defaultdict(dict)
+    for pk, owner, label in model.objects.filter(**{f'{owner_id}__in': list(wanted)}).values_list(
+        'pk', owner_id, label_field
+    ):
+        current[owner][label] = pk
+
+    stale = []
+    missing = []
+    for owner, labels in wanted.items():
+        existing = current.get(owner, {})
+        stale += [pk for label, pk in existing.items() if label not in labels]
+        missing += [model(**{owner_id: owner, label_field: label}) for label in labels - existing.keys()]
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
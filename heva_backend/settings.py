@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,10 +48,15 @@ INSTALLED_APPS = [
     'mediafiles',
     'heva_notifications',
     'heva_analytics',
+    'heva_tasks',
+    'heva_sync',
+    'heva_bench',
     # 'heva_education',  # Temporarily removed to fix ModuleNotFoundError
 ]
 
 MIDDLEWARE = [
+    'heva_backend.middleware.PerformanceMiddleware',
+    'heva_backend.middleware.DatabaseContentionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +64,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'heva_backend.middleware.PinWritersToPrimaryMiddleware',
 ]
 
 ROOT_URLCONF = 'heva_backend.urls'
@@ -90,6 +97,62 @@ DATABASES = {
     }
 }
 
+# HEVA_DB_PROFILE=production tunes SQLite for concurrent writers: WAL lets
+# reads run alongside the single writer, synchronous=NORMAL is durable in
+# WAL mode at a fraction of the fsyncs, and IMMEDIATE transactions take
+# the write lock up front, where busy_timeout can wait for it, instead of
+# failing with "database is locked" when a read upgrades to a write.
+# Connections are kept open between requests.
+HEVA_DB_PROFILE = os.environ.get('HEVA_DB_PROFILE', 'development')
+if HEVA_DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-65536;'  # 64 MiB page cache
+                'PRAGMA mmap_size=268435456;'  # 256 MiB memory-mapped reads
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'timeout': 20,  # busy_timeout, in seconds
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': int(os.environ.get('HEVA_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+# Requests that queued this long for the write lock are logged
+HEVA_DB_LOCK_WAIT_LOG_MS = 100
+
+# Optional read replica for analytics, dashboard and export reads: a copy
+# of the primary kept fresh by `manage.py refresh_replica --interval N`.
+# Set HEVA_DB_REPLICA to the copy's path to enable it. Users are pinned to
+# the primary after a write through the cache, so CACHES must be shared
+# (system check heva_backend.W002 warns otherwise).
+HEVA_DB_REPLICA = os.environ.get('HEVA_DB_REPLICA', '')
+if HEVA_DB_REPLICA:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': HEVA_DB_REPLICA,
+        # The file is swapped on every refresh, so never keep it open
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['heva_backend.db_router.ReadReplicaRouter']
+# Reads stay on the primary this long after a user writes; keep it above
+# the refresh interval
+HEVA_DB_REPLICA_PIN_SECONDS = 5 * 60
+HEVA_DB_REPLICA_BACKUP_PAGES = 1024  # pages copied per backup step
+HEVA_DB_REPLICA_BUSY_TIMEOUT = 30
+
+# Per-request timings (heva_backend.middleware.PerformanceMiddleware): send
+# them to clients in a Server-Timing header, and serve per-route histograms
+# at /metrics. Everyone gets the total; the phase breakdown describes the
+# server's internals, so only staff and requests sending HEVA_METRICS_TOKEN
+# in X-Metrics-Token see it. Scrapers must send HEVA_METRICS_TOKEN as a
+# Bearer token; without one, /metrics refuses every request.
+HEVA_SERVER_TIMING = True
+HEVA_METRICS_TOKEN = os.environ.get('HEVA_METRICS_TOKEN', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,11 +198,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework and JWT settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'userauth.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Times JSON encoding for the Server-Timing render phase
+    'DEFAULT_RENDERER_CLASSES': (
+        'heva_backend.timing.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 # Security best practices
@@ -152,3 +220,104 @@ SECURE_REFERRER_POLICY = 'same-origin'
 
 # Custom user model (to be implemented in userauth)
 AUTH_USER_MODEL = 'userauth.User'
+
+# Cohort registration by field agents (/api/auth/register/cohort/)
+HEVA_COHORT_MAX_USERS = 500
+# Processes hashing the imported passwords; 1 hashes in the request process
+HEVA_PASSWORD_HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+# Authenticated users are resolved from the cache rather than the database
+HEVA_AUTH_USER_CACHE_TTL = 5 * 60
+# Per-process LRU in front of the shared cache; 0 turns it off
+HEVA_AUTH_LOCAL_CACHE_SIZE = 1024
+HEVA_AUTH_LOCAL_CACHE_TTL = 5
+# Embed user_type, staff and device claims in issued tokens so most
+# requests need no user lookup at all. Changes to a user only reach other
+# workers through the cache, so turn this on once CACHES is shared
+# (system check userauth.W001 warns otherwise).
+HEVA_AUTH_TOKEN_CLAIMS = False
+
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point this at Redis or Memcached in production so every worker shares it
+# (`manage.py check --deploy` warns otherwise, see heva_backend/checks.py).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'heva-default',
+    }
+}
+
+# Seconds the aggregated admin dashboard payload is served from cache
+HEVA_DASHBOARD_CACHE_TTL = 60
+
+# Seconds a data version used for ETags is kept; a lost version only
+# costs clients one full download
+HEVA_ETAG_VERSION_TTL = 7 * 24 * 60 * 60
+
+# Live dashboard stream (/api/analytics/dashboard/stream/, needs ASGI)
+HEVA_DASHBOARD_STREAM_INTERVAL = 2  # seconds between change checks, shared by all streams
+HEVA_DASHBOARD_STREAM_HEARTBEAT = 15
+HEVA_DASHBOARD_STREAM_QUEUE = 16  # events a slow client may fall behind before a resync
+HEVA_DASHBOARD_STREAM_RETRY_MS = 5000
+
+# Serve a stale UserAnalytics row while a queued task recomputes it
+HEVA_ANALYTICS_STALE_WHILE_REVALIDATE = False
+
+# Background task queue (heva_tasks); run workers with `manage.py run_worker`
+HEVA_TASKS_MAX_ATTEMPTS = 5
+HEVA_TASKS_BASE_BACKOFF = 5  # seconds before the first retry, doubled per attempt
+HEVA_TASKS_MAX_BACKOFF = 3600
+HEVA_TASKS_LOCK_TIMEOUT = 600  # seconds before a running task is presumed abandoned
+HEVA_TASKS_RETENTION_DAYS = 7
+
+# Largest batch accepted by /api/finance/entries/bulk/
+HEVA_FINANCE_BULK_MAX_ENTRIES = 500
+
+# Delta-sync changes feed (/api/sync/changes/)
+HEVA_SYNC_PAGE_SIZE = 500  # rows per feed per response
+HEVA_SYNC_SAFETY_WINDOW = 5  # seconds re-sent to cover transactions committing late
+
+# Rows fetched per database round-trip when streaming ledger exports
+HEVA_EXPORT_CHUNK_SIZE = 2000
+
+# Personal finance trends (/api/finance/trends/): closed periods are cached
+HEVA_TRENDS_CACHE_TTL = 24 * 60 * 60
+HEVA_TRENDS_MAX_PERIODS = 400
+
+# Story full-text search (/api/stories/search/): deepest offset a client may page to
+HEVA_STORY_SEARCH_MAX_OFFSET = 1000
+
+# Story moderation queue (/api/stories/moderation/)
+HEVA_MODERATION_LEASE_SECONDS = 15 * 60
+HEVA_MODERATION_BATCH_SIZE = 20
+HEVA_MODERATION_MAX_BATCH = 100
+
+# Media uploads (/api/media/): resumable chunked uploads, stored by content hash
+MEDIA_ROOT = BASE_DIR / 'uploads'
+HEVA_MEDIA_MAX_SIZE = 200 * 1024 * 1024
+HEVA_MEDIA_MAX_CHUNK = 8 * 1024 * 1024
+HEVA_MEDIA_UPLOAD_EXPIRY_HOURS = 72
+# '' serves files from Django; 'nginx' (X-Accel-Redirect) or 'sendfile'
+# (X-Sendfile) hand them to the front-end server
+HEVA_MEDIA_ACCEL = ''
+HEVA_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Image renditions (needs Pillow; without it originals are served)
+HEVA_IMAGE_WORKERS = 2
+HEVA_IMAGE_RENDER_TIMEOUT = 30
+# Render every variant in the background as soon as an image upload completes
+HEVA_IMAGE_PRERENDER = True
+
+# Notifications (/api/notifications/): outbox delivered by deliver_notifications
+HEVA_NOTIFICATION_TRANSPORTS = {
+    'sms': 'heva_notifications.transports.FileSMSTransport',
+}
+# Messages per second per channel
+HEVA_NOTIFICATION_RATES = {'sms': 10}
+HEVA_NOTIFICATION_BATCH_SIZE = 100
+HEVA_NOTIFICATION_MAX_ATTEMPTS = 5
+HEVA_NOTIFICATION_BASE_BACKOFF = 30
+HEVA_NOTIFICATION_MAX_BACKOFF = 3600
+HEVA_NOTIFICATION_LOCK_TIMEOUT = 300
+HEVA_SMS_OUTBOX_FILE = BASE_DIR / 'sms_outbox.jsonl'
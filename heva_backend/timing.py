@@ -0,0 +1,60 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+from rest_framework.renderers import JSONRenderer
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Seconds spent in each named phase of one request"""
+
+    __slots__ = ('phases', 'active')
+
+    def __init__(self):
+        self.phases = {}
+        self.active = set()
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def start_request():
+    """Begin collecting phases for the current request; returns a token for end_request()"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block (or decorated function) to ``phase``.
+
+    Outside a request it does nothing, and a phase entered again inside
+    itself, such as a timed function calling another, is only counted once.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(phase)
+        timings.add(phase, time.perf_counter() - started)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that times encoding the response body as ``render``"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
@@ -16,11 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/', include('userauth.urls')),
     path('api/finance/', include('financetracker.urls')),
     path('api/stories/', include('storymanager.urls')),
     path('api/analytics/', include('heva_analytics.urls')),
+    path('api/sync/', include('heva_sync.urls')),
+    path('api/media/', include('mediafiles.urls')),
+    path('api/notifications/', include('heva_notifications.urls')),
 ]
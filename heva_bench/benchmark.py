@@ -0,0 +1,435 @@
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+import uuid
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from userauth.authentication import ClaimsRefreshToken
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from storymanager.models import Story
+from storymanager.moderation import claim_batch, release_claims
+from mediafiles.models import UploadSession
+from .synthetic import PASSWORD, SyntheticPopulation
+
+# name: (users, entries, stories). Larger scales add to the rows of smaller ones.
+SCALES = {
+    'tiny': (200, 5_000, 1_000),
+    'small': (2_000, 50_000, 10_000),
+    'medium': (20_000, 500_000, 100_000),
+    'large': (100_000, 5_000_000, 500_000),
+}
+
+# URL names that are deliberately not timed, with the reason
+SKIPPED = {
+    'dashboard-stream': 'a long-lived event stream; its per-change cost is the dashboard snapshot',
+    'media-detail': 'the synthetic population has no stored media files',
+    'media-content': 'the synthetic population has no stored media files',
+}
+
+
+def parse_scale(value):
+    """A SCALES name, or USERS:ENTRIES:STORIES; returns (name, (users, entries, stories))"""
+    if value in SCALES:
+        return value, SCALES[value]
+    try:
+        users, entries, stories = (int(part) for part in value.split(':'))
+    except ValueError:
+        raise ValueError(f'Unknown scale {value!r}: use {", ".join(SCALES)} or USERS:ENTRIES:STORIES')
+    return value, (users, entries, stories)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Case:
+    """
+    One timed request: a URL name, a method and the account making it.
+
+    ``build(bench, i)`` runs untimed before request ``i`` and returns the
+    URL kwargs and the request data (query parameters for GET), so write
+    endpoints can be given fresh payloads and queues can be topped up.
+    """
+
+    def __init__(self, url_name, method='get', actor='creative', build=None, label=None):
+        self.url_name = url_name
+        self.method = method
+        self.actor = actor
+        self.build = build or (lambda bench, i: ({}, None))
+        self.label = label or f'{method.upper()} {url_name}'
+
+
+def _new_entry(bench, i):
+    return {}, {'amount': '1250.00', 'entry_type': 'income', 'source': 'M-PESA', 'description': 'benchmark'}
+
+
+def _bulk_entries(bench, i):
+    return {}, {'entries': [
+        {'amount': '300.00', 'entry_type': 'expense', 'source': 'transport', 'client_key': f'{bench.tag}-{i}-{n}'}
+        for n in range(25)
+    ]}
+
+
+def _new_story(bench, i):
+    return {}, {'title': 'Benchmark story', 'content': 'A recording studio for the community. ' * 20,
+                'tags': ['creative', 'music']}
+
+
+def _registration(bench, i):
+    return {}, {
+        'email': f'{bench.tag}-{i}@example.org', 'username': f'{bench.tag}-{i}', 'full_name': 'Benchmark User',
+        'password': PASSWORD, 'consent_data_collection': True, 'marginalized_groups': ['youth'],
+    }
+
+
+def _cohort(bench, i):
+    return {}, {'users': [
+        {'email': f'{bench.tag}-c{i}-{n}@example.org', 'username': f'{bench.tag}-c{i}-{n}',
+         'full_name': 'Cohort Member', 'password': PASSWORD, 'consent_data_collection': True}
+        for n in range(10)
+    ]}
+
+
+def _login(bench, i):
+    return {}, {'email': bench.users['creative'].email, 'password': PASSWORD}
+
+
+def _claim(bench, i):
+    release_claims(bench.users['moderator'])
+    return {}, {'batch_size': 20}
+
+
+def _release(bench, i):
+    claim_batch(bench.users['moderator'], 20)
+    return {}, {}
+
+
+def _decide(bench, i):
+    stories = claim_batch(bench.users['moderator'], 20)
+    return {}, {'ids': [story.pk for story in stories] or [0], 'decision': 'approve'}
+
+
+def _upload_session(bench, i):
+    if bench.upload is None:
+        bench.upload = UploadSession.objects.create(
+            owner=bench.users['creative'], kind='audio', content_type='audio/mpeg',
+            filename='benchmark.mp3', total_size=1024 * 1024,
+        )
+    return {'pk': bench.upload.pk}, None
+
+
+def _upload(bench, i):
+    return {}, {'filename': 'benchmark.mp3', 'content_type': 'audio/mpeg', 'total_size': 1024 * 1024}
+
+
+def _query(params):
+    return lambda bench, i: ({}, params)
+
+
+def _path(**kwargs):
+    return lambda bench, i: (kwargs, None)
+
+
+CASES = [
+    Case('register', 'post', 'anonymous', _registration),
+    Case('register-cohort', 'post', 'agent', _cohort),
+    Case('login', 'post', 'anonymous', _login),
+    Case('profile-media'),
+    Case('financial-entry-list-create'),
+    Case('financial-entry-list-create', 'post', build=_new_entry),
+    Case('financial-entry-bulk-create', 'post', build=_bulk_entries),
+    Case('financial-entry-export', build=_path(export_format='csv'), label='GET financial-entry-export csv'),
+    Case('financial-entry-export', build=_path(export_format='ndjson'), label='GET financial-entry-export ndjson'),
+    Case('financial-summary'),
+    Case('financial-trends', build=_query({'bucket': 'month', 'group_by': 'entry_type'})),
+    Case('story-list-create'),
+    Case('story-list-create', 'post', build=_new_story),
+    Case('story-search', build=_query({'q': 'music studio'})),
+    Case('moderation-claim', 'post', 'moderator', _claim),
+    Case('moderation-release', 'post', 'moderator', _release),
+    Case('moderation-decide', 'post', 'moderator', _decide),
+    Case('user-analytics'),
+    Case('dashboard-analytics', actor='moderator'),
+    Case('inclusion-metrics', actor='moderator'),
+    Case('group-breakdown', actor='moderator'),
+    Case('group-detail', actor='moderator', build=_path(group='refugee')),
+    Case('sync-changes'),
+    Case('media-list'),
+    Case('upload-create', 'post', build=_upload),
+    Case('upload-detail', build=_upload_session),
+    Case('notification-list'),
+    Case('notification-unread-count'),
+    Case('notification-read', 'post', build=lambda bench, i: ({}, {})),
+    Case('notification-broadcast', 'post', 'moderator',
+         lambda bench, i: ({}, {'title': 'Benchmark', 'body': 'Market day moved', 'group': 'PWD'})),
+    Case('metrics', actor='scraper'),
+]
+
+
+def api_url_names(patterns=None, prefix=''):
+    """Names of every routed URL outside the admin"""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if route.startswith('admin/'):
+            continue
+        if isinstance(pattern, URLResolver):
+            names |= api_url_names(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def uncovered_url_names():
+    """Routes neither benchmarked nor listed in SKIPPED, so new endpoints are not missed silently"""
+    covered = {case.url_name for case in CASES} | SKIPPED.keys()
+    return sorted(api_url_names() - covered)
+
+
+def parse_server_timing(header):
+    """{phase: milliseconds} from a Server-Timing header"""
+    phases = {}
+    for entry in filter(None, (part.strip() for part in (header or '').split(','))):
+        name, *params = entry.split(';')
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                phases[name.strip()] = float(value)
+    return phases
+
+
+def run_metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'started_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'db_profile': os.environ.get('HEVA_DB_PROFILE', 'development'),
+    }
+
+
+class EndpointBenchmark:
+    """
+    Times every case against the current database contents.
+
+    Requests go through the full stack with real JWTs, so authentication
+    is included. The first request of each case runs after the cache is
+    cleared (cold); the following ``iterations`` are summarised as
+    percentiles (warm). Query counts come from one more request with
+    query capture on, so capture overhead stays out of the timings.
+    Endpoints that return an ETag are also timed when revalidated.
+    """
+
+    def __init__(self, iterations=30, warmup=2, cases=None, log=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cases = CASES if cases is None else cases
+        self.log = log or (lambda message: None)
+        self.tag = f'bench-{uuid.uuid4().hex[:8]}'
+        self.users = {}
+        self.clients = {}
+        self.upload = None
+
+    def _actor(self, user_type, **extra):
+        user = User.objects.filter(user_type=user_type, is_active=True, **extra).order_by('id').first()
+        if user is None:
+            user = User.objects.create_user(
+                email=f'{self.tag}-{user_type}@example.org', username=f'{self.tag}-{user_type}',
+                password=PASSWORD, full_name=f'Benchmark {user_type}', user_type=user_type,
+            )
+        return user
+
+    def prepare(self):
+        """Pick the accounts: the creative with the largest ledger, an agent and a moderator"""
+        heaviest = (
+            FinancialEntry.objects.filter(user__user_type='creative').values('user_id')
+            .annotate(rows=Count('id')).order_by('-rows').first()
+        )
+        creative = User.objects.get(pk=heaviest['user_id']) if heaviest else self._actor('creative')
+        if not creative.check_password(PASSWORD):
+            creative.set_password(PASSWORD)
+            creative.save(update_fields=['password'])
+        self.users = {'creative': creative, 'agent': self._actor('agent'), 'moderator': self._actor('admin')}
+        self.upload = None
+
+        anonymous = APIClient()
+        anonymous.credentials(HTTP_X_METRICS_TOKEN=self.tag)
+        self.clients = {'anonymous': anonymous}
+        for actor, user in self.users.items():
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}',
+                HTTP_X_METRICS_TOKEN=self.tag,
+            )
+            self.clients[actor] = client
+        scraper = APIClient()
+        scraper.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tag}')
+        self.clients['scraper'] = scraper
+
+    def _request(self, case, i, headers=None):
+        kwargs, data = case.build(self, i)
+        client = self.clients[case.actor]
+        url = reverse(case.url_name, kwargs=kwargs)
+        method = getattr(client, case.method)
+        options = {} if case.method == 'get' else {'format': 'json'}
+        started = time.perf_counter()
+        response = method(url, data, headers=headers, **options)
+        # Streamed bodies are produced while they are read
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return time.perf_counter() - started, response, len(body), url
+
+    def _count_queries(self, case, i, headers=None):
+        with ExitStack() as stack:
+            captures = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+            _, response, _, _ = self._request(case, i, headers)
+        return sum(len(capture) for capture in captures), response
+
+    def _series(self, case, first, headers=None):
+        timings = []
+        for i in range(first, first + self.warmup + self.iterations):
+            elapsed, response, size, _ = self._request(case, i, headers)
+            if i >= first + self.warmup:
+                timings.append(elapsed * 1000)
+        return timings, response, size
+
+    @staticmethod
+    def _summary(timings):
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def run_case(self, case):
+        cache.clear()
+        cold, response, size, url = self._request(case, 0)
+        timings, response, size = self._series(case, 1)
+        queries, response = self._count_queries(case, 2 + self.warmup + self.iterations)
+        result = {
+            'path': url,
+            'status': response.status_code,
+            'bytes': size,
+            'queries': queries,
+            'cold_ms': round(cold * 1000, 3),
+            **self._summary(timings),
+            # Where the last warm request's time went, as the server measured it
+            'server_timing_ms': parse_server_timing(response.get('Server-Timing')),
+        }
+        etag = response.get('ETag') if case.method == 'get' else None
+        if etag:
+            headers = {'If-None-Match': etag}
+            timings, response, _ = self._series(case, 0, headers)
+            queries, _ = self._count_queries(case, 0, headers)
+            result['not_modified'] = {'status': response.status_code, 'queries': queries, **self._summary(timings)}
+        return result
+
+    def run(self):
+        self.prepare()
+        results = {}
+        # Server timings are reported whatever the deployment chose, and the
+        # run's tag doubles as the metrics token that unlocks their phases
+        with override_settings(HEVA_SERVER_TIMING=True, HEVA_METRICS_TOKEN=self.tag):
+            for case in self.cases:
+                result = results[case.label] = self.run_case(case)
+                self.log(f'{case.label}: p50 {result["p50_ms"]}ms, {result["queries"]} queries')
+        return results
+
+
+def table_counts():
+    return {
+        'users': User.objects.count(),
+        'entries': FinancialEntry.objects.count(),
+        'stories': Story.objects.count(),
+    }
+
+
+def run_benchmarks(scales, iterations=30, warmup=2, seed=0, batch_size=5000, cases=None, log=None):
+    """
+    Grow the current database through each (name, sizes) scale and benchmark it.
+
+    Only the rows missing to reach a scale are generated, so the scales
+    should be given smallest first and a kept benchmark database can be
+    reused. Returns the JSON-serialisable report.
+    """
+    log = log or (lambda message: None)
+    report = {
+        'meta': {**run_metadata(), 'iterations': iterations, 'warmup': warmup, 'seed': seed},
+        'skipped': SKIPPED,
+        'uncovered': uncovered_url_names(),
+        'scales': [],
+    }
+    for index, (name, (users, entries, stories)) in enumerate(scales):
+        current = table_counts()
+        missing = {
+            'users': max(0, users - current['users']),
+            'entries': max(0, entries - current['entries']),
+            'stories': max(0, stories - current['stories']),
+        }
+        log(f'Seeding {name}: {missing}')
+        population = SyntheticPopulation(seed=seed + index, batch_size=batch_size, log=log)
+        seed_seconds = population.populate(**missing)
+        bench = EndpointBenchmark(iterations=iterations, warmup=warmup, cases=cases, log=log)
+        log(f'Benchmarking {name}')
+        report['scales'].append({
+            'name': name,
+            'rows': table_counts(),
+            'seed_seconds': {step: round(seconds, 2) for step, seconds in seed_seconds.items()},
+            'endpoints': bench.run(),
+        })
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.25, min_ms=1.0):
+    """
+    Regressions of ``current`` against ``baseline``, matched by scale name and endpoint.
+
+    A warm p50 counts when it is more than ``threshold`` (a fraction)
+    and ``min_ms`` slower, so sub-millisecond noise is ignored. Query
+    counts are deterministic, so any increase counts.
+    """
+    regressions = []
+    previous = {scale['name']: scale['endpoints'] for scale in baseline.get('scales', [])}
+    for scale in current.get('scales', []):
+        for label, result in scale['endpoints'].items():
+            before = previous.get(scale['name'], {}).get(label)
+            if before is None:
+                continue
+            slower = result['p50_ms'] - before['p50_ms']
+            if slower > min_ms and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+                regressions.append({
+                    'scale': scale['name'], 'endpoint': label, 'metric': 'p50_ms',
+                    'baseline': before['p50_ms'], 'current': result['p50_ms'],
+                })
+            if result['queries'] > before['queries']:
+                regressions.append({
+                    'scale': scale['name'], 'endpoint': label, 'metric': 'queries',
+                    'baseline': before['queries'], 'current': result['queries'],
+                })
+    return regressions
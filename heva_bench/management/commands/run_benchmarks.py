@@ -0,0 +1,93 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from heva_bench.benchmark import CASES, compare_reports, parse_scale, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database at increasing scales and record latency percentiles '
+        'and query counts for every API endpoint as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='tiny,small',
+            help='Comma-separated scales, smallest first: tiny, small, medium, large or USERS:ENTRIES:STORIES',
+        )
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests before the timed ones')
+        parser.add_argument('--endpoints', help='Only run endpoints whose label contains one of these comma-separated words')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert while seeding')
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the JSON report')
+        parser.add_argument('--compare', help='A previous report to check this run against')
+        parser.add_argument(
+            '--threshold', type=float, default=0.25, help='Fraction a p50 may grow by before it counts as a regression',
+        )
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero when --compare finds regressions')
+        parser.add_argument(
+            '--database-file',
+            help='Put the test database in this file instead of memory, for the larger scales',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the test database afterwards; the next run only seeds the rows still missing',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [parse_scale(value.strip()) for value in options['scales'].split(',') if value.strip()]
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not scales:
+            raise CommandError('--scales must name at least one scale')
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError('--iterations must be positive and --warmup not negative')
+        cases = None
+        if options['endpoints']:
+            words = [word.strip() for word in options['endpoints'].split(',') if word.strip()]
+            cases = [case for case in CASES if any(word in case.label for word in words)]
+            if not cases:
+                raise CommandError('--endpoints matched no endpoint')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        if options['database_file']:
+            connections['default'].settings_dict['TEST']['NAME'] = options['database_file']
+        # Never seed the real database: everything runs against the test database
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            report = run_benchmarks(
+                scales, iterations=options['iterations'], warmup=options['warmup'], seed=options['seed'],
+                batch_size=options['batch_size'], cases=cases,
+                log=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        if report['uncovered']:
+            self.stdout.write(self.style.WARNING(f'Endpoints without a benchmark: {", ".join(report["uncovered"])}'))
+
+        if baseline is not None:
+            regressions = compare_reports(baseline, report, threshold=options['threshold'])
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(
+                    '{scale} {endpoint}: {metric} {baseline} -> {current}'.format(**regression)
+                ))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS(f'No regressions against {options["compare"]}'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
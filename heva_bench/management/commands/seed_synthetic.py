@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from heva_bench.synthetic import PASSWORD, SyntheticPopulation
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate synthetic users, financial entries and stories for load and performance testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to add')
+        parser.add_argument('--entries', type=int, default=25000, help='Financial entries to add, spread over all users')
+        parser.add_argument('--stories', type=int, default=5000, help='Stories to add, spread over all users')
+        parser.add_argument('--days', type=int, default=730, help='Days of history the rows are dated across')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed and sizes give the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument(
+            '--allow-real-db', action='store_true',
+            help='Seed the configured database even though DEBUG is off',
+        )
+
+    def handle(self, *args, **options):
+        # Synthetic accounts share a known password, so keep them out of
+        # deployed databases unless asked for explicitly
+        if not (settings.DEBUG or options['allow_real_db']):
+            raise CommandError(
+                f'Refusing to seed {connection.settings_dict["NAME"]} with DEBUG off; '
+                'pass --allow-real-db if this database is meant for testing'
+            )
+        for option in ('users', 'entries', 'stories'):
+            if options[option] < 0:
+                raise CommandError(f'--{option} must not be negative')
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be positive')
+
+        population = SyntheticPopulation(
+            seed=options['seed'], days=options['days'], batch_size=options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        try:
+            timings = population.populate(
+                users=options['users'], entries=options['entries'], stories=options['stories'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        spent = ', '.join(f'{step} {seconds:.1f}s' for step, seconds in timings.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {options["users"]} users, {options["entries"]} entries and {options["stories"]} stories ({spent}); '
+            f'synthetic accounts sign in with password {PASSWORD!r}'
+        ))
@@ -0,0 +1,228 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from userauth.memberships import sync_group_memberships
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from financetracker.summary import rebuild_summaries
+from storymanager.models import Story
+from storymanager.tags import sync_story_tags
+from heva_analytics.batch_scoring import rescore_users
+from heva_analytics.rollup import run_rollup
+
+# Every synthetic account shares one password, hashed once
+PASSWORD = 'synthetic-Pass-123'
+
+# (value, weight) distributions, loosely following the pilot cohorts. No
+# admins: they moderate and can create accounts, and every synthetic
+# account signs in with the password above.
+USER_TYPES = [('creative', 92), ('agent', 8)]
+GENDERS = [('female', 46), ('male', 42), ('non-binary', 3), ('other', 2), ('prefer_not_to_say', 7)]
+DEVICES = [('feature_phone', 35), ('smartphone', 40), ('shared_device', 15), ('tablet', 4), ('computer', 6)]
+LITERACY_LEVELS = [('basic', 40), ('intermediate', 40), ('advanced', 15), ('', 5)]
+LOCATIONS = ['Kampala', 'Nairobi', 'Kakuma', 'Bidi Bidi', 'Gulu', 'Mombasa', 'Kisumu', 'Arua', 'Nakivale', 'Dadaab']
+# Each group is joined independently with this probability
+GROUP_RATES = {'refugee': 0.30, 'PWD': 0.12, 'LGBTQI+': 0.06, 'creative': 0.55, 'youth': 0.40, 'women-led': 0.25}
+DISABILITY_RATE = 0.12
+CONSENT_CONTACT_RATE = 0.7
+
+ENTRY_TYPES = [('income', 45), ('expense', 45), ('funding', 6), ('other', 4)]
+SOURCES = {
+    'income': ['M-PESA', 'cash', 'bank transfer', 'gig payment', 'sales'],
+    'expense': ['materials', 'transport', 'rent', 'airtime', 'equipment', 'food'],
+    'funding': ['grant', 'microloan', 'crowdfunding', 'sponsorship'],
+    'other': ['gift', 'refund', 'savings group'],
+}
+# Typical amounts per entry type, drawn log-normally
+AMOUNT_MEDIANS = {'income': 1500, 'expense': 800, 'funding': 20000, 'other': 500}
+
+STORY_STATUSES = [('approved', 60), ('pending', 30), ('rejected', 10)]
+# Each tag is attached independently with this probability
+TAG_RATES = {
+    'urgency': 0.08, 'gender violence': 0.05, 'refugee': 0.25, 'creative': 0.5, 'music': 0.2, 'film': 0.1,
+    'fashion': 0.1, 'crafts': 0.15, 'education': 0.1, 'health': 0.08,
+}
+WORDS = (
+    'music studio market community art craft song dance film camera story grant loan family school '
+    'village city youth women refugee camp water drought harvest business savings group tailor design '
+    'paint record stage festival mentor training phone radio support fund hope future dream work'
+).split()
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+@contextmanager
+def historical_dates(*fields):
+    """
+    Let bulk_create keep the dates we set on (model, field name) pairs.
+
+    auto_now_add fields are overwritten with the current time on insert,
+    so they are switched off for the duration.
+    """
+    switched = [model._meta.get_field(name) for model, name in fields]
+    try:
+        for field in switched:
+            field.auto_now_add = False
+        yield
+    finally:
+        for field in switched:
+            field.auto_now_add = True
+
+
+class SyntheticPopulation:
+    """
+    Generates users, financial entries and stories with realistic mixes.
+
+    Output depends only on ``seed`` and the requested sizes, so every run
+    of a benchmark measures the same data. Rows are written with
+    bulk_create in batches of ``batch_size``, and the derived tables that
+    signals normally maintain are rebuilt at the end.
+    """
+
+    def __init__(self, seed=0, days=730, batch_size=5000, log=None):
+        self.rng = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.password = make_password(PASSWORD)
+
+    def _past(self, after=None):
+        """A moment in the history window, after ``after`` when given"""
+        start = after or self.now - timedelta(days=self.days)
+        span = (self.now - start).total_seconds()
+        return start + timedelta(seconds=span * self.rng.random() ** 0.7)
+
+    def _user(self, number):
+        rng = self.rng
+        groups = [group for group, rate in GROUP_RATES.items() if rng.random() < rate]
+        disability = rng.random() < DISABILITY_RATE
+        return User(
+            username=f'synthetic{number}',
+            email=f'synthetic{number}@example.org',
+            full_name=f'Synthetic Creative {number}',
+            phone=f'+2567{number % 100000000:08d}' if rng.random() < 0.8 else '',
+            location=rng.choice(LOCATIONS),
+            user_type=_weighted(rng, USER_TYPES),
+            gender=_weighted(rng, GENDERS),
+            disability=disability,
+            disability_type='mobility' if disability else '',
+            marginalized_groups=groups,
+            primary_device=_weighted(rng, DEVICES),
+            literacy_level=_weighted(rng, LITERACY_LEVELS),
+            social_proof={'reference_name': 'Community Leader', 'relationship': 'mentor'} if rng.random() < 0.5 else {},
+            consent_data_collection=True,
+            consent_contact=rng.random() < CONSENT_CONTACT_RATE,
+            password=self.password,
+            date_joined=self._past(),
+        )
+
+    def create_users(self, count):
+        """Insert ``count`` users; returns [(id, date_joined)] of the new users"""
+        first = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        created = []
+        with historical_dates((User, 'date_joined')):
+            for offset in range(0, count, self.batch_size):
+                batch = [self._user(first + offset + i) for i in range(min(self.batch_size, count - offset))]
+                with transaction.atomic():
+                    User.objects.bulk_create(batch)
+                    sync_group_memberships(batch)
+                created += [(user.pk, user.date_joined) for user in batch]
+                self.log(f'users: {len(created)}/{count}')
+        return created
+
+    def _pick_user(self, users):
+        # Squaring skews activity: a few users hold most of the rows
+        return users[int(len(users) * self.rng.random() ** 2)]
+
+    def create_entries(self, users, count):
+        rng = self.rng
+        written = 0
+        with historical_dates((FinancialEntry, 'date')):
+            while written < count:
+                batch = []
+                for _ in range(min(self.batch_size, count - written)):
+                    user_id, joined = self._pick_user(users)
+                    entry_type = _weighted(rng, ENTRY_TYPES)
+                    amount = Decimal(AMOUNT_MEDIANS[entry_type] * rng.lognormvariate(0, 0.8)).quantize(Decimal('0.01'))
+                    batch.append(FinancialEntry(
+                        user_id=user_id, entry_type=entry_type, amount=amount,
+                        source=rng.choice(SOURCES[entry_type]), description=_words(rng, rng.randint(0, 6)),
+                        date=self._past(joined).date(),
+                    ))
+                FinancialEntry.objects.bulk_create(batch)
+                written += len(batch)
+                self.log(f'entries: {written}/{count}')
+
+    def create_stories(self, users, moderators, count):
+        rng = self.rng
+        written = 0
+        with historical_dates((Story, 'date_submitted')):
+            while written < count:
+                batch = []
+                for _ in range(min(self.batch_size, count - written)):
+                    user_id, joined = self._pick_user(users)
+                    submitted = self._past(joined)
+                    status = _weighted(rng, STORY_STATUSES)
+                    approved = status == 'approved' and moderators
+                    batch.append(Story(
+                        user_id=user_id, title=_words(rng, rng.randint(3, 8)).capitalize(),
+                        content=_words(rng, rng.randint(40, 200)),
+                        tags=[tag for tag, rate in TAG_RATES.items() if rng.random() < rate],
+                        status=status, date_submitted=submitted,
+                        date_approved=submitted + timedelta(days=rng.randint(0, 10)) if approved else None,
+                        approved_by_id=rng.choice(moderators) if approved else None,
+                    ))
+                with transaction.atomic():
+                    Story.objects.bulk_create(batch)
+                    sync_story_tags(batch)
+                written += len(batch)
+                self.log(f'stories: {written}/{count}')
+
+    def populate(self, users=0, entries=0, stories=0):
+        """Add the given numbers of rows, spread over all synthetic and existing users"""
+        timings = {}
+        started = time.monotonic()
+        self.create_users(users)
+        timings['users'] = time.monotonic() - started
+
+        # New rows go to every user, so repeated runs grow one population
+        population = list(User.objects.order_by('id').values_list('id', 'date_joined'))
+        # Approvals are credited to existing admins, if there are any
+        moderators = list(User.objects.filter(user_type='admin').values_list('id', flat=True))
+        if not population and (entries or stories):
+            raise ValueError('Entries and stories need at least one user')
+
+        started = time.monotonic()
+        self.create_entries(population, entries)
+        timings['entries'] = time.monotonic() - started
+        started = time.monotonic()
+        self.create_stories(population, moderators, stories)
+        timings['stories'] = time.monotonic() - started
+
+        # bulk_create skipped the signals that keep these current
+        started = time.monotonic()
+        user_ids = [user_id for user_id, _ in population]
+        for offset in range(0, len(user_ids), self.batch_size):
+            rebuild_summaries(user_ids[offset:offset + self.batch_size])
+        self.log('summaries rebuilt')
+        rescore_users(chunk_size=self.batch_size)
+        self.log('users scored')
+        run_rollup()
+        self.log('inclusion metrics rolled up')
+        timings['derived'] = time.monotonic() - started
+        return timings
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Notification
 
-# Register your models here.
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'channel', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('channel', 'kind', 'status')
+    search_fields = ('title', 'last_error')
+    raw_id_fields = ('user',)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HevaNotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'heva_notifications'
+
+    def ready(self):
+        from . import signals  # noqa: F401
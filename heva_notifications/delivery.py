@@ -0,0 +1,150 @@
+import logging
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allows ``rate`` messages per second on average, in bursts of up to ``capacity``"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(int(rate), 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        self._refill()
+        return int(self.tokens)
+
+    def consume(self, count):
+        """Block until ``count`` tokens are available, then take them"""
+        self._refill()
+        if self.tokens < count:
+            time.sleep((count - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= count
+
+
+def get_transports():
+    return {
+        channel: import_string(path)()
+        for channel, path in settings.HEVA_NOTIFICATION_TRANSPORTS.items()
+    }
+
+
+def backoff_seconds(attempts):
+    delay = min(
+        settings.HEVA_NOTIFICATION_BASE_BACKOFF * 2 ** max(attempts - 1, 0), settings.HEVA_NOTIFICATION_MAX_BACKOFF,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(channel, size):
+    """Mark up to ``size`` due messages as sending and return them"""
+    now = timezone.now()
+    ids = list(
+        Notification.objects.filter(status='pending', channel=channel, next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:size]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # The status guard keeps concurrent deliverers from sending a message twice
+    Notification.objects.filter(id__in=ids, status='pending').update(
+        status='sending', locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+    )
+    return list(Notification.objects.filter(locked_by=token, status='sending').select_related('user'))
+
+
+def record_results(batch, results):
+    now = timezone.now()
+    sent = {notification.pk for notification in batch if notification.pk in results and results[notification.pk] is None}
+    Notification.objects.filter(pk__in=sent).update(status='sent', sent_at=now, last_error='', locked_by='')
+
+    failed = []
+    for notification in batch:
+        if notification.pk in sent:
+            continue
+        notification.last_error = results.get(notification.pk) or 'No result from transport'
+        notification.locked_by = ''
+        if notification.attempts >= settings.HEVA_NOTIFICATION_MAX_ATTEMPTS:
+            notification.status = 'failed'
+        else:
+            notification.status = 'pending'
+            notification.next_attempt_at = now + timedelta(seconds=backoff_seconds(notification.attempts))
+        failed.append(notification)
+    Notification.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error', 'locked_by'])
+    return len(sent), len(failed)
+
+
+def deliver_batch(channel, transport, size):
+    batch = claim_batch(channel, size)
+    if not batch:
+        return 0, 0
+    try:
+        results = transport.send_batch(batch)
+    except Exception as e:
+        logger.warning('Transport for %s failed on a batch of %s', channel, len(batch), exc_info=True)
+        results = {notification.pk: f'{type(e).__name__}: {e}' for notification in batch}
+    return record_results(batch, results)
+
+
+def requeue_stuck_notifications():
+    """Return messages whose deliverer died mid-batch to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.HEVA_NOTIFICATION_LOCK_TIMEOUT)
+    return Notification.objects.filter(status='sending', locked_at__lt=cutoff).update(status='pending', locked_by='')
+
+
+def run_delivery(once=False, interval=1.0, should_stop=lambda: False):
+    """
+    Deliver pending messages channel by channel until stopped.
+
+    Each channel's batches are sized by its transport and paced by a token
+    bucket at HEVA_NOTIFICATION_RATES messages per second. With ``once``
+    the loop exits when nothing is due.
+    """
+    transports = get_transports()
+    buckets = {
+        channel: TokenBucket(settings.HEVA_NOTIFICATION_RATES.get(channel, 10)) for channel in transports
+    }
+    totals = {'sent': 0, 'failed': 0}
+    last_maintenance = 0.0
+    while not should_stop():
+        close_old_connections()
+        if time.monotonic() - last_maintenance > settings.HEVA_NOTIFICATION_LOCK_TIMEOUT:
+            requeue_stuck_notifications()
+            last_maintenance = time.monotonic()
+
+        busy = False
+        for channel, transport in transports.items():
+            bucket = buckets[channel]
+            size = min(transport.max_batch, settings.HEVA_NOTIFICATION_BATCH_SIZE, bucket.capacity)
+            # Wait for the bucket before claiming, so claimed rows are sent promptly
+            bucket.consume(size)
+            sent, failed = deliver_batch(channel, transport, size)
+            # Hand back the tokens of a short batch
+            bucket.tokens += size - sent - failed
+            totals['sent'] += sent
+            totals['failed'] += failed
+            busy = busy or sent + failed == size
+        if not busy:
+            if once:
+                break
+            time.sleep(interval)
+    return totals
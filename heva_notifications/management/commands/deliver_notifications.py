@@ -0,0 +1,18 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from heva_notifications.delivery import run_delivery
+
+
+class Command(BaseCommand):
+    help = 'Send pending SMS and other outbound notifications in rate-limited batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due')
+
+    def handle(self, *args, **options):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        totals = run_delivery(once=options['once'], interval=options['interval'], should_stop=lambda: bool(stopping))
+        self.stdout.write(self.style.SUCCESS(f"Sent {totals['sent']} notification(s), {totals['failed']} failed attempt(s)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from heva_notifications.tasks import send_inactivity_reminders
+
+
+class Command(BaseCommand):
+    help = 'Queue reminders for users who have not recorded a financial entry recently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Days without an entry before a reminder')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+        queued = send_inactivity_reminders.delay(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Queued reminder task {queued.pk}'))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('heva_notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='fanout_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('fanout_key__isnull', False)), fields=('fanout_key', 'user', 'channel'), name='unique_fanout_delivery'),
+        ),
+    ]
@@ -1,3 +1,66 @@
 from django.db import models
+from django.utils import timezone
+from userauth.models import User
 
 # Create your models here.
+
+class Notification(models.Model):
+    """
+    One message to one user on one channel.
+
+    Rows are the delivery outbox: they are written in the transaction of
+    the change that caused them and sent later by deliver_notifications.
+    In-app rows are delivered as soon as they are written.
+    """
+    CHANNEL_CHOICES = [
+        ('in_app', 'In-app'),
+        ('sms', 'SMS'),
+    ]
+    KIND_CHOICES = [
+        ('story_approved', 'Story approved'),
+        ('story_rejected', 'Story rejected'),
+        ('funding_entry', 'Funding entry recorded'),
+        ('reminder', 'Reminder'),
+        ('broadcast', 'Broadcast'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)  # Claim token of the delivering process
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    fanout_key = models.CharField(max_length=64, null=True, blank=True)  # Set by fan_out, unique per user and channel
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Delivery scans due messages per channel
+            models.Index(fields=['status', 'channel', 'next_attempt_at'], name='notification_due_idx'),
+            # Backs the (-created_at, -id) keyset pagination of a user's inbox
+            models.Index(fields=['user', 'channel', 'created_at', 'id'], name='notification_inbox_idx'),
+        ]
+        constraints = [
+            # A retried fan-out task re-inserts the same rows, so each is stored once
+            models.UniqueConstraint(
+                fields=['fanout_key', 'user', 'channel'], condition=models.Q(fanout_key__isnull=False),
+                name='unique_fanout_delivery',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.channel} - {self.kind} - {self.status}'
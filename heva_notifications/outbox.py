@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from userauth.models import User
+from .models import Notification
+
+# Titles and body templates per kind, formatted with the notification data
+MESSAGES = {
+    'story_approved': ('Story approved', 'Your story "{story_title}" has been approved and is now visible to funders.'),
+    'story_rejected': ('Story not approved', 'Your story "{story_title}" was not approved. You can edit it and submit again.'),
+    'funding_entry': ('Funding request recorded', 'Your funding request of {amount} has been recorded.'),
+    'reminder': ('We miss you', 'You have not recorded any income or expenses for {days} days. Keep your records up to date.'),
+}
+DEFAULT_CHANNELS = ('in_app', 'sms')
+CHUNK_SIZE = 1000
+
+
+def render_message(kind, data):
+    title, body = MESSAGES[kind]
+    return title, body.format(**data)
+
+
+def _rows_for(user_id, sms_reachable, kind, title, body, channels, data, now, fanout_key=None):
+    rows = []
+    for channel in channels:
+        if channel == 'sms' and not sms_reachable:
+            continue
+        row = Notification(
+            user_id=user_id, channel=channel, kind=kind, title=title, body=body, data=data, fanout_key=fanout_key,
+        )
+        if channel == 'in_app':
+            # Nothing to send: the inbox row is the delivery
+            row.status = 'sent'
+            row.sent_at = now
+        rows.append(row)
+    return rows
+
+
+def sms_reachable_users():
+    """Users who agreed to be contacted and have a number to text"""
+    return Q(consent_contact=True) & ~Q(phone='')
+
+
+def notify_users(messages, channels=DEFAULT_CHANNELS):
+    """
+    Write outbox rows for ``messages``, a list of (user_id, kind, data).
+
+    Runs inside the caller's transaction, so the notifications commit or
+    roll back with the change that caused them. One query reads contact
+    consent for all recipients and one bulk INSERT writes the rows.
+    """
+    if not messages:
+        return 0
+    reachable = set(
+        User.objects.filter(sms_reachable_users(), id__in={user_id for user_id, _, _ in messages})
+        .values_list('id', flat=True)
+    ) if 'sms' in channels else set()
+    now = timezone.now()
+    rows = []
+    for user_id, kind, data in messages:
+        title, body = render_message(kind, data)
+        rows += _rows_for(user_id, user_id in reachable, kind, title, body, channels, data, now)
+    with transaction.atomic():
+        Notification.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+    return len(rows)
+
+
+def fan_out(key, users, kind, title, body, channels=DEFAULT_CHANNELS, data=None):
+    """
+    Write one notification per user in ``users`` (a User queryset).
+
+    Walks the users in primary-key chunks and inserts each chunk in its own
+    transaction, so tens of thousands of recipients never hold one long
+    write lock. Meant to run from the task queue, not a request.
+
+    ``key`` names this fan-out. Rows already written under it are skipped,
+    so a task retried after some chunks committed only fills in the rest.
+    Returns the number of rows the key now covers.
+    """
+    data = data or {}
+    reachable = users.filter(sms_reachable_users())
+    last_id = 0
+    while True:
+        chunk = list(users.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:CHUNK_SIZE])
+        if not chunk:
+            return Notification.objects.filter(fanout_key=key).count()
+        sms_ids = set(reachable.filter(id__in=chunk).values_list('id', flat=True)) if 'sms' in channels else set()
+        now = timezone.now()
+        rows = []
+        for user_id in chunk:
+            rows += _rows_for(user_id, user_id in sms_ids, kind, title, body, channels, data, now, key)
+        with transaction.atomic():
+            Notification.objects.bulk_create(rows, ignore_conflicts=True)
+        last_id = chunk[-1]
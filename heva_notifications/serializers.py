@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'title', 'body', 'data', 'read_at', 'created_at']
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    # Omit to mark the whole inbox read
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class BroadcastSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    body = serializers.CharField(max_length=1000)
+    channels = serializers.MultipleChoiceField(choices=['in_app', 'sms'], default=['in_app'])
+    user_type = serializers.ChoiceField(choices=['creative', 'agent', 'admin'], required=False)
+    group = serializers.CharField(max_length=50, required=False)
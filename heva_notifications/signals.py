@@ -0,0 +1,48 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from financetracker.models import FinancialEntry
+from financetracker.signals import entries_bulk_created
+from storymanager.models import Story
+from storymanager.signals import stories_moderated
+from .outbox import notify_users
+
+STATUS_KINDS = {'approved': 'story_approved', 'rejected': 'story_rejected'}
+
+
+@receiver(post_init, sender=Story)
+def remember_story_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads do not trigger a query
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Story)
+def notify_story_decision(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.status == instance._loaded_status:
+        return
+    instance._loaded_status = instance.status
+    if instance.status in STATUS_KINDS and not created:
+        notify_users([(instance.user_id, STATUS_KINDS[instance.status], {'story_title': instance.title})])
+
+
+@receiver(stories_moderated)
+def notify_bulk_story_decision(sender, story_ids, status, **kwargs):
+    stories = Story.objects.filter(id__in=story_ids).values_list('user_id', 'title')
+    notify_users([(user_id, STATUS_KINDS[status], {'story_title': title}) for user_id, title in stories])
+
+
+def _funding_messages(entries):
+    return [
+        (entry.user_id, 'funding_entry', {'amount': str(entry.amount), 'entry_id': entry.pk})
+        for entry in entries if entry.entry_type == 'funding'
+    ]
+
+
+@receiver(post_save, sender=FinancialEntry)
+def notify_funding_entry(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        notify_users(_funding_messages([instance]))
+
+
+@receiver(entries_bulk_created)
+def notify_bulk_funding_entries(sender, entries, **kwargs):
+    notify_users(_funding_messages(entries))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from userauth.models import User, UserGroupMembership
+from financetracker.models import FinancialEntry
+from heva_tasks.queue import task
+from .outbox import fan_out, render_message
+
+
+def audience(user_type=None, group=None):
+    """Active users, optionally narrowed to a user type and a marginalized group"""
+    users = User.objects.filter(is_active=True)
+    if user_type:
+        users = users.filter(user_type=user_type)
+    if group:
+        users = users.filter(Exists(UserGroupMembership.objects.filter(user=OuterRef('pk'), group=group)))
+    return users
+
+
+@task
+def broadcast_notification(broadcast_id, title, body, channels, user_type=None, group=None):
+    """Send a moderator's message; ``broadcast_id`` keeps retries from sending it twice"""
+    return fan_out(f'broadcast:{broadcast_id}', audience(user_type, group), 'broadcast', title, body, channels)
+
+
+@task
+def send_inactivity_reminders(days):
+    """Remind users who have not recorded an entry for ``days`` days"""
+    cutoff = timezone.localdate() - timedelta(days=days)
+    recent = FinancialEntry.objects.filter(user=OuterRef('pk'), date__gt=cutoff)
+    users = audience().filter(date_joined__lt=timezone.now() - timedelta(days=days)).exclude(Exists(recent))
+    title, body = render_message('reminder', {'days': days})
+    # One reminder a day per threshold, however often the task runs or retries
+    key = f'reminder:{timezone.localdate().isoformat()}:{days}'
+    return fan_out(key, users, 'reminder', title, body, data={'days': days})
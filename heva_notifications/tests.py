@@ -1,3 +1,51 @@
+from unittest import mock
+
+from django.db import OperationalError
 from django.test import TestCase
+from userauth.models import User
+from . import outbox
+from .models import Notification
+from .tasks import broadcast_notification
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.org', username=name, password=None, full_name=name.title(), **fields,
+    )
+
+
+class FanOutTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'user{i}') for i in range(5)]
+        make_user('texter', phone='+254700000000', consent_contact=True)
+
+    def test_rerun_writes_nothing_twice(self):
+        self.assertEqual(broadcast_notification('b1', 'Hello', 'Market day', ['in_app', 'sms']), 7)
+        self.assertEqual(broadcast_notification('b1', 'Hello', 'Market day', ['in_app', 'sms']), 7)
+        self.assertEqual(Notification.objects.count(), 7)
+        self.assertEqual(Notification.objects.filter(channel='sms').count(), 1)
+
+    def test_retry_after_a_partial_run_fills_in_the_rest(self):
+        real_bulk_create = Notification.objects.bulk_create
+        chunks = []
+
+        def fail_second_chunk(rows, **kwargs):
+            chunks.append(rows)
+            if len(chunks) == 2:
+                raise OperationalError('database is locked')
+            return real_bulk_create(rows, **kwargs)
+
+        with mock.patch.object(outbox, 'CHUNK_SIZE', 2), \
+                mock.patch.object(Notification.objects, 'bulk_create', side_effect=fail_second_chunk):
+            with self.assertRaises(OperationalError):
+                broadcast_notification('b1', 'Hello', 'Market day', ['in_app'])
+        self.assertEqual(Notification.objects.count(), 2)
+
+        with mock.patch.object(outbox, 'CHUNK_SIZE', 2):
+            self.assertEqual(broadcast_notification('b1', 'Hello', 'Market day', ['in_app']), 6)
+        self.assertEqual(Notification.objects.values('user').distinct().count(), 6)
 
-# Create your tests here.
+    def test_separate_broadcasts_both_send(self):
+        broadcast_notification('b1', 'Hello', 'Market day', ['in_app'])
+        broadcast_notification('b2', 'Hello', 'Market day', ['in_app'])
+        self.assertEqual(Notification.objects.count(), 12)
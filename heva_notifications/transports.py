@@ -0,0 +1,68 @@
+import json
+import os
+
+from django.conf import settings
+from django.utils import timezone
+
+# Three concatenated SMS segments
+SMS_MAX_LENGTH = 459
+
+
+def sms_text(notification):
+    text = f'{notification.title}: {notification.body}'
+    return text if len(text) <= SMS_MAX_LENGTH else text[:SMS_MAX_LENGTH - 1] + '…'
+
+
+class Transport:
+    """
+    Sends a batch of notifications for one channel.
+
+    ``send_batch`` returns {notification id: error message or None}; ids
+    missing from the result count as failed.
+    """
+    max_batch = 100
+
+    def send_batch(self, notifications):
+        raise NotImplementedError
+
+
+class FileSMSTransport(Transport):
+    """Appends messages as JSON lines to HEVA_SMS_OUTBOX_FILE, standing in for a gateway"""
+
+    def send_batch(self, notifications):
+        results = {}
+        lines = []
+        now = timezone.now().isoformat()
+        for notification in notifications:
+            if not notification.user.phone:
+                results[notification.pk] = 'User has no phone number'
+                continue
+            lines.append(json.dumps({
+                'id': notification.pk, 'to': notification.user.phone, 'text': sms_text(notification), 'sent_at': now,
+            }))
+            results[notification.pk] = None
+        if lines:
+            path = settings.HEVA_SMS_OUTBOX_FILE
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return results
+
+
+class LoopbackSMSTransport(Transport):
+    """Keeps sent messages in memory; numbers in ``unreachable`` fail"""
+    outbox = []
+    unreachable = set()
+
+    def send_batch(self, notifications):
+        results = {}
+        for notification in notifications:
+            phone = notification.user.phone
+            if not phone or phone in self.unreachable:
+                results[notification.pk] = f'Could not reach {phone or "user without phone"}'
+                continue
+            self.outbox.append({'id': notification.pk, 'to': phone, 'text': sms_text(notification)})
+            results[notification.pk] = None
+        return results
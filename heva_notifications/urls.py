@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import NotificationListView, UnreadCountView, MarkReadView, BroadcastView
+
+urlpatterns = [
+    path('', NotificationListView.as_view(), name='notification-list'),
+    path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
+    path('read/', MarkReadView.as_view(), name='notification-read'),
+    path('broadcast/', BroadcastView.as_view(), name='notification-broadcast'),
+]
@@ -1,3 +1,63 @@
-from django.shortcuts import render
+import uuid
+
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from heva_backend.pagination import KeysetPagination
+from storymanager.permissions import IsModerator
+from .models import Notification
+from .serializers import BroadcastSerializer, MarkReadSerializer, NotificationSerializer
+from .tasks import broadcast_notification
 
 # Create your views here.
+
+class NotificationListView(generics.ListAPIView):
+    """The user's in-app inbox, newest first; ?unread=1 for unread only"""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        notifications = Notification.objects.filter(user=self.request.user, channel='in_app')
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(read_at__isnull=True)
+        return notifications
+
+class UnreadCountView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        unread = Notification.objects.filter(user=request.user, channel='in_app', read_at__isnull=True).count()
+        return Response({'unread': unread})
+
+class MarkReadView(generics.GenericAPIView):
+    serializer_class = MarkReadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        notifications = Notification.objects.filter(user=request.user, channel='in_app', read_at__isnull=True)
+        if 'ids' in serializer.validated_data:
+            notifications = notifications.filter(id__in=serializer.validated_data['ids'])
+        return Response({'marked': notifications.update(read_at=timezone.now())})
+
+class BroadcastView(generics.GenericAPIView):
+    """
+    Queue a message to every matching user.
+
+    Recipients are written by a background task, so the request returns
+    as soon as the task is queued whatever the audience size.
+    """
+    serializer_class = BroadcastSerializer
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        queued = broadcast_notification.delay(
+            uuid.uuid4().hex, data['title'], data['body'], sorted(data['channels']), data.get('user_type'), data.get('group'),
+        )
+        return Response({'task': queued.pk}, status=status.HTTP_202_ACCEPTED)
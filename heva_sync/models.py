@@ -0,0 +1,23 @@
+from django.db import models
+from userauth.models import User
+
+
+class Tombstone(models.Model):
+    """Records a deleted row so offline clients can drop their copy"""
+    KIND_CHOICES = [
+        ('financial_entries', 'Financial entry'),
+        ('stories', 'Story'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} deleted at {self.deleted_at}'
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from userauth.models import User
+from financetracker.models import FinancialEntry
+from storymanager.models import Story
+from .models import Tombstone
+
+SYNCED_MODELS = {
+    FinancialEntry: 'financial_entries',
+    Story: 'stories',
+}
+
+
+@receiver(post_delete, sender=FinancialEntry)
+@receiver(post_delete, sender=Story)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Rows removed because their owner was deleted have nobody left to sync
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    Tombstone.objects.create(user_id=instance.user_id, kind=SYNCED_MODELS[sender], object_id=instance.pk)
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from financetracker.models import FinancialEntry
+from financetracker.serializers import FinancialEntrySerializer
+from storymanager.models import Story
+from storymanager.serializers import StorySerializer
+from .models import Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# kind -> (queryset factory, timestamp field, serializer)
+FEEDS = {
+    'financial_entries': (lambda user: FinancialEntry.objects.filter(user=user), 'updated_at', FinancialEntrySerializer),
+    'stories': (lambda user: Story.objects.filter(user=user), 'updated_at', StorySerializer),
+    'deleted': (lambda user: Tombstone.objects.filter(user=user), 'deleted_at', None),
+}
+
+
+def encode_sync_token(positions):
+    payload = {kind: [moment.isoformat(), last_id] for kind, (moment, last_id) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_sync_token(token):
+    """Per-feed (timestamp, id) positions; raises ValueError on a bad token"""
+    payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    if not isinstance(payload, dict):
+        raise ValueError(token)
+    positions = {}
+    for kind, (moment, last_id) in payload.items():
+        if kind not in FEEDS:
+            raise ValueError(kind)
+        parsed = parse_datetime(moment)
+        # Issued tokens carry an offset; a naive time cannot be compared with them
+        if parsed is None or timezone.is_naive(parsed):
+            raise ValueError(moment)
+        positions[kind] = (parsed, int(last_id))
+    return positions
+
+
+class ChangesView(generics.GenericAPIView):
+    """
+    Rows created, changed or deleted since a sync token.
+
+    Each feed is read in (timestamp, id) order past its position in the
+    token. Once a feed is drained its position never moves past
+    ``now - HEVA_SYNC_SAFETY_WINDOW``, so rows committed late with an earlier
+    timestamp are re-sent rather than missed; clients apply results as
+    idempotent upserts.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        token = request.query_params.get('since')
+        try:
+            positions = decode_sync_token(token) if token else {}
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return Response({'detail': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', settings.HEVA_SYNC_PAGE_SIZE)), settings.HEVA_SYNC_PAGE_SIZE))
+        except ValueError:
+            limit = settings.HEVA_SYNC_PAGE_SIZE
+
+        horizon = timezone.now() - timedelta(seconds=settings.HEVA_SYNC_SAFETY_WINDOW)
+        payload = {'deleted': {kind: [] for kind in FEEDS if kind != 'deleted'}}
+        next_positions = {}
+        has_more = False
+
+        for kind, (queryset_for, field, serializer_class) in FEEDS.items():
+            queryset = queryset_for(request.user)
+            if kind in positions:
+                moment, last_id = positions[kind]
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': last_id})
+                )
+            rows = list(queryset.order_by(field, 'id')[:limit + 1])
+            more = len(rows) > limit
+            has_more |= more
+            rows = rows[:limit]
+
+            if kind == 'deleted':
+                for tombstone in rows:
+                    payload['deleted'][tombstone.kind].append(tombstone.object_id)
+            else:
+                payload[kind] = serializer_class(rows, many=True).data
+
+            position = positions.get(kind, (EPOCH, 0))
+            if rows:
+                position = (getattr(rows[-1], field), rows[-1].pk)
+            if not more and position[0] > horizon:
+                position = (horizon, 0)
+            next_positions[kind] = position
+
+        payload['sync_token'] = encode_sync_token(next_positions)
+        payload['has_more'] = has_more
+        return Response(payload)
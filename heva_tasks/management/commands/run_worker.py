@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+import socket
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from heva_tasks.process import run_worker_process
+from heva_tasks.worker import work
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers against the database-backed queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no due task is left')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError('--processes must be at least 1')
+
+        if processes == 1:
+            worker_id = f'{socket.gethostname()}:{os.getpid()}:0'
+            processed = work(worker_id, poll_interval=options['poll_interval'], once=options['once'])
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} task(s)'))
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker_process, args=(index, options['poll_interval'], options['once']), daemon=False,
+            )
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {processes} worker processes')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
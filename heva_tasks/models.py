@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)  # Dotted path of a registered @task function
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(max_length=64)  # sha256 of name, args and kwargs
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_status_run_after_idx'),
+        ]
+        constraints = [
+            # Identical work is only queued once while it is still waiting to run
+            models.UniqueConstraint(fields=['dedupe_key'], condition=models.Q(status='pending'), name='unique_pending_task'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} - {self.status} - attempt {self.attempts}/{self.max_attempts}'
@@ -0,0 +1,22 @@
+"""
+Entry point for worker processes started by run_worker.
+
+Kept free of model imports: under the spawn and forkserver start methods
+a child imports its target before django.setup() has run.
+"""
+import os
+import signal
+import socket
+
+
+def run_worker_process(index, poll_interval, once):
+    """Set up Django in a fresh worker process, then process tasks until signalled"""
+    import django
+    django.setup()
+    from .worker import work
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+    work(worker_id, poll_interval=poll_interval, once=once, should_stop=lambda: bool(stopping))
@@ -0,0 +1,66 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Task
+
+# Registered task functions by dotted name
+REGISTRY = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Register a function as a background task.
+
+    The function gains a ``delay(*args, **kwargs)`` helper that enqueues it.
+    Arguments must be JSON-serializable, so pass ids rather than model
+    instances.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        REGISTRY[task_name] = func
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        func.delay = lambda *args, **kwargs: enqueue(task_name, args, kwargs)
+        return func
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def _dedupe_key(name, args, kwargs):
+    payload = json.dumps([name, list(args), kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def enqueue(name, args=(), kwargs=None, delay=0, max_attempts=None):
+    """
+    Queue a registered task, returning the pending Task row.
+
+    An identical task that is still pending is reused rather than queued
+    twice. Enqueueing inside a transaction commits the task with it.
+    """
+    if name not in REGISTRY:
+        raise KeyError(f'Unknown task {name!r}')
+    kwargs = kwargs or {}
+    key = _dedupe_key(name, args, kwargs)
+    existing = Task.objects.filter(dedupe_key=key, status='pending').first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                name=name,
+                args=list(args),
+                kwargs=kwargs,
+                dedupe_key=key,
+                max_attempts=max_attempts or REGISTRY[name].max_attempts or settings.HEVA_TASKS_MAX_ATTEMPTS,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        # Lost the race against a concurrent enqueue of the same work
+        return Task.objects.get(dedupe_key=key, status='pending')
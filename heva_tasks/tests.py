@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Task
+from .queue import enqueue, task
+from .worker import claim_next, requeue_abandoned_tasks, run_task
+
+calls = []
+
+
+@task(name='heva_tasks.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='heva_tasks.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class EnqueueTests(TestCase):
+    def test_identical_pending_work_is_queued_once(self):
+        first = enqueue('heva_tasks.tests.record', [1])
+        self.assertEqual(enqueue('heva_tasks.tests.record', [1]).pk, first.pk)
+        self.assertNotEqual(enqueue('heva_tasks.tests.record', [2]).pk, first.pk)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_delay_helper_and_unknown_names(self):
+        queued = record.delay(3)
+        self.assertEqual((queued.name, queued.args), ('heva_tasks.tests.record', [3]))
+        with self.assertRaises(KeyError):
+            enqueue('heva_tasks.tests.missing')
+
+    def test_task_max_attempts_overrides_the_default(self):
+        self.assertEqual(explode.delay().max_attempts, 2)
+
+
+class ClaimTests(TestCase):
+    def test_claims_the_oldest_due_task(self):
+        later = enqueue('heva_tasks.tests.record', [1], delay=60)
+        due = enqueue('heva_tasks.tests.record', [2])
+        claimed = claim_next('worker-a')
+        self.assertEqual(claimed.pk, due.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), ('running', 'worker-a', 1))
+        # Nothing else is due: the delayed task waits and the claimed one is taken
+        self.assertIsNone(claim_next('worker-b'))
+        later.refresh_from_db()
+        self.assertEqual(later.status, 'pending')
+
+    def test_claim_bumps_updated_at(self):
+        queued = enqueue('heva_tasks.tests.record', [1])
+        Task.objects.filter(pk=queued.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        self.assertGreater(claim_next('worker-a').updated_at, timezone.now() - timedelta(minutes=1))
+
+
+class RunTaskTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_success_marks_the_task_done(self):
+        enqueue('heva_tasks.tests.record', ['hello'])
+        self.assertTrue(run_task(claim_next('worker-a')))
+        self.assertEqual(calls, ['hello'])
+        self.assertEqual(Task.objects.get().status, 'done')
+
+    @override_settings(HEVA_TASKS_BASE_BACKOFF=30)
+    def test_failure_is_retried_later_then_fails(self):
+        queued = explode.delay()
+        with self.assertLogs('heva_tasks.worker', 'WARNING'):
+            self.assertFalse(run_task(claim_next('worker-a')))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.locked_by), ('pending', 1, ''))
+        self.assertIn('RuntimeError: boom', queued.last_error)
+        self.assertGreater(queued.run_after, timezone.now() + timedelta(seconds=20))
+
+        Task.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with self.assertLogs('heva_tasks.worker', 'WARNING'):
+            self.assertFalse(run_task(claim_next('worker-a')))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_retry_superseded_by_a_newer_duplicate(self):
+        queued = explode.delay()
+        claimed = claim_next('worker-a')
+        # The same work is queued again while the first attempt runs
+        duplicate = explode.delay()
+        self.assertNotEqual(duplicate.pk, queued.pk)
+        with self.assertLogs('heva_tasks.worker', 'WARNING'):
+            run_task(claimed)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.last_error), ('failed', 'Superseded by a pending duplicate'))
+
+    def test_unregistered_task_fails_without_raising(self):
+        Task.objects.create(name='heva_tasks.tests.gone', dedupe_key='x', max_attempts=1)
+        with self.assertLogs('heva_tasks.worker', 'WARNING'):
+            self.assertFalse(run_task(claim_next('worker-a')))
+        self.assertIn('is not registered', Task.objects.get().last_error)
+
+
+@override_settings(HEVA_TASKS_LOCK_TIMEOUT=60)
+class AbandonedTaskTests(TestCase):
+    def test_expired_locks_are_requeued_or_failed(self):
+        retry = enqueue('heva_tasks.tests.record', [1])
+        exhausted = enqueue('heva_tasks.tests.record', [2], max_attempts=1)
+        claim_next('worker-a')
+        claim_next('worker-a')
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        requeue_abandoned_tasks()
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), ('pending', ''))
+        self.assertEqual((exhausted.status, exhausted.last_error), ('failed', 'Worker lock expired'))
+
+    def test_recent_locks_are_left_alone(self):
+        enqueue('heva_tasks.tests.record', [1])
+        claim_next('worker-a')
+        requeue_abandoned_tasks()
+        self.assertEqual(Task.objects.get().status, 'running')
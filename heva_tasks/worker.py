@@ -0,0 +1,113 @@
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Task
+from .queue import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_seconds(attempts):
+    """Exponential backoff with jitter, capped by HEVA_TASKS_MAX_BACKOFF"""
+    delay = min(settings.HEVA_TASKS_BASE_BACKOFF * 2 ** max(attempts - 1, 0), settings.HEVA_TASKS_MAX_BACKOFF)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_next(worker_id):
+    """Atomically take the oldest due pending task, or return None"""
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(status='pending', run_after__lte=now)
+        .order_by('run_after', 'id').values_list('id', flat=True)[:20]
+    )
+    for task_id in candidates:
+        # The status guard makes the UPDATE a compare-and-swap between workers
+        claimed = Task.objects.filter(pk=task_id, status='pending').update(
+            status='running', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            return Task.objects.get(pk=task_id)
+    return None
+
+
+def _finish(task, status, **fields):
+    # update() skips auto_now; purge_finished_tasks ages tasks by updated_at
+    fields['updated_at'] = timezone.now()
+    try:
+        with transaction.atomic():
+            Task.objects.filter(pk=task.pk).update(status=status, **fields)
+    except IntegrityError:
+        # An identical task was queued meanwhile and will do the same work
+        Task.objects.filter(pk=task.pk).update(
+            status='failed', last_error='Superseded by a pending duplicate', updated_at=timezone.now(),
+        )
+
+
+def run_task(task):
+    """Execute one claimed task and record its outcome"""
+    func = REGISTRY.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Task {task.name!r} is not registered')
+        func(*task.args, **task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s (%s) failed on attempt %s', task.pk, task.name, task.attempts, exc_info=True)
+        if task.attempts >= task.max_attempts:
+            _finish(task, 'failed', last_error=error)
+        else:
+            run_after = timezone.now() + timedelta(seconds=backoff_seconds(task.attempts))
+            _finish(task, 'pending', last_error=error, run_after=run_after, locked_by='', locked_at=None)
+        return False
+    Task.objects.filter(pk=task.pk).update(status='done', last_error='', updated_at=timezone.now())
+    return True
+
+
+def requeue_abandoned_tasks():
+    """Put tasks whose worker died mid-run back in the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.HEVA_TASKS_LOCK_TIMEOUT)
+    for task in Task.objects.filter(status='running', locked_at__lt=cutoff):
+        if task.attempts >= task.max_attempts:
+            _finish(task, 'failed', last_error='Worker lock expired')
+        else:
+            _finish(task, 'pending', locked_by='', locked_at=None, run_after=timezone.now())
+
+
+def purge_finished_tasks():
+    cutoff = timezone.now() - timedelta(days=settings.HEVA_TASKS_RETENTION_DAYS)
+    Task.objects.filter(status='done', updated_at__lt=cutoff).delete()
+
+
+def work(worker_id, poll_interval=1.0, once=False, should_stop=lambda: False):
+    """
+    Process tasks until told to stop.
+
+    With ``once`` the loop exits as soon as no due task is left, which
+    suits running the queue from cron.
+    """
+    processed = 0
+    last_maintenance = 0.0
+    while not should_stop():
+        close_old_connections()
+        if time.monotonic() - last_maintenance > settings.HEVA_TASKS_LOCK_TIMEOUT:
+            requeue_abandoned_tasks()
+            purge_finished_tasks()
+            last_maintenance = time.monotonic()
+
+        task = claim_next(worker_id)
+        if task is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_task(task)
+        processed += 1
+    return processed
+
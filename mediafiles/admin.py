@@ -1,3 +1,22 @@
 from django.contrib import admin
+from .models import MediaBlob, MediaFile, UploadSession
 
-# Register your models here.
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    list_display = ('id', 'owner', 'kind', 'content_type', 'original_name', 'created_at')
+    list_filter = ('kind',)
+    raw_id_fields = ('owner', 'blob')
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'created_at')
+    search_fields = ('sha256',)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'owner', 'filename', 'received', 'total_size', 'status', 'updated_at')
+    list_filter = ('status',)
+    raw_id_fields = ('owner', 'media')
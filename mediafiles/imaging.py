@@ -0,0 +1,46 @@
+"""
+Image resizing run inside the rendition process pool.
+
+Kept free of Django imports so spawned worker processes can load it
+without configuring the project.
+"""
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it originals are served
+    Image = None
+
+# Refuse decompression bombs well before they exhaust a worker's memory
+MAX_PIXELS = 40_000_000
+
+
+def available():
+    return Image is not None
+
+
+def render(source, target, size, image_format):
+    """Write a ``size`` x ``size`` centre-cropped rendition of ``source`` to ``target``"""
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = {'quality': 80}
+        if image_format == 'WEBP':
+            options['method'] = 4
+        else:
+            options.update(optimize=True, progressive=True)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write aside and swap in, so concurrent renders never expose a partial file
+        temporary = f'{target}.{os.getpid()}.tmp'
+        try:
+            image.save(temporary, image_format, **options)
+            os.replace(temporary, target)
+        finally:
+            # Only left behind when the encode or swap failed
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+    return os.path.getsize(target)
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mediafiles.storage import purge_abandoned_uploads, purge_orphan_blobs
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned upload sessions and stored files no media refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.HEVA_MEDIA_UPLOAD_EXPIRY_HOURS,
+                            help='Idle hours after which an unfinished upload is abandoned')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        sessions = purge_abandoned_uploads(cutoff)
+        blobs = purge_orphan_blobs(cutoff)
+        self.stdout.write(self.style.SUCCESS(f'Purged {sessions} upload session(s) and {blobs} orphaned file(s)'))
@@ -1,3 +1,63 @@
+import uuid
+
 from django.db import models
+from userauth.models import User
 
 # Create your models here.
+
+class MediaBlob(models.Model):
+    """File content stored once per sha256, however many uploads share it"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    path = models.CharField(max_length=255)  # Relative to MEDIA_ROOT
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.sha256} ({self.size} bytes)'
+
+
+class MediaFile(models.Model):
+    KIND_CHOICES = [
+        ('audio', 'Audio'),
+        ('image', 'Image'),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_files')
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, related_name='files')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    content_type = models.CharField(max_length=100)
+    original_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.owner_id} - {self.original_name or self.blob.sha256}'
+
+
+class UploadSession(models.Model):
+    """A resumable upload; chunks append to a partial file until it is complete"""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('complete', 'Complete'),
+    ]
+
+    # Random id so upload URLs cannot be guessed
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    kind = models.CharField(max_length=10, choices=MediaFile.KIND_CHOICES)
+    content_type = models.CharField(max_length=100)
+    filename = models.CharField(max_length=255, blank=True)
+    total_size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    media = models.ForeignKey(MediaFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Finds abandoned sessions to purge
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner_id} - {self.filename} ({self.received}/{self.total_size})'
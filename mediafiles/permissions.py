@@ -0,0 +1,15 @@
+from storymanager.models import Story
+from storymanager.permissions import is_moderator
+from userauth.models import User
+
+
+def can_view_media(user, media):
+    """
+    Owners and moderators see everything; other signed-in users, agents
+    included, see profile images and the audio of approved stories.
+    """
+    if media.owner_id == user.pk or is_moderator(user):
+        return True
+    if media.kind == 'image':
+        return User.objects.filter(profile_image_media=media).exists()
+    return Story.objects.filter(audio_media=media, status='approved').exists()
@@ -0,0 +1,106 @@
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from . import imaging
+from .storage import media_path
+
+logger = logging.getLogger(__name__)
+
+# Square rendition edge lengths in pixels
+VARIANTS = {
+    'thumb': 64,
+    'small': 160,
+    'medium': 320,
+    'large': 640,
+}
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+# Variant served to each User.primary_device; unknown devices get the default
+DEVICE_VARIANTS = {
+    'feature_phone': 'thumb',
+    'shared_device': 'small',
+    'smartphone': 'small',
+    'tablet': 'medium',
+    'computer': 'large',
+}
+DEFAULT_VARIANT = 'small'
+# Bump when rendering changes so stale renditions are not reused
+RENDITION_VERSION = 1
+
+_pool = None
+
+
+def renditions_available():
+    return imaging.available()
+
+
+def get_pool():
+    """The per-process rendering pool, started on first use"""
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the parent may be a threaded server
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.HEVA_IMAGE_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+        )
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def variant_for_device(device):
+    return DEVICE_VARIANTS.get(device, DEFAULT_VARIANT)
+
+
+def format_for_accept(accept):
+    """WebP when the client says it can decode it, JPEG otherwise"""
+    return 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+
+
+def rendition_path(blob, variant, image_format):
+    # Named after the source content and the rendering parameters, so a
+    # rendition on disk is valid for as long as its name exists
+    return f'renditions/{blob.sha256[:2]}/{blob.sha256}-v{RENDITION_VERSION}-{variant}.{image_format}'
+
+
+def _submit(blob, variant, image_format):
+    return get_pool().submit(
+        imaging.render,
+        str(media_path(blob.path)),
+        str(media_path(rendition_path(blob, variant, image_format))),
+        VARIANTS[variant],
+        FORMATS[image_format][0],
+    )
+
+
+def ensure_rendition(blob, variant, image_format):
+    """
+    Relative path of a rendition, rendering it in the pool if it is missing.
+
+    Returns None when it cannot be produced, in which case callers fall
+    back to the original.
+    """
+    relative = rendition_path(blob, variant, image_format)
+    if media_path(relative).exists():
+        return relative
+    if not renditions_available():
+        return None
+    try:
+        _submit(blob, variant, image_format).result(timeout=settings.HEVA_IMAGE_RENDER_TIMEOUT)
+    except Exception:
+        logger.warning('Could not render %s %s for blob %s', variant, image_format, blob.sha256, exc_info=True)
+        return None
+    return relative
+
+
+def prerender(blob):
+    """Queue every rendition of a new image without waiting for them"""
+    if not renditions_available() or not settings.HEVA_IMAGE_PRERENDER:
+        return
+    for variant in VARIANTS:
+        for image_format in FORMATS:
+            if not media_path(rendition_path(blob, variant, image_format)).exists():
+                _submit(blob, variant, image_format)
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import serializers
+from .models import MediaFile, UploadSession
+from .renditions import VARIANTS, variant_for_device
+from .storage import CONTENT_TYPES
+
+
+def media_url(media, request=None, variant=None):
+    url = reverse('media-content', args=[media.pk])
+    if variant is not None:
+        url = f'{url}?variant={variant}'
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def preferred_media_url(media, request=None, device=None):
+    """
+    The URL best suited to a device: a sized rendition for images.
+
+    ``device`` defaults to the requesting user's primary_device.
+    """
+    if media.kind != 'image':
+        return media_url(media, request)
+    if device is None:
+        device = getattr(getattr(request, 'user', None), 'primary_device', '')
+    return media_url(media, request, variant_for_device(device))
+
+
+class OwnedMediaField(serializers.PrimaryKeyRelatedField):
+    """A MediaFile id that must belong to the requesting user and be of ``kind``"""
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return MediaFile.objects.none()
+        return MediaFile.objects.filter(owner=request.user, kind=self.kind)
+
+
+class MediaFileSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True)
+    url = serializers.SerializerMethodField()
+    preferred_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaFile
+        fields = [
+            'id', 'kind', 'content_type', 'original_name', 'size', 'sha256', 'url', 'preferred_url', 'variants',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return media_url(obj, self.context.get('request'))
+
+    def get_preferred_url(self, obj):
+        return preferred_media_url(obj, self.context.get('request'))
+
+    def get_variants(self, obj):
+        if obj.kind != 'image':
+            return {}
+        return {variant: media_url(obj, self.context.get('request'), variant) for variant in VARIANTS}
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    # Optional: lets a retried upload reuse the user's identical earlier file
+    sha256 = serializers.RegexField(r'^[0-9a-f]{64}$', write_only=True, required=False)
+    media = MediaFileSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'content_type', 'total_size', 'sha256', 'kind', 'received', 'status', 'media']
+        read_only_fields = ['id', 'kind', 'received', 'status', 'media']
+
+    def validate_content_type(self, value):
+        value = value.split(';')[0].strip().lower()
+        if value not in CONTENT_TYPES:
+            raise serializers.ValidationError(f'Accepted types are {", ".join(CONTENT_TYPES)}')
+        return value
+
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Must be positive')
+        if value > settings.HEVA_MEDIA_MAX_SIZE:
+            raise serializers.ValidationError(f'Files are limited to {settings.HEVA_MEDIA_MAX_SIZE} bytes')
+        return value
+
+    def validate(self, attrs):
+        attrs['kind'] = CONTENT_TYPES[attrs['content_type']]
+        return attrs
@@ -0,0 +1,126 @@
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from .storage import CONTENT_TYPES, READ_SIZE, media_path
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    The inclusive (start, end) of a single-range ``Range`` header.
+
+    Returns None when the header is absent or asks for several ranges, in
+    which case the whole file is sent.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def iter_file_range(f, start, length):
+    """Read ``length`` bytes of the open file ``f`` from ``start``, closing it afterwards"""
+    with f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(READ_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _accel_response(relative, content_type):
+    """Let the front-end server send the bytes (it handles Range itself)"""
+    response = HttpResponse(content_type=content_type)
+    if settings.HEVA_MEDIA_ACCEL == 'nginx':
+        response['X-Accel-Redirect'] = settings.HEVA_MEDIA_ACCEL_PREFIX + relative
+    else:
+        response['X-Sendfile'] = str(media_path(relative))
+    return response
+
+
+def serve_file(request, relative, size, etag, content_type):
+    """
+    Send a stored file, honouring single byte ranges and conditional requests.
+
+    Stored files are content-addressed and never change, so ``etag`` is
+    strong and the response may be cached for good.
+    """
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if settings.HEVA_MEDIA_ACCEL:
+        response = _accel_response(relative, content_type)
+    else:
+        path = media_path(relative)
+        byte_range = None
+        # If-Range: only resume when the client holds this same content
+        if request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            # The record outlived its file (restored database, lost volume)
+            raise Http404('The stored file is missing')
+        if byte_range is None:
+            # FileResponse hands the open file to the server's sendfile wrapper
+            response = FileResponse(f, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(f, start, end - start + 1), status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    _contain(response)
+    return response
+
+
+def _contain(response):
+    # Uploads are served from the API origin, so a file opened directly must
+    # not be able to run script there, whatever its bytes look like
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Content-Security-Policy'] = "sandbox; default-src 'none'"
+
+
+def serve_media(request, media):
+    blob = media.blob
+    # The type was chosen by the uploader; anything outside the accepted
+    # list (older uploads) goes out as an opaque download
+    content_type = media.content_type if media.content_type in CONTENT_TYPES else 'application/octet-stream'
+    response = serve_file(request, blob.path, blob.size, f'"{blob.sha256}"', content_type)
+    if content_type not in CONTENT_TYPES:
+        response['Content-Disposition'] = 'attachment'
+    return response
@@ -0,0 +1,205 @@
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import MediaBlob, MediaFile, UploadSession
+
+READ_SIZE = 64 * 1024
+HASH_READ_SIZE = 1024 * 1024
+# Accepted upload types and the media kind of each. Only formats browsers
+# treat as passive content: SVG and other scriptable types are refused.
+CONTENT_TYPES = {
+    'image/jpeg': 'image', 'image/png': 'image', 'image/webp': 'image', 'image/gif': 'image',
+    'audio/mpeg': 'audio', 'audio/mp4': 'audio', 'audio/aac': 'audio', 'audio/ogg': 'audio',
+    'audio/webm': 'audio', 'audio/wav': 'audio', 'audio/x-wav': 'audio', 'audio/amr': 'audio',
+    'audio/3gpp': 'audio',
+}
+
+
+class OffsetMismatch(Exception):
+    """A chunk did not start where the upload left off"""
+
+    def __init__(self, expected):
+        super().__init__(f'Upload is at offset {expected}')
+        self.expected = expected
+
+
+def media_path(relative):
+    return Path(settings.MEDIA_ROOT) / relative
+
+
+def partial_path(session):
+    return media_path('partial') / f'{session.pk}.part'
+
+
+def blob_relative_path(sha256):
+    # Two levels of fan-out keep directories small
+    return f'blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def start_upload(owner, kind, content_type, filename, total_size):
+    session = UploadSession.objects.create(
+        owner=owner, kind=kind, content_type=content_type, filename=filename, total_size=total_size,
+    )
+    path = partial_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Write ``length`` bytes from ``stream`` at ``offset`` of the partial file.
+
+    The body is copied in small reads, so memory use does not depend on the
+    chunk size. If the client drops mid-chunk, whatever arrived is kept and
+    the upload resumes from there. Returns the MediaFile once the last byte
+    is in, otherwise None.
+    """
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+
+    remaining = length
+    with open(partial_path(session), 'r+b') as f:
+        f.seek(offset)
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    received = offset + length - remaining
+    # Guarded on the old offset so a concurrent retry of the same chunk
+    # cannot advance the upload twice
+    advanced = UploadSession.objects.filter(pk=session.pk, status='active', received=offset).update(
+        received=received, updated_at=timezone.now(),
+    )
+    if not advanced:
+        session.refresh_from_db()
+        raise OffsetMismatch(session.received)
+    session.received = received
+    if received == session.total_size:
+        return finalize_upload(session)
+    return None
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def move_into_place(path, relative):
+    """
+    Move a finished file to its content-addressed ``relative`` path.
+
+    Returns False, leaving ``path`` alone, when identical content is
+    already stored there.
+    """
+    target = media_path(relative)
+    if target.exists():
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(path, target)
+    return True
+
+
+def register_blob(sha256, size, relative):
+    try:
+        with transaction.atomic():
+            blob, _ = MediaBlob.objects.get_or_create(sha256=sha256, defaults={'size': size, 'path': relative})
+    except IntegrityError:
+        # Another upload of the same content registered the blob first
+        blob = MediaBlob.objects.get(sha256=sha256)
+    return blob
+
+
+def finalize_upload(session):
+    """
+    Turn a fully received session into a MediaFile.
+
+    The partial file is hashed in place before any transaction: with
+    IMMEDIATE transactions the write lock is held from BEGIN, and every
+    writer in the app would wait on a large upload's hash. It is only
+    moved inside the transaction that completes the session, and moved
+    back if that transaction fails, so a failed finish leaves an active
+    session that the next PATCH finishes again.
+    """
+    path = partial_path(session)
+    try:
+        sha256 = hash_file(path)
+    except FileNotFoundError:
+        # A concurrent request already took the partial file to finish the session
+        session.refresh_from_db()
+        return session.media
+    relative = blob_relative_path(sha256)
+    moved = False
+    try:
+        with transaction.atomic():
+            # Only one request gets to finish a session
+            claimed = UploadSession.objects.filter(pk=session.pk, status='active').update(
+                status='complete', updated_at=timezone.now(),
+            )
+            if not claimed:
+                session.refresh_from_db()
+                return session.media
+            blob = register_blob(sha256, session.total_size, relative)
+            media = MediaFile.objects.create(
+                owner_id=session.owner_id, blob=blob, kind=session.kind,
+                content_type=session.content_type, original_name=session.filename,
+            )
+            UploadSession.objects.filter(pk=session.pk).update(media=media)
+            # Last, so nothing after the move but the commit can fail. The
+            # transaction holds the write lock, so no other finish can
+            # register this content before the file is back on failure.
+            moved = move_into_place(path, blob.path)
+    except BaseException:
+        if moved:
+            os.replace(media_path(blob.path), path)
+        raise
+    if not moved:
+        path.unlink(missing_ok=True)
+    session.status = 'complete'
+    session.media = media
+    return media
+
+
+def existing_media(owner, sha256, size):
+    """The owner's earlier upload of identical content, so a retried upload can skip sending it"""
+    return MediaFile.objects.filter(owner=owner, blob__sha256=sha256, blob__size=size).select_related('blob').first()
+
+
+def cancel_upload(session):
+    partial_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+def purge_abandoned_uploads(older_than):
+    """Delete active sessions idle since ``older_than`` and their partial files"""
+    stale = UploadSession.objects.filter(status='active', updated_at__lt=older_than)
+    count = 0
+    for session in stale.iterator():
+        cancel_upload(session)
+        count += 1
+    return count
+
+
+def purge_orphan_blobs(older_than):
+    """Delete stored content no MediaFile refers to any more"""
+    count = 0
+    # The age bound spares blobs whose upload is still being committed
+    for blob in MediaBlob.objects.filter(files__isnull=True, created_at__lt=older_than).iterator():
+        media_path(blob.path).unlink(missing_ok=True)
+        for rendition in media_path(f'renditions/{blob.sha256[:2]}').glob(f'{blob.sha256}-*'):
+            rendition.unlink(missing_ok=True)
+        blob.delete()
+        count += 1
+    return count
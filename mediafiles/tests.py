@@ -1,3 +1,186 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from userauth.models import User
+from .models import MediaBlob, MediaFile, UploadSession
+from .serving import RangeNotSatisfiable, parse_range
+from .storage import media_path, partial_path
+
+AUDIO = bytes(range(256)) * 40
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(100)
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.org', username=name, password=None, full_name=name.title(), **fields,
+    )
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=root, HEVA_MEDIA_ACCEL='')
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.user = make_user('creative')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, data=AUDIO, content_type='audio/mpeg', **extra):
+        response = self.client.post(
+            reverse('upload-create'), {'content_type': content_type, 'total_size': len(data), **extra}, format='json',
+        )
+        return response
+
+    def send(self, upload_id, offset, body):
+        return self.client.patch(
+            reverse('upload-detail', args=[upload_id]), body,
+            content_type='application/offset+octet-stream', headers={'Upload-Offset': str(offset)},
+        )
+
+    def upload(self, data=AUDIO, chunk=4096, content_type='audio/mpeg'):
+        upload_id = self.start(data, content_type).data['id']
+        for offset in range(0, len(data), chunk):
+            response = self.send(upload_id, offset, data[offset:offset + chunk])
+        return response
+
+
+class ChunkedUploadTests(MediaTestCase):
+    def test_chunks_assemble_into_a_content_addressed_file(self):
+        response = self.upload()
+        self.assertEqual((response.status_code, response.data['status']), (201, 'complete'))
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.sha256, hashlib.sha256(AUDIO).hexdigest())
+        self.assertEqual(media_path(blob.path).read_bytes(), AUDIO)
+        self.assertFalse(partial_path(UploadSession.objects.get()).exists())
+
+    def test_wrong_offset_reports_where_to_resume(self):
+        upload_id = self.start().data['id']
+        self.send(upload_id, 0, AUDIO[:1000])
+        response = self.send(upload_id, 4096, AUDIO[4096:5000])
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, '1000'))
+        self.assertEqual(self.client.get(reverse('upload-detail', args=[upload_id]))['Upload-Offset'], '1000')
+
+    def test_chunk_past_the_declared_size_is_refused(self):
+        upload_id = self.start(AUDIO[:10]).data['id']
+        self.assertEqual(self.send(upload_id, 0, AUDIO[:11]).status_code, 400)
+
+    def test_identical_content_is_stored_once(self):
+        self.upload()
+        self.upload(chunk=len(AUDIO))
+        self.assertEqual((MediaFile.objects.count(), MediaBlob.objects.count()), (2, 1))
+
+    def test_known_sha256_skips_the_upload(self):
+        self.upload()
+        response = self.start(sha256=hashlib.sha256(AUDIO).hexdigest())
+        self.assertEqual((response.status_code, response.data['status']), (200, 'complete'))
+        self.assertEqual(UploadSession.objects.count(), 1)
+
+    def test_sessions_are_private_to_their_owner(self):
+        upload_id = self.start().data['id']
+        self.client.force_authenticate(make_user('other'))
+        self.assertEqual(self.send(upload_id, 0, AUDIO[:10]).status_code, 404)
+
+    def test_scriptable_types_are_refused(self):
+        for content_type in ('image/svg+xml', 'text/html', 'application/octet-stream'):
+            self.assertEqual(self.start(content_type=content_type).status_code, 400, content_type)
+
+    def test_failed_finish_can_be_retried(self):
+        upload_id = self.start().data['id']
+        self.send(upload_id, 0, AUDIO[:-10])
+        with mock.patch.object(MediaFile.objects, 'create', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.send(upload_id, len(AUDIO) - 10, AUDIO[-10:])
+        session = UploadSession.objects.get()
+        self.assertEqual((session.status, session.received), ('active', len(AUDIO)))
+        self.assertTrue(partial_path(session).exists())
+        self.assertFalse(MediaBlob.objects.exists())
+
+        response = self.send(upload_id, len(AUDIO), b'')
+        self.assertEqual((response.status_code, response.data['status']), (201, 'complete'))
+        self.assertEqual(media_path(MediaBlob.objects.get().path).read_bytes(), AUDIO)
+
+
+class RangeTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = self.upload().data['media']
+        self.url = reverse('media-content', args=[self.media['id']])
+
+    def _get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range(None, 100))
+        for header in ('bytes=100-', 'bytes=5-4', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 100)
+
+    def test_whole_file_with_safety_headers(self):
+        response, body = self._get()
+        self.assertEqual((response.status_code, body), (200, AUDIO))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertIn('sandbox', response['Content-Security-Policy'])
+
+    def test_single_range(self):
+        response, body = self._get(Range='bytes=100-199')
+        self.assertEqual((response.status_code, body), (206, AUDIO[100:200]))
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(AUDIO)}')
+
+    def test_unsatisfiable_range(self):
+        response, _ = self._get(Range=f'bytes={len(AUDIO)}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{len(AUDIO)}'))
+
+    def test_if_range_with_another_etag_sends_everything(self):
+        response, body = self._get(Range='bytes=0-9', **{'If-Range': '"stale"'})
+        self.assertEqual((response.status_code, body), (200, AUDIO))
+
+    def test_revalidation(self):
+        etag = self._get()[0]['ETag']
+        self.assertEqual(self._get(**{'If-None-Match': etag})[0].status_code, 304)
+
+    def test_missing_file_is_not_found(self):
+        media_path(MediaBlob.objects.get().path).unlink()
+        self.assertEqual(self._get()[0].status_code, 404)
+        self.assertEqual(self._get(Range='bytes=0-9')[0].status_code, 404)
+
+    def test_only_the_owner_sees_unpublished_audio(self):
+        self.client.force_authenticate(make_user('other'))
+        self.assertEqual(self._get()[0].status_code, 404)
+
+
+class VisibilityTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.image = self.upload(data=PNG, content_type='image/png').data['media']
+        self.agent = make_user('agent', user_type='agent')
+
+    def _status(self, media, **params):
+        return self.client.get(reverse('media-content', args=[media['id']]), params).status_code
+
+    def test_profile_images_are_visible_to_other_users(self):
+        self.client.force_authenticate(self.agent)
+        self.assertEqual(self._status(self.image), 404)
+        User.objects.filter(pk=self.user.pk).update(profile_image_media_id=self.image['id'])
+        self.assertEqual(self._status(self.image), 200)
+        # Renditions follow the same rule
+        self.assertEqual(self._status(self.image, variant='thumb'), 200)
+
+    def test_other_images_stay_private(self):
+        self.client.force_authenticate(self.agent)
+        self.assertEqual(self._status(self.image, variant='thumb'), 404)
@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import (
+    MediaFileListView, MediaFileDetailView, MediaContentView, UploadSessionCreateView, UploadSessionDetailView,
+)
+
+urlpatterns = [
+    path('', MediaFileListView.as_view(), name='media-list'),
+    path('<int:pk>/', MediaFileDetailView.as_view(), name='media-detail'),
+    path('<int:pk>/content/', MediaContentView.as_view(), name='media-content'),
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', UploadSessionDetailView.as_view(), name='upload-detail'),
+]
@@ -1,3 +1,171 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.response import Response
+from heva_backend.pagination import KeysetPagination
+from .models import MediaFile, UploadSession
+from .permissions import can_view_media
+from .serializers import MediaFileSerializer, UploadSessionSerializer
+from .renditions import FORMATS, VARIANTS, ensure_rendition, format_for_accept, prerender, variant_for_device
+from .serving import serve_file, serve_media
+from .storage import (
+    OffsetMismatch, append_chunk, cancel_upload, existing_media, finalize_upload, media_path, start_upload,
+)
 
 # Create your views here.
+
+class MediaFileListView(generics.ListAPIView):
+    serializer_class = MediaFileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        return MediaFile.objects.filter(owner=self.request.user).select_related('blob')
+
+class MediaFileDetailView(generics.RetrieveDestroyAPIView):
+    serializer_class = MediaFileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        media = get_object_or_404(MediaFile.objects.select_related('blob'), pk=self.kwargs['pk'])
+        if not can_view_media(self.request.user, media):
+            raise NotFound
+        if self.request.method == 'DELETE' and media.owner_id != self.request.user.pk:
+            raise NotFound
+        return media
+
+class FileContentNegotiation(BaseContentNegotiation):
+    """
+    Never refuse a file download over the Accept header.
+
+    Image clients send Accept lists such as ``image/webp,image/*`` that name
+    no API renderer; the view picks the file format itself and errors still
+    render with the default renderer.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+class MediaContentView(MediaFileDetailView):
+    """
+    The file itself, with Range support for seeking and resuming.
+
+    Images take ``?variant=`` (a VARIANTS name, or ``auto`` for the viewer's
+    device class) and come back as WebP when the client accepts it, JPEG
+    otherwise. Without Pillow the original is served.
+    """
+    http_method_names = ['get', 'head', 'options']
+    content_negotiation_class = FileContentNegotiation
+
+    def get(self, request, *args, **kwargs):
+        media = self.get_object()
+        variant = request.query_params.get('variant')
+        if variant and media.kind == 'image':
+            if variant == 'auto':
+                variant = variant_for_device(request.user.primary_device)
+            if variant not in VARIANTS:
+                raise ValidationError({'variant': f'Choose from auto, {", ".join(VARIANTS)}'})
+            image_format = format_for_accept(request.headers.get('Accept'))
+            relative = ensure_rendition(media.blob, variant, image_format)
+            if relative is not None:
+                response = serve_file(
+                    request, relative, media_path(relative).stat().st_size,
+                    f'"{media.blob.sha256}-{variant}.{image_format}"', FORMATS[image_format][1],
+                )
+                patch_vary_headers(response, ['Accept'])
+                return response
+        return serve_media(request, media)
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """
+    Start a resumable upload.
+
+    Send the bytes with PATCH requests to the returned session, each
+    carrying an Upload-Offset header. When ``sha256`` matches a file the
+    user already uploaded, that file is returned straight away.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if data.get('sha256'):
+            media = existing_media(request.user, data['sha256'], data['total_size'])
+            if media is not None:
+                return Response({
+                    'status': 'complete',
+                    'media': MediaFileSerializer(media, context=self.get_serializer_context()).data,
+                }, status=status.HTTP_200_OK)
+
+        session = start_upload(request.user, data['kind'], data['content_type'], data.get('filename', ''), data['total_size'])
+        response = Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+        response['Upload-Offset'] = str(session.received)
+        return response
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    """
+    Inspect, continue or cancel an upload.
+
+    HEAD or GET report the current offset; PATCH appends the request body
+    at Upload-Offset, read straight from the request stream. Once every
+    byte is in, a PATCH (of any body) retries a finish that failed.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_object_or_404(
+            UploadSession.objects.select_related('media__blob'), pk=self.kwargs['pk'], owner=self.request.user,
+        )
+
+    def _respond(self, session, status_code=status.HTTP_200_OK):
+        response = Response(self.get_serializer(session).data, status=status_code)
+        response['Upload-Offset'] = str(session.received)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._respond(self.get_object())
+
+    def patch(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status != 'active':
+            return self._respond(session)
+        if session.received == session.total_size:
+            media = finalize_upload(session)
+            return self._finished(session, media)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'Upload-Offset and Content-Length headers are required'})
+        if length <= 0 or length > settings.HEVA_MEDIA_MAX_CHUNK:
+            raise ValidationError({'detail': f'Chunks must be 1 to {settings.HEVA_MEDIA_MAX_CHUNK} bytes'})
+        if offset + length > session.total_size:
+            raise ValidationError({'detail': 'Chunk runs past the declared file size'})
+
+        try:
+            media = append_chunk(session, offset, request.stream, length)
+        except OffsetMismatch as e:
+            response = self._respond(session, status.HTTP_409_CONFLICT)
+            response['Upload-Offset'] = str(e.expected)
+            return response
+        return self._finished(session, media)
+
+    def _finished(self, session, media):
+        if media is not None and media.kind == 'image':
+            transaction.on_commit(lambda: prerender(media.blob))
+        return self._respond(session, status.HTTP_201_CREATED if media is not None else status.HTTP_200_OK)
+
+    def perform_destroy(self, instance):
+        if instance.status == 'active':
+            cancel_upload(instance)
@@ -635,7 +635,7 @@ const Onboarding = () => {
           <input
             type="file"
             id="profileImage"
-            accept="image/*"
+            accept="image/jpeg,image/png,image/webp,image/gif"
             onChange={(e) => handleFileUpload('profileImage', e.target.files[0])}
             style={{ display: 'none' }}
           />
@@ -72,18 +72,54 @@ class ApiService {
         }
     }
 
-    // Financial Entries APIs
-    async getFinancialEntries() {
+    // Field agents: register a group from an array of users or a CSV File
+    async registerCohort(users) {
         try {
-            const response = await fetch(`${this.baseURL}/finance/entries/`, {
-                headers: this.getAuthHeaders()
+            const isFile = users instanceof File;
+            let body = JSON.stringify({ users });
+            const headers = this.getAuthHeaders();
+            if (isFile) {
+                body = new FormData();
+                body.append('file', users);
+                delete headers['Content-Type'];
+            }
+            const response = await fetch(`${this.baseURL}/auth/register/cohort/`, {
+                method: 'POST',
+                headers,
+                body
             });
 
             if (!response.ok) {
-                throw new Error('Failed to fetch financial entries');
+                throw new Error('Cohort registration failed');
             }
 
             return await response.json();
+        } catch (error) {
+            console.error('Cohort registration error:', error);
+            throw error;
+        }
+    }
+
+    // Financial Entries APIs
+    async getFinancialEntries() {
+        try {
+            // Lists are cursor-paginated: { next, results }; follow next to the end
+            const results = [];
+            let url = `${this.baseURL}/finance/entries/`;
+            while (url) {
+                const response = await fetch(url, {
+                    headers: this.getAuthHeaders()
+                });
+
+                if (!response.ok) {
+                    throw new Error('Failed to fetch financial entries');
+                }
+
+                const data = await response.json();
+                results.push(...data.results);
+                url = data.next;
+            }
+            return results;
         } catch (error) {
             console.error('Get financial entries error:', error);
             throw error;
@@ -109,18 +145,46 @@ class ApiService {
         }
     }
 
-    // Stories APIs
-    async getStories() {
+    // Upload entries recorded offline; each carries a client_key so retries are safe
+    async createFinancialEntriesBulk(entries) {
         try {
-            const response = await fetch(`${this.baseURL}/stories/stories/`, {
-                headers: this.getAuthHeaders()
+            const response = await fetch(`${this.baseURL}/finance/entries/bulk/`, {
+                method: 'POST',
+                headers: this.getAuthHeaders(),
+                body: JSON.stringify({ entries })
             });
 
             if (!response.ok) {
-                throw new Error('Failed to fetch stories');
+                throw new Error('Failed to upload financial entries');
             }
 
             return await response.json();
+        } catch (error) {
+            console.error('Bulk financial entry upload error:', error);
+            throw error;
+        }
+    }
+
+    // Stories APIs
+    async getStories() {
+        try {
+            // Lists are cursor-paginated: { next, results }; follow next to the end
+            const results = [];
+            let url = `${this.baseURL}/stories/stories/`;
+            while (url) {
+                const response = await fetch(url, {
+                    headers: this.getAuthHeaders()
+                });
+
+                if (!response.ok) {
+                    throw new Error('Failed to fetch stories');
+                }
+
+                const data = await response.json();
+                results.push(...data.results);
+                url = data.next;
+            }
+            return results;
         } catch (error) {
             console.error('Get stories error:', error);
             throw error;
@@ -146,6 +210,98 @@ class ApiService {
         }
     }
 
+    // Ranked story search: { q, status, tag, page_size, offset }
+    async searchStories(params = {}) {
+        try {
+            const query = new URLSearchParams(params).toString();
+            const response = await fetch(`${this.baseURL}/stories/search/?${query}`, {
+                headers: this.getAuthHeaders()
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to search stories');
+            }
+
+            return await response.json();
+        } catch (error) {
+            console.error('Search stories error:', error);
+            throw error;
+        }
+    }
+
+    // Media APIs: resumable chunked upload. Pass the upload id from an
+    // interrupted attempt as resumeId to continue where it stopped.
+    async uploadMedia(file, { chunkSize = 256 * 1024, resumeId = null, onProgress = null } = {}) {
+        try {
+            let upload;
+            if (resumeId) {
+                const response = await fetch(`${this.baseURL}/media/uploads/${resumeId}/`, {
+                    headers: this.getAuthHeaders()
+                });
+                if (!response.ok) {
+                    throw new Error('Failed to resume upload');
+                }
+                upload = await response.json();
+            } else {
+                const response = await fetch(`${this.baseURL}/media/uploads/`, {
+                    method: 'POST',
+                    headers: this.getAuthHeaders(),
+                    body: JSON.stringify({ filename: file.name, content_type: file.type, total_size: file.size })
+                });
+                if (!response.ok) {
+                    throw new Error('Failed to start upload');
+                }
+                upload = await response.json();
+            }
+
+            let offset = upload.received;
+            while (upload.status !== 'complete') {
+                const response = await fetch(`${this.baseURL}/media/uploads/${upload.id}/`, {
+                    method: 'PATCH',
+                    headers: {
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Authorization': `Bearer ${this.token}`,
+                        'Upload-Offset': String(offset)
+                    },
+                    body: file.slice(offset, offset + chunkSize)
+                });
+                if (!response.ok && response.status !== 409) {
+                    throw new Error('Failed to upload chunk');
+                }
+                upload = await response.json();
+                // On 409 the server reports where to continue from
+                offset = Number(response.headers.get('Upload-Offset'));
+                if (onProgress) {
+                    onProgress(offset, file.size, upload.id);
+                }
+            }
+            return upload.media;
+        } catch (error) {
+            console.error('Upload media error:', error);
+            throw error;
+        }
+    }
+
+    // Media URLs (url, preferred_url, variants) need the Authorization
+    // header, which <img> and <audio> cannot send. Returns an object URL
+    // for their src; revoke it with URL.revokeObjectURL when done.
+    async getMediaObjectURL(url) {
+        try {
+            const response = await fetch(url, {
+                headers: { 'Authorization': `Bearer ${this.token}` }
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to fetch media');
+            }
+
+            return URL.createObjectURL(await response.blob());
+        } catch (error) {
+            console.error('Get media error:', error);
+            throw error;
+        }
+    }
+
     // Analytics APIs
     async getUserAnalytics() {
         try {
@@ -181,6 +337,124 @@ class ApiService {
         }
     }
 
+    // Live dashboard: calls onUpdate with the full metrics on every change.
+    // Reconnects with backoff after errors and stops for good, calling
+    // onStop with the status, once the server refuses the stream (401 for
+    // an expired or missing token, 501 when it is not served under ASGI).
+    // Returns a function that closes the stream.
+    subscribeDashboard(onUpdate, onStop = () => {}) {
+        let metrics = {};
+        let source = null;
+        let timer = null;
+        let delay = 1000;
+        let stopped = false;
+        const url = () => `${this.baseURL}/analytics/dashboard/stream/?token=${encodeURIComponent(this.token)}`;
+        const stop = (status) => {
+            stopped = true;
+            onStop(status);
+        };
+        // EventSource hides the status of a failed connection, so ask for it
+        // and drop the response before any events arrive
+        const refused = async () => {
+            const controller = new AbortController();
+            try {
+                const response = await fetch(url(), { signal: controller.signal });
+                return [401, 403, 501].includes(response.status) ? response.status : null;
+            } catch (error) {
+                return null;
+            } finally {
+                controller.abort();
+            }
+        };
+        const retry = async () => {
+            // Another tab or a new login may have stored a fresh token
+            this.token = localStorage.getItem('heva_token');
+            if (!this.token) {
+                stop(401);
+                return;
+            }
+            const status = await refused();
+            if (stopped) {
+                return;
+            }
+            if (status) {
+                stop(status);
+                return;
+            }
+            connect();
+        };
+        const connect = () => {
+            source = new EventSource(url());
+            source.addEventListener('snapshot', (event) => {
+                delay = 1000;
+                metrics = JSON.parse(event.data);
+                onUpdate(metrics);
+            });
+            source.addEventListener('delta', (event) => {
+                const changes = JSON.parse(event.data);
+                metrics = { ...metrics };
+                Object.keys(changes).forEach((section) => {
+                    metrics[section] = { ...metrics[section], ...changes[section] };
+                });
+                onUpdate(metrics);
+            });
+            source.onerror = () => {
+                // The server ends the stream when the token expires. Close it
+                // so the browser does not retry with the old URL, and try
+                // again later with whatever token is current then.
+                source.close();
+                if (!stopped) {
+                    timer = setTimeout(retry, delay);
+                    delay = Math.min(delay * 2, 60000);
+                }
+            };
+        };
+        connect();
+        return () => {
+            stopped = true;
+            clearTimeout(timer);
+            source.close();
+        };
+    }
+
+    // Bucketed totals per entry type or source: { bucket: 'day'|'week'|'month', group_by, start, end }
+    async getFinancialTrends(params = {}) {
+        try {
+            const query = new URLSearchParams(params).toString();
+            const response = await fetch(`${this.baseURL}/finance/trends/${query ? `?${query}` : ''}`, {
+                headers: this.getAuthHeaders()
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to fetch financial trends');
+            }
+
+            return await response.json();
+        } catch (error) {
+            console.error('Get financial trends error:', error);
+            throw error;
+        }
+    }
+
+    // Delta sync: rows changed since the last sync token (omit it for a full sync)
+    async getChanges(syncToken = null) {
+        try {
+            const query = syncToken ? `?since=${encodeURIComponent(syncToken)}` : '';
+            const response = await fetch(`${this.baseURL}/sync/changes/${query}`, {
+                headers: this.getAuthHeaders()
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to fetch changes');
+            }
+
+            return await response.json();
+        } catch (error) {
+            console.error('Get changes error:', error);
+            throw error;
+        }
+    }
+
     // Logout
     logout() {
         this.token = null;
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from storymanager.models import Story
+from storymanager.search import rebuild_index, search_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over stories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true', help='Merge the index b-trees after rebuilding')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Story search needs the SQLite FTS5 backend')
+        rebuild_index(optimize=options['optimize'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Story.objects.count()} stories'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storymanager', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['user', 'date_submitted', 'id'], name='story_user_submitted_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storymanager', '0002_list_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='story_user_updated_idx'),
+        ),
+    ]
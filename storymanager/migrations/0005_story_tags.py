@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from heva_backend.relations import normalize_labels
+
+
+def backfill_story_tags(apps, schema_editor):
+    Story = apps.get_model('storymanager', 'Story')
+    StoryTag = apps.get_model('storymanager', 'StoryTag')
+    rows = []
+    for pk, values in Story.objects.values_list('pk', 'tags').iterator(chunk_size=2000):
+        rows += [StoryTag(story_id=pk, tag=value) for value in normalize_labels(values, 50)]
+        if len(rows) >= 2000:
+            StoryTag.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    StoryTag.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storymanager', '0004_story_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoryTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('story', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='storymanager.story')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'story'], name='story_tag_tag_idx')],
+                'constraints': [models.UniqueConstraint(fields=('story', 'tag'), name='unique_story_tag')],
+            },
+        ),
+        migrations.RunPython(backfill_story_tags, migrations.RunPython.noop),
+    ]
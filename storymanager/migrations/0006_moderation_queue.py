@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def restore_search_index(apps, schema_editor):
+    # SQLite rebuilds storymanager_story to add the columns above, which
+    # drops the triggers that keep the search index in step
+    from storymanager.search import CREATE_SQL, FTS_TABLE
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def flag_urgent_stories(apps, schema_editor):
+    Story = apps.get_model('storymanager', 'Story')
+    StoryTag = apps.get_model('storymanager', 'StoryTag')
+    Story.objects.filter(id__in=StoryTag.objects.filter(tag='urgency').values('story_id')).update(is_urgent=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storymanager', '0005_story_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_stories', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='is_urgent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['status', 'date_submitted'], name='story_status_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['status', '-is_urgent', 'date_submitted'], name='story_moderation_queue_idx'),
+        ),
+        migrations.RunPython(flag_urgent_stories, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
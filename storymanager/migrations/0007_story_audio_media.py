@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mediafiles', '0001_initial'),
+        ('storymanager', '0006_moderation_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='audio_media',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stories', to='mediafiles.mediafile'),
+        ),
+    ]
@@ -14,11 +14,46 @@ class Story(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField(blank=True)  # Text story
     audio_file = models.URLField(blank=True)  # URL to audio file
+    audio_media = models.ForeignKey('mediafiles.MediaFile', on_delete=models.SET_NULL, null=True, blank=True, related_name='stories')
     tags = models.JSONField(default=list, blank=True)  # e.g., ['urgency', 'gender violence', 'refugee', 'creative']
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     date_submitted = models.DateTimeField(auto_now_add=True)
     date_approved = models.DateTimeField(null=True, blank=True)
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_stories')
+    updated_at = models.DateTimeField(auto_now=True)
+    # Moderation queue: is_urgent mirrors the 'urgency' tag, and a claim is a
+    # lease that expires so abandoned batches return to the queue
+    is_urgent = models.BooleanField(default=False)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_stories')
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date_submitted'], name='story_status_submitted_idx'),
+            # Backs the moderation queue order: urgent first, then oldest
+            models.Index(fields=['status', '-is_urgent', 'date_submitted'], name='story_moderation_queue_idx'),
+            # Backs the (-date_submitted, -id) keyset pagination of a user's list
+            models.Index(fields=['user', 'date_submitted', 'id'], name='story_user_submitted_idx'),
+            # Backs the delta-sync changes feed
+            models.Index(fields=['user', 'updated_at', 'id'], name='story_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.title} - {self.status}'
+
+
+class StoryTag(models.Model):
+    """Indexed mirror of Story.tags, one row per story and tag"""
+    story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='tag_rows')
+    tag = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['story', 'tag'], name='unique_story_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'story'], name='story_tag_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.story_id} - {self.tag}'
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Story
+from .signals import stories_moderated
+
+QUEUE_ORDER = ('-is_urgent', 'date_submitted', 'id')
+DECISIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+
+def _claimable(now):
+    return Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now)
+
+
+def _held_by(reviewer, now):
+    return Q(claimed_by=reviewer, claim_expires_at__gt=now)
+
+
+def pending_queue():
+    """Pending stories in review order: urgent first, then oldest"""
+    return Story.objects.filter(status='pending').order_by(*QUEUE_ORDER)
+
+
+def claim_batch(reviewer, batch_size):
+    """
+    Lease up to ``batch_size`` pending stories to ``reviewer``.
+
+    Stories the reviewer already holds count towards the batch and have
+    their lease renewed. New stories are taken with a guarded UPDATE that
+    only matches unclaimed or expired rows, so two reviewers claiming at
+    once never receive the same story.
+    """
+    now = timezone.now()
+    expires = now + timedelta(seconds=settings.HEVA_MODERATION_LEASE_SECONDS)
+    held = Story.objects.filter(_held_by(reviewer, now), status='pending')
+    held.update(claim_expires_at=expires)
+
+    for _ in range(3):
+        wanted = batch_size - Story.objects.filter(claimed_by=reviewer, claim_expires_at=expires).count()
+        if wanted <= 0:
+            break
+        candidates = list(pending_queue().filter(_claimable(now)).values_list('id', flat=True)[:wanted])
+        if not candidates:
+            break
+        Story.objects.filter(_claimable(now), id__in=candidates, status='pending').update(
+            claimed_by=reviewer, claim_expires_at=expires,
+        )
+
+    return list(
+        Story.objects.filter(claimed_by=reviewer, claim_expires_at=expires, status='pending')
+        .select_related('user').order_by(*QUEUE_ORDER)
+    )
+
+
+def release_claims(reviewer, story_ids=None):
+    """Hand the reviewer's claimed stories back to the queue"""
+    stories = Story.objects.filter(claimed_by=reviewer, status='pending')
+    if story_ids is not None:
+        stories = stories.filter(id__in=story_ids)
+    return stories.update(claimed_by=None, claim_expires_at=None)
+
+
+def decide(reviewer, story_ids, decision):
+    """
+    Approve or reject pending stories in a single UPDATE.
+
+    Only stories that are unclaimed or leased to ``reviewer`` change; the
+    ids of the ones that did are returned. QuerySet.update() skips
+    auto_now, so updated_at is set here for the delta-sync feed, and
+    stories_moderated is sent in the same transaction.
+    """
+    now = timezone.now()
+    status = DECISIONS[decision]
+    with transaction.atomic():
+        Story.objects.filter(
+            _held_by(reviewer, now) | _claimable(now), id__in=story_ids, status='pending',
+        ).update(
+            status=status,
+            date_approved=now,
+            approved_by=reviewer,
+            updated_at=now,
+            claimed_by=None,
+            claim_expires_at=None,
+        )
+        decided = list(
+            Story.objects.filter(id__in=story_ids, status=status, approved_by=reviewer, date_approved=now)
+            .values_list('id', flat=True)
+        )
+        if decided:
+            stories_moderated.send(sender=Story, story_ids=decided, status=status, reviewer=reviewer)
+    return decided
@@ -0,0 +1,13 @@
+from rest_framework import permissions
+
+
+def is_moderator(user):
+    # user_type is only ever set by staff: self-registration always creates creatives
+    return bool(user and user.is_authenticated and (user.is_staff or user.user_type == 'admin'))
+
+
+class IsModerator(permissions.BasePermission):
+    """Staff and HEVA admin accounts, who review stories"""
+
+    def has_permission(self, request, view):
+        return is_moderator(request.user)
@@ -0,0 +1,136 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+from .models import Story
+
+FTS_TABLE = 'storymanager_story_fts'
+# bm25 column weights: a hit in the title or tags counts for more than one in the body
+WEIGHTS = (10.0, 1.0, 5.0)
+HIGHLIGHT = ('<mark>', '</mark>')
+# FTS5 wraps matches in these control characters; the text around them is
+# user input, so it is HTML-escaped before they become HIGHLIGHT tags
+SENTINELS = ('\x02', '\x03')
+SNIPPET_TOKENS = 24
+# Shorter prefixes match most of the index and are searched as whole words
+MIN_PREFIX_LENGTH = 3
+
+# External-content FTS5 index over storymanager_story. The triggers keep it in
+# step with every write, including QuerySet.update() and bulk_create(). SQLite
+# drops the triggers whenever a migration rebuilds the story table, so such a
+# migration has to run these statements again (see 0006).
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, tags,
+        content='storymanager_story', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON storymanager_story BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON storymanager_story BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content, tags ON storymanager_story BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+        INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+    END""",
+]
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def rebuild_index(optimize=False):
+    """Re-read every story into the index, creating it first if it is missing"""
+    with connection.cursor() as cursor:
+        for statement in CREATE_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def to_match_expression(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted phrase, so FTS5 operators typed by users are
+    searched for literally; a trailing ``*`` keeps prefix matching on words of
+    at least MIN_PREFIX_LENGTH characters. Returns
+    None when the query has nothing searchable.
+    """
+    terms = []
+    for word in re.findall(r'[\w*]+', query):
+        prefix = word.endswith('*')
+        word = word.strip('*')
+        prefix = prefix and len(word) >= MIN_PREFIX_LENGTH
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return ' '.join(terms) or None
+
+
+def search_stories(query, status=None, tag=None, limit=20, offset=0):
+    """
+    Ranked story matches as (story, score, title_highlight, snippet) tuples.
+
+    Matching and ranking happen inside the FTS index; the status and tag
+    filters are applied to the matched rows only, so cost follows the
+    number of hits rather than the size of the story table.
+    """
+    expression = to_match_expression(query)
+    if expression is None:
+        return []
+    if not search_available():
+        return _search_fallback(query, status, tag, limit, offset)
+
+    sql = [
+        f"""SELECT s.id,
+            bm25({FTS_TABLE}, %s, %s, %s) AS score,
+            highlight({FTS_TABLE}, 0, %s, %s),
+            snippet({FTS_TABLE}, 1, %s, %s, '…', %s)
+        FROM {FTS_TABLE} JOIN storymanager_story s ON s.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s"""
+    ]
+    params = [*WEIGHTS, *SENTINELS, *SENTINELS, SNIPPET_TOKENS, expression]
+    if status:
+        sql.append('AND s.status = %s')
+        params.append(status)
+    if tag:
+        sql.append('AND EXISTS (SELECT 1 FROM storymanager_storytag t WHERE t.story_id = s.id AND t.tag = %s)')
+        params.append(tag)
+    sql.append('ORDER BY score, s.id LIMIT %s OFFSET %s')
+    params += [limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(' '.join(sql), params)
+        rows = cursor.fetchall()
+    stories = Story.objects.in_bulk([row[0] for row in rows])
+    return [(stories[row[0]], row[1], _markup(row[2]), _markup(row[3])) for row in rows if row[0] in stories]
+
+
+def _markup(text):
+    """Escaped story text with the sentinel-marked matches wrapped in HIGHLIGHT"""
+    text = html.escape(text or '')
+    return text.replace(SENTINELS[0], HIGHLIGHT[0]).replace(SENTINELS[1], HIGHLIGHT[1])
+
+
+def _search_fallback(query, status, tag, limit, offset):
+    # Unranked substring search for databases without FTS5
+    stories = Story.objects.filter(Q(title__icontains=query) | Q(content__icontains=query))
+    if status:
+        stories = stories.filter(status=status)
+    if tag:
+        stories = stories.filter(tag_rows__tag=tag)
+    stories = stories.order_by('-date_submitted', '-id')[offset:offset + limit]
+    return [(story, 0.0, html.escape(story.title), html.escape(story.content[:200])) for story in stories]
@@ -1,8 +1,45 @@
+from django.conf import settings
 from rest_framework import serializers
+from mediafiles.serializers import OwnedMediaField, media_url
 from .models import Story
 
 class StorySerializer(serializers.ModelSerializer):
+    audio_media = OwnedMediaField(kind='audio', required=False, allow_null=True)
+
+    class Meta:
+        model = Story
+        exclude = ['claimed_by', 'claim_expires_at']
+        read_only_fields = ['user', 'status', 'date_approved', 'approved_by', 'is_urgent']
+
+    def validate(self, attrs):
+        # Keep audio_file pointing at uploaded audio for clients that read the URL
+        if attrs.get('audio_media') is not None and not attrs.get('audio_file'):
+            attrs['audio_file'] = media_url(attrs['audio_media'], self.context.get('request'))
+        return attrs
+
+
+class ModerationStorySerializer(serializers.ModelSerializer):
+    author_name = serializers.CharField(source='user.full_name', read_only=True)
+
     class Meta:
         model = Story
-        fields = '__all__'
-        read_only_fields = ['user', 'status', 'date_approved', 'approved_by'] 
\ No newline at end of file
+        fields = [
+            'id', 'user', 'author_name', 'title', 'content', 'audio_file', 'tags', 'is_urgent',
+            'status', 'date_submitted', 'claim_expires_at',
+        ]
+        read_only_fields = fields
+
+
+class ModerationDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    decision = serializers.ChoiceField(choices=['approve', 'reject'])
+
+    def validate_ids(self, value):
+        limit = settings.HEVA_MODERATION_MAX_BATCH
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} stories per request')
+        return value
+
+
+class ModerationReleaseSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False) 
\ No newline at end of file
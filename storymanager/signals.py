@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from heva_backend.etags import bump_versions
+from .models import Story
+from .tags import sync_story_tags
+
+# Sent inside the transaction of a bulk moderation decision, which
+# bypasses post_save: sender=Story, story_ids, status, reviewer
+stories_moderated = Signal()
+
+
+@receiver(post_save, sender=Story)
+def sync_tags_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and 'tags' not in update_fields):
+        return
+    sync_story_tags([instance])
+
+
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def bump_story_versions(sender, instance, **kwargs):
+    bump_versions('stories', [instance.user_id])
+    bump_versions('activity')
+
+
+@receiver(stories_moderated)
+def bump_moderated_story_versions(sender, story_ids, **kwargs):
+    bump_versions('stories', Story.objects.filter(id__in=story_ids).values_list('user_id', flat=True).distinct())
+    bump_versions('activity')
@@ -0,0 +1,17 @@
+from heva_backend.relations import normalize_labels, sync_label_rows
+from .models import Story, StoryTag
+
+TAG_MAX_LENGTH = StoryTag._meta.get_field('tag').max_length
+URGENT_TAG = 'urgency'
+
+
+def sync_story_tags(stories):
+    """Mirror the stories' tags lists into StoryTag and their is_urgent flags"""
+    wanted = {story.pk: normalize_labels(story.tags, TAG_MAX_LENGTH) for story in stories}
+    sync_label_rows(StoryTag, 'story', 'tag', wanted)
+
+    urgent = {pk for pk, tags in wanted.items() if URGENT_TAG in tags}
+    Story.objects.filter(pk__in=urgent, is_urgent=False).update(is_urgent=True)
+    Story.objects.filter(pk__in=wanted.keys() - urgent, is_urgent=True).update(is_urgent=False)
+    for story in stories:
+        story.is_urgent = story.pk in urgent
@@ -1,3 +1,154 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from userauth.models import User
+from .models import Story
+from .moderation import claim_batch, decide, release_claims
+from .search import search_stories, to_match_expression
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.org', username=name, password=None, full_name=name.title(), **fields,
+    )
+
+
+@override_settings(HEVA_MODERATION_LEASE_SECONDS=600)
+class ModerationLeaseTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.alice = make_user('alice', user_type='admin')
+        self.bob = make_user('bob', is_staff=True)
+        self.stories = [Story.objects.create(user=self.author, title=f'Story {i}') for i in range(5)]
+
+    def _expire(self, reviewer):
+        Story.objects.filter(claimed_by=reviewer).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_urgent_stories_are_claimed_first(self):
+        urgent = Story.objects.create(user=self.author, title='Help', tags=['urgency'])
+        batch = claim_batch(self.alice, 2)
+        self.assertEqual([s.pk for s in batch], [urgent.pk, self.stories[0].pk])
+
+    def test_reviewers_never_share_a_story(self):
+        first = {s.pk for s in claim_batch(self.alice, 3)}
+        second = {s.pk for s in claim_batch(self.bob, 3)}
+        self.assertEqual(len(first), 3)
+        self.assertEqual(second, {s.pk for s in self.stories} - first)
+
+    def test_claiming_again_renews_and_tops_up(self):
+        first = claim_batch(self.alice, 2)
+        again = claim_batch(self.alice, 3)
+        self.assertEqual([s.pk for s in again][:2], [s.pk for s in first])
+        self.assertEqual(len(again), 3)
+        self.assertGreaterEqual(again[0].claim_expires_at, first[0].claim_expires_at)
+
+    def test_expired_leases_return_to_the_queue(self):
+        claim_batch(self.alice, 5)
+        self.assertEqual(claim_batch(self.bob, 5), [])
+        self._expire(self.alice)
+        self.assertEqual(len(claim_batch(self.bob, 5)), 5)
+
+    def test_release_hands_stories_back(self):
+        batch = claim_batch(self.alice, 2)
+        self.assertEqual(release_claims(self.alice, [batch[0].pk]), 1)
+        self.assertEqual(claim_batch(self.bob, 1)[0].pk, batch[0].pk)
+
+    def test_decide_skips_stories_leased_to_someone_else(self):
+        held = claim_batch(self.alice, 2)
+        free = self.stories[4]
+        decided = decide(self.bob, [held[0].pk, free.pk], 'approve')
+        self.assertEqual(decided, [free.pk])
+        free.refresh_from_db()
+        self.assertEqual((free.status, free.approved_by, free.claimed_by), ('approved', self.bob, None))
+        # Once the lease lapses anyone may decide
+        self._expire(self.alice)
+        self.assertEqual(decide(self.bob, [held[0].pk], 'reject'), [held[0].pk])
+
+    def test_decide_bumps_updated_at_and_is_idempotent(self):
+        story = self.stories[0]
+        Story.objects.filter(pk=story.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(decide(self.alice, [story.pk], 'approve'), [story.pk])
+        story.refresh_from_db()
+        self.assertGreater(story.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(decide(self.alice, [story.pk], 'reject'), [])
+
+    def test_endpoints_are_for_moderators_only(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.assertEqual(client.post(reverse('moderation-claim'), {}, format='json').status_code, 403)
+        client.force_authenticate(self.alice)
+        response = client.post(reverse('moderation-claim'), {'batch_size': 2}, format='json')
+        self.assertEqual((response.status_code, len(response.data['results'])), (200, 2))
+        response = client.post(
+            reverse('moderation-decide'), {'ids': [self.stories[0].pk, 999999], 'decision': 'approve'}, format='json',
+        )
+        self.assertEqual((response.data['decided'], response.data['skipped']), ([self.stories[0].pk], [999999]))
+
+
+class MatchExpressionTests(TestCase):
+    def test_words_become_quoted_phrases(self):
+        self.assertEqual(to_match_expression('music studio'), '"music" "studio"')
+
+    def test_fts_operators_are_searched_literally(self):
+        for query in ('music OR NOT studio', 'title:music', 'NEAR(music studio)', '"music', 'music^2 -studio'):
+            expression = to_match_expression(query)
+            # Only quoted words and prefix stars survive
+            self.assertRegex(expression, r'^("\w+"\*? ?)+$', query)
+
+    def test_prefixes_need_three_characters(self):
+        self.assertEqual(to_match_expression('mus* a*'), '"mus"* "a"')
+
+    def test_nothing_searchable(self):
+        for query in ('', '  ', '*** ()', '"'):
+            self.assertIsNone(to_match_expression(query), query)
+
+
+class StorySearchTests(TestCase):
+    url = reverse('story-search')
+
+    def setUp(self):
+        self.author = make_user('author')
+        self.approved = Story.objects.create(
+            user=self.author, title='Music studio', content='Recording a song at the studio', status='approved',
+        )
+        self.pending = Story.objects.create(user=self.author, title='Studio rent', content='Pending story')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def _ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_operator_queries_do_not_error(self):
+        for query in ('studio OR', 'NOT', 'title:music', '"unbalanced', 'studio*)', 'AND AND'):
+            self.assertEqual(self.client.get(self.url, {'q': query}).status_code, 200, query)
+
+    def test_ranked_prefix_search_sees_only_approved_stories(self):
+        self.assertEqual(self._ids(q='studio'), [self.approved.pk])
+        self.assertEqual(self._ids(q='rec*'), [self.approved.pk])
+
+    def test_moderators_search_every_status(self):
+        self.client.force_authenticate(make_user('moderator', user_type='admin'))
+        self.assertEqual(set(self._ids(q='studio')), {self.approved.pk, self.pending.pk})
+        self.assertEqual(self._ids(q='studio', status='pending'), [self.pending.pk])
+
+    def test_edits_reach_the_index(self):
+        self.approved.title = 'Tailoring workshop'
+        self.approved.save()
+        self.assertEqual(self._ids(q='tailoring'), [self.approved.pk])
+        self.approved.delete()
+        self.assertEqual(self._ids(q='tailoring'), [])
+
+    def test_highlights_escape_story_text(self):
+        Story.objects.create(
+            user=self.author, title='<script>alert(1)</script> drums', content='<img src=x onerror=alert(1)> drums',
+            status='approved',
+        )
+        (story, _, title, snippet), = search_stories('drums')
+        self.assertEqual(title, '&lt;script&gt;alert(1)&lt;/script&gt; <mark>drums</mark>')
+        self.assertNotIn('<img', snippet)
+        self.assertIn('<mark>drums</mark>', snippet)
@@ -1,6 +1,12 @@
 from django.urls import path
-from .views import StoryListCreateView
+from .views import (
+    StoryListCreateView, StorySearchView, ModerationClaimView, ModerationReleaseView, ModerationDecisionView,
+)
 
 urlpatterns = [
     path('stories/', StoryListCreateView.as_view(), name='story-list-create'),
+    path('search/', StorySearchView.as_view(), name='story-search'),
+    path('moderation/claim/', ModerationClaimView.as_view(), name='moderation-claim'),
+    path('moderation/release/', ModerationReleaseView.as_view(), name='moderation-release'),
+    path('moderation/decide/', ModerationDecisionView.as_view(), name='moderation-decide'),
 ] 
\ No newline at end of file
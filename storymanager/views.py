@@ -1,16 +1,121 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from heva_backend.etags import ConditionalGetMixin
+from heva_backend.pagination import KeysetPagination
 from .models import Story
-from .serializers import StorySerializer
+from .moderation import claim_batch, decide, pending_queue, release_claims
+from .permissions import IsModerator, is_moderator
+from .search import search_stories
+from .serializers import (
+    StorySerializer, ModerationStorySerializer, ModerationDecisionSerializer, ModerationReleaseSerializer,
+)
 
 # Create your views here.
 
-class StoryListCreateView(generics.ListCreateAPIView):
+class StoryListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    etag_scope = 'stories'
     serializer_class = StorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_submitted', '-id')
 
     def get_queryset(self):
-        return Story.objects.filter(user=self.request.user).order_by('-date_submitted')
+        return Story.objects.filter(user=self.request.user).order_by('-date_submitted', '-id')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+class StorySearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search over story titles, content and tags.
+
+    Moderators search every story and may filter by status; everyone else
+    only sees approved stories.
+    """
+    serializer_class = StorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 50
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'A search query is required'})
+        status = params.get('status') or None
+        if status and status not in dict(Story.STATUS_CHOICES):
+            raise ValidationError({'status': f'Unknown status {status!r}'})
+        if not is_moderator(request.user):
+            status = 'approved'
+        try:
+            page_size = max(1, min(int(params.get('page_size', self.page_size)), self.max_page_size))
+            offset = max(0, int(params.get('offset', 0)))
+        except ValueError:
+            raise ValidationError({'detail': 'page_size and offset must be integers'})
+        if offset > settings.HEVA_STORY_SEARCH_MAX_OFFSET:
+            raise ValidationError({'offset': 'Refine the query instead of paging this deep'})
+
+        matches = search_stories(query, status=status, tag=params.get('tag') or None, limit=page_size + 1, offset=offset)
+        results = []
+        for story, score, title_highlight, snippet in matches[:page_size]:
+            data = self.get_serializer(story).data
+            data.update(score=score, title_highlight=title_highlight, snippet=snippet)
+            results.append(data)
+
+        next_link = None
+        if len(matches) > page_size:
+            next_link = replace_query_param(request.build_absolute_uri(), 'offset', offset + page_size)
+        return Response({'next': next_link, 'results': results})
+
+class ModerationClaimView(generics.GenericAPIView):
+    """
+    Lease the next batch of pending stories to the calling reviewer.
+
+    Repeating the call renews the reviewer's current leases and tops the
+    batch up; leases that lapse put the stories back in the queue.
+    """
+    serializer_class = ModerationStorySerializer
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        try:
+            batch_size = int(request.data.get('batch_size', settings.HEVA_MODERATION_BATCH_SIZE))
+        except (TypeError, ValueError):
+            raise ValidationError({'batch_size': 'Must be an integer'})
+        batch_size = max(1, min(batch_size, settings.HEVA_MODERATION_MAX_BATCH))
+        stories = claim_batch(request.user, batch_size)
+        return Response({
+            'pending': pending_queue().count(),
+            'results': self.get_serializer(stories, many=True).data,
+        })
+
+class ModerationReleaseView(generics.GenericAPIView):
+    """Return claimed stories to the queue without deciding them"""
+    serializer_class = ModerationReleaseSerializer
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = release_claims(request.user, serializer.validated_data.get('ids'))
+        return Response({'released': released})
+
+class ModerationDecisionView(generics.GenericAPIView):
+    """Approve or reject many stories in one statement"""
+    serializer_class = ModerationDecisionSerializer
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        decided = decide(request.user, ids, serializer.validated_data['decision'])
+        return Response({
+            'decided': decided,
+            # Already decided, claimed by another reviewer or unknown
+            'skipped': sorted(set(ids) - set(decided)),
+        })
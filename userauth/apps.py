@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UserauthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'userauth'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        # heva_backend is not an installed app, so its checks register here
+        from heva_backend import checks as backend_checks  # noqa: F401
@@ -0,0 +1,197 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from heva_backend.timing import timed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .models import User
+
+# Token claim holding the user fields most views read
+USER_CLAIM = 'usr'
+CLAIM_FIELDS = ('user_type', 'is_staff', 'is_superuser', 'is_active', 'primary_device')
+
+
+def _user_key(user_id):
+    return f'userauth:user:{user_id}'
+
+
+def _changed_key(user_id):
+    return f'userauth:changed:{user_id}'
+
+
+class LocalUserCache:
+    """
+    A small per-process LRU of pickled users in front of the shared cache.
+
+    Other processes cannot evict from it, so entries only live for
+    HEVA_AUTH_LOCAL_CACHE_TTL seconds. Users are stored pickled so a view
+    changing request.user never changes the cached copy.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        return pickle.loads(data)
+
+    def set(self, user_id, user):
+        size = settings.HEVA_AUTH_LOCAL_CACHE_SIZE
+        if not size:
+            return
+        entry = (time.monotonic() + settings.HEVA_AUTH_LOCAL_CACHE_TTL, pickle.dumps(user))
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_users = LocalUserCache()
+
+
+def invalidate_cached_user(user_id):
+    """
+    Forget a user's cached row and distrust tokens issued before now.
+
+    Called on every save and delete of a user, which covers deactivation
+    and password changes. Writes through QuerySet.update() bypass it.
+    """
+    leeway = api_settings.LEEWAY
+    leeway = leeway.total_seconds() if isinstance(leeway, timedelta) else leeway
+    # Long enough to outlive every token issued before the change
+    timeout = max(
+        settings.HEVA_AUTH_USER_CACHE_TTL, int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds() + leeway) + 1,
+    )
+    cache.set(_changed_key(user_id), time.time(), timeout)
+    cache.delete(_user_key(user_id))
+    local_users.discard(user_id)
+
+
+def load_user(user_id):
+    """
+    The User with ``user_id`` from the local LRU, the shared cache or the
+    database, in that order. Returns None when there is no such user.
+
+    Shared cache entries carry the change stamp current when they were
+    read, so a row read just before a concurrent save is never served
+    after that save.
+    """
+    user = local_users.get(user_id)
+    if user is not None:
+        return user
+    found = cache.get_many([_user_key(user_id), _changed_key(user_id)])
+    changed = found.get(_changed_key(user_id))
+    entry = found.get(_user_key(user_id))
+    if entry is not None and entry[0] == changed:
+        user = entry[1]
+    else:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(_user_key(user_id), (changed, user), settings.HEVA_AUTH_USER_CACHE_TTL)
+    local_users.set(user_id, user)
+    return user
+
+
+def user_from_claims(user_id, claims):
+    """An unsaved-looking User built from token claims; other fields load on access"""
+    values = dict(claims, id=user_id)
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token that carries CLAIM_FIELDS when HEVA_AUTH_TOKEN_CLAIMS is on"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        if settings.HEVA_AUTH_TOKEN_CLAIMS:
+            # Copied into every access token minted from this one
+            token[USER_CLAIM] = {field: getattr(user, field) for field in CLAIM_FIELDS}
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that avoids the per-request User query.
+
+    Tokens carrying user claims are trusted without any lookup unless the
+    user changed after the token was issued; other tokens resolve through
+    load_user(). Fields missing from the claims are fetched on first access.
+    """
+
+    @timed('auth')
+    def authenticate(self, request):
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        claims = validated_token.get(USER_CLAIM)
+        if claims and settings.HEVA_AUTH_TOKEN_CLAIMS:
+            changed = cache.get(_changed_key(user_id))
+            if changed is None or validated_token.get('iat', 0) > changed:
+                if not claims.get('is_active', True):
+                    raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+                return user_from_claims(user_id, claims)
+
+        user = load_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+def authenticate_stream(request, query_param='token'):
+    """
+    (user, validated token) for a plain Django request.
+
+    Takes the token from the Authorization header or, for EventSource
+    clients that cannot set headers, the ``token`` query parameter.
+    Raises InvalidToken or AuthenticationFailed.
+    """
+    authentication = CachedJWTAuthentication()
+    with timed('auth'):
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else request.GET.get(query_param, '').encode()
+        if not raw_token:
+            raise AuthenticationFailed(_('Authentication credentials were not provided.'), code='not_authenticated')
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token), validated_token
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from heva_backend.checks import cache_is_shared
+
+
+@register()
+def token_claims_need_shared_cache(app_configs, **kwargs):
+    """
+    Claims are trusted until the user changes, and that change is recorded
+    in the cache. A per-process cache only tells the worker that saved the
+    user, so the others keep honouring a deactivated or demoted user's
+    claims until the token expires.
+    """
+    if settings.HEVA_AUTH_TOKEN_CLAIMS and not cache_is_shared():
+        return [Warning(
+            'HEVA_AUTH_TOKEN_CLAIMS is on but the default cache is not shared between processes.',
+            hint=(
+                'Point CACHES at Redis or Memcached before enabling token claims, '
+                'otherwise deactivation and role changes only reach the worker that made them.'
+            ),
+            id='userauth.W001',
+        )]
+    return []
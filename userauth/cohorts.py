@@ -0,0 +1,162 @@
+import atexit
+import csv
+import io
+import json
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from heva_backend.etags import bump_versions
+from .hashing import encode_passwords
+from .memberships import sync_group_memberships
+from .models import User
+from .serializers import CohortMemberSerializer
+
+# CSV cells holding lists (separated by ;) and JSON objects
+CSV_LIST_FIELDS = {'marginalized_groups'}
+CSV_JSON_FIELDS = {'social_proof'}
+# User types a field agent may register; only staff may register others,
+# since user_type itself grants agent and moderator rights
+AGENT_USER_TYPES = {'creative'}
+
+_pool = None
+
+
+def get_pool():
+    """The per-process password hashing pool, started on first use"""
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the parent may be a threaded server
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.HEVA_PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+        )
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def hash_passwords(passwords):
+    """
+    Hash ``passwords`` with the default hasher, in order.
+
+    Salts are drawn here and the slow key stretching is spread across
+    HEVA_PASSWORD_HASH_WORKERS processes.
+    """
+    hasher = get_hasher()
+    items = [(password, hasher.salt()) for password in passwords]
+    workers = settings.HEVA_PASSWORD_HASH_WORKERS
+    if workers <= 1 or len(items) <= 1:
+        return encode_passwords(hasher, items)
+    # A few chunks per worker keeps them all busy without one task per row
+    size = math.ceil(len(items) / (workers * 4))
+    chunks = [items[start:start + size] for start in range(0, len(items), size)]
+    return [encoded for chunk in get_pool().map(partial(encode_passwords, hasher), chunks) for encoded in chunk]
+
+
+def parse_csv(upload):
+    """Rows of an uploaded CSV file as dicts, leaving out empty cells so defaults apply"""
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    rows = []
+    try:
+        for record in csv.DictReader(text):
+            row = {}
+            for name, value in record.items():
+                if name is None or value is None or not value.strip():
+                    continue
+                name, value = name.strip(), value.strip()
+                if name in CSV_LIST_FIELDS:
+                    value = [item.strip() for item in value.split(';') if item.strip()]
+                elif name in CSV_JSON_FIELDS:
+                    try:
+                        value = json.loads(value)
+                    except ValueError:
+                        pass  # Reported by the row's validation
+                row[name] = value
+            rows.append(row)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValidationError({'file': [f'Could not read the CSV file: {e}']})
+    finally:
+        text.detach()
+    return rows
+
+
+def _validate(agent, index, row, child):
+    if not isinstance(row, dict):
+        return None, {'index': index, 'status': 'invalid', 'errors': {'non_field_errors': ['Expected an object']}}
+    try:
+        validated = child.run_validation(row)
+    except ValidationError as e:
+        return None, {'index': index, 'status': 'invalid', 'email': row.get('email'), 'errors': e.detail}
+    if validated.get('user_type', 'creative') not in AGENT_USER_TYPES and not agent.is_staff:
+        return None, {
+            'index': index, 'status': 'invalid', 'email': validated['email'],
+            'errors': {'user_type': ['Field agents can only register creatives']},
+        }
+    validated['email'] = User.objects.normalize_email(validated['email'])
+    validated['username'] = User.normalize_username(validated['username'])
+    return validated, None
+
+
+def _ingest(agent, rows):
+    child = CohortMemberSerializer()
+    results, valid = [], []
+    for index, row in enumerate(rows):
+        validated, failure = _validate(agent, index, row, child)
+        if failure is not None:
+            results.append(failure)
+        else:
+            valid.append((index, validated))
+            results.append(None)
+
+    taken_emails = set(User.objects.filter(email__in={v['email'] for _, v in valid}).values_list('email', flat=True))
+    taken_usernames = set(
+        User.objects.filter(username__in={v['username'] for _, v in valid}).values_list('username', flat=True)
+    )
+    pending = []
+    for index, validated in valid:
+        email, username = validated['email'], validated['username']
+        # A repeat within the upload resolves to its first occurrence
+        clashes = [field for field, value, taken in [
+            ('email', email, taken_emails), ('username', username, taken_usernames),
+        ] if value in taken]
+        taken_emails.add(email)
+        taken_usernames.add(username)
+        if clashes:
+            results[index] = {'index': index, 'status': 'duplicate', 'email': email, 'fields': clashes}
+            continue
+        results[index] = {'index': index, 'status': 'created', 'id': None, 'email': email}
+        pending.append(validated)
+
+    passwords = hash_passwords([validated.pop('password') for validated in pending])
+    users = [User(**validated, password=password) for validated, password in zip(pending, passwords)]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        # bulk_create sends no post_save, so mirror the groups here
+        sync_group_memberships(users)
+        bump_versions('activity')
+
+    created = iter(users)
+    for result in results:
+        if result['status'] == 'created':
+            result['id'] = next(created).pk
+    return results
+
+
+def register_cohort(agent, rows):
+    """
+    Validate and create many users in one transaction.
+
+    Returns one result per row, in order, with status ``created``,
+    ``duplicate`` (the email or username is already registered, or repeats
+    an earlier row) or ``invalid``.
+    """
+    try:
+        return _ingest(agent, rows)
+    except IntegrityError:
+        # Someone registered one of the same accounts meanwhile; it now
+        # resolves as a duplicate on the second pass
+        return _ingest(agent, rows)
@@ -0,0 +1,8 @@
+def encode_passwords(hasher, items):
+    """
+    Hash (password, salt) pairs with ``hasher``.
+
+    Runs in spawned worker processes, so this module imports nothing that
+    needs Django's settings or app registry.
+    """
+    return [hasher.encode(password, salt) for password, salt in items]
@@ -0,0 +1,11 @@
+from heva_backend.relations import normalize_labels, sync_label_rows
+from .models import UserGroupMembership
+
+GROUP_MAX_LENGTH = UserGroupMembership._meta.get_field('group').max_length
+
+
+def sync_group_memberships(users):
+    """Mirror the users' marginalized_groups lists into UserGroupMembership"""
+    sync_label_rows(UserGroupMembership, 'user', 'group', {
+        user.pk: normalize_labels(user.marginalized_groups, GROUP_MAX_LENGTH) for user in users
+    })
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from heva_backend.relations import normalize_labels
+
+
+def backfill_memberships(apps, schema_editor):
+    User = apps.get_model('userauth', 'User')
+    UserGroupMembership = apps.get_model('userauth', 'UserGroupMembership')
+    rows = []
+    for pk, values in User.objects.values_list('pk', 'marginalized_groups').iterator(chunk_size=2000):
+        rows += [UserGroupMembership(user_id=pk, group=value) for value in normalize_labels(values, 50)]
+        if len(rows) >= 2000:
+            UserGroupMembership.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    UserGroupMembership.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserGroupMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'user'], name='user_group_group_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'group'), name='unique_user_group')],
+            },
+        ),
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
@@ -26,6 +26,8 @@ class User(AbstractUser):
     social_proof = models.JSONField(default=dict, blank=True)  # e.g. {'reference_name': '', 'relationship': '', 'phone': ''}
     profile_image = models.URLField(blank=True)
     voice_intro = models.URLField(blank=True)
+    profile_image_media = models.ForeignKey('mediafiles.MediaFile', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    voice_intro_media = models.ForeignKey('mediafiles.MediaFile', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     consent_data_collection = models.BooleanField(default=False)
     consent_contact = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
@@ -35,3 +37,21 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+
+class UserGroupMembership(models.Model):
+    """Indexed mirror of User.marginalized_groups, one row per user and group"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_memberships')
+    group = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'group'], name='unique_user_group'),
+        ]
+        indexes = [
+            # Group counts and drill-downs read this index only
+            models.Index(fields=['group', 'user'], name='user_group_group_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.group}'
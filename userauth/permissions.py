@@ -0,0 +1,12 @@
+from rest_framework import permissions
+
+
+def is_field_agent(user):
+    return bool(user and user.is_authenticated and (user.is_staff or user.user_type in ('agent', 'admin')))
+
+
+class IsFieldAgent(permissions.BasePermission):
+    """Field agents, who register community members, and HEVA admins"""
+
+    def has_permission(self, request, view):
+        return is_field_agent(request.user)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from mediafiles.serializers import OwnedMediaField, media_url, preferred_media_url
 from .models import User
 from django.contrib.auth.password_validation import validate_password
 
@@ -11,6 +13,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'disability_type', 'marginalized_groups', 'primary_device', 'literacy_level', 'social_proof',
             'profile_image', 'voice_intro', 'consent_data_collection', 'consent_contact', 'password'
         ]
+        # Roles grant moderation and registration rights, so self-registration
+        # always creates a creative; staff assign other types
+        read_only_fields = ['user_type']
 
     def create(self, validated_data):
         user = User.objects.create_user(
@@ -31,11 +36,46 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             voice_intro=validated_data.get('voice_intro', ''),
             consent_data_collection=validated_data.get('consent_data_collection', False),
             consent_contact=validated_data.get('consent_contact', False),
+            password=validated_data['password'],
         )
-        user.set_password(validated_data['password'])
-        user.save()
         return user
 
+class CohortMemberSerializer(UserRegistrationSerializer):
+    """One row of a cohort import; email and username uniqueness is checked for the whole batch at once"""
+    # Writable here, unlike self-registration; cohorts.py limits who may set it
+    user_type = serializers.ChoiceField(choices=User._meta.get_field('user_type').choices, default='creative')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        return fields
+
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
-    password = serializers.CharField(write_only=True)
\ No newline at end of file
+    password = serializers.CharField(write_only=True)
+
+class ProfileMediaSerializer(serializers.ModelSerializer):
+    profile_image_media = OwnedMediaField(kind='image', required=False, allow_null=True)
+    voice_intro_media = OwnedMediaField(kind='audio', required=False, allow_null=True)
+    profile_image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['profile_image_media', 'voice_intro_media', 'profile_image', 'voice_intro', 'profile_image_url']
+        read_only_fields = ['profile_image', 'voice_intro']
+
+    def get_profile_image_url(self, obj):
+        # Sized for the requesting device rather than the uploaded original
+        if obj.profile_image_media is None:
+            return obj.profile_image
+        return preferred_media_url(obj.profile_image_media, self.context.get('request'))
+
+    def validate(self, attrs):
+        # The legacy URL fields follow the uploaded media
+        request = self.context.get('request')
+        for media_field, url_field in [('profile_image_media', 'profile_image'), ('voice_intro_media', 'voice_intro')]:
+            if media_field in attrs:
+                media = attrs[media_field]
+                attrs[url_field] = media_url(media, request) if media is not None else ''
+        return attrs
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from heva_backend.etags import bump_versions
+from .authentication import invalidate_cached_user
+from .memberships import sync_group_memberships
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def sync_memberships_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and 'marginalized_groups' not in update_fields):
+        return
+    sync_group_memberships([instance])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+    # Again once committed, in case a request cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_versions(sender, instance, **kwargs):
+    bump_versions('activity')
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import UserRegistrationView, UserLoginView
+from .views import UserRegistrationView, CohortRegistrationView, UserLoginView, ProfileMediaView
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
+    path('register/cohort/', CohortRegistrationView.as_view(), name='register-cohort'),
     path('login/', UserLoginView.as_view(), name='login'),
+    path('profile/media/', ProfileMediaView.as_view(), name='profile-media'),
 ]
\ No newline at end of file
@@ -1,10 +1,14 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserRegistrationSerializer, UserLoginSerializer
+from mediafiles.serializers import preferred_media_url
+from .authentication import ClaimsRefreshToken
+from .cohorts import parse_csv, register_cohort
+from .permissions import IsFieldAgent
+from .serializers import UserRegistrationSerializer, UserLoginSerializer, ProfileMediaSerializer, CohortMemberSerializer
 from .models import User
 
 # Create your views here.
@@ -13,6 +17,35 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
 
+class CohortRegistrationView(generics.GenericAPIView):
+    """
+    Register a community group in one request, reporting a status per row.
+
+    Takes a JSON list of users (or {"users": [...]}) or a CSV upload in the
+    ``file`` field, with marginalized_groups separated by semicolons.
+    """
+    serializer_class = CohortMemberSerializer
+    permission_classes = [IsFieldAgent]
+
+    def post(self, request):
+        if 'file' in request.FILES:
+            rows = parse_csv(request.FILES['file'])
+        else:
+            rows = request.data.get('users') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'Expected a non-empty list of users or a CSV file'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.HEVA_COHORT_MAX_USERS:
+            return Response(
+                {'detail': f'At most {settings.HEVA_COHORT_MAX_USERS} users per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = register_cohort(request.user, rows)
+        counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({**counts, 'results': results}, status=status.HTTP_201_CREATED if counts['created'] else status.HTTP_200_OK)
+
 class UserLoginView(generics.GenericAPIView):
     serializer_class = UserLoginSerializer
     permission_classes = [AllowAny]
@@ -22,7 +55,7 @@ class UserLoginView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         user = authenticate(email=serializer.validated_data['email'], password=serializer.validated_data['password'])
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -34,7 +67,20 @@ class UserLoginView(generics.GenericAPIView):
                     'gender': user.gender,
                     'disability': user.disability,
                     'marginalized_groups': user.marginalized_groups,
+                    'profile_image_url': (
+                        preferred_media_url(user.profile_image_media, request, device=user.primary_device)
+                        if user.profile_image_media_id else user.profile_image
+                    ),
                     # ...add more fields as needed
                 }
             })
         return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+class ProfileMediaView(generics.RetrieveUpdateAPIView):
+    """Link uploaded media to the user's profile image and voice intro"""
+    serializer_class = ProfileMediaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self):
+        # request.user may be a cached or token-built copy; update the stored row
+        return User.objects.get(pk=self.request.user.pk)